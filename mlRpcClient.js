@@ -0,0 +1,148 @@
+const net = require('net');
+
+// MessagePack via @msgpack/msgpack when it is installed; JSON frames otherwise
+let msgpack = null;
+try {
+    msgpack = require('@msgpack/msgpack');
+} catch (err) {
+    msgpack = null;
+}
+
+// Frame: 1 codec byte ('m' MessagePack, 'j' JSON), 4-byte big-endian body length, body
+const HEADER_BYTES = 5;
+
+function encodeFrame(message) {
+    const codec = msgpack ? 'm' : 'j';
+    const body = msgpack
+        ? Buffer.from(msgpack.encode(message))
+        : Buffer.from(JSON.stringify(message));
+    const header = Buffer.alloc(HEADER_BYTES);
+    header.write(codec, 0, 'ascii');
+    header.writeUInt32BE(body.length, 1);
+    return Buffer.concat([header, body]);
+}
+
+function decodeBody(codec, body) {
+    return codec === 'm' ? msgpack.decode(body) : JSON.parse(body.toString('utf8'));
+}
+
+/**
+ * The connection failed before a request's frame was written, so the ML service never saw it
+ * and the request is safe to send again over another transport.
+ */
+class MlRpcConnectionError extends Error {
+    constructor(cause) {
+        super(cause.message);
+        this.name = 'MlRpcConnectionError';
+        this.code = cause.code;
+    }
+}
+
+/**
+ * Persistent connection to the ML service's RPC server (SCHEDULER_RPC_BIND on the Python side).
+ * Requests are multiplexed over one socket and matched to responses by id.
+ */
+class MlRpcClient {
+    constructor(address, { timeout = 30000 } = {}) {
+        this.address = address;
+        this.timeout = timeout;
+        this.socket = null;
+        this.buffer = Buffer.alloc(0);
+        this.pending = new Map();
+        this.nextId = 1;
+    }
+
+    connect() {
+        if (this.socket) {
+            return this.socket;
+        }
+        const options = this.address.startsWith('unix:')
+            ? { path: this.address.slice('unix:'.length) }
+            : { host: this.address.split(':')[0], port: Number(this.address.split(':')[1]) };
+
+        const socket = net.createConnection(options);
+        socket.setNoDelay(true);
+        // A failed socket fires 'error' then 'close', and a request may have opened a new one in
+        // between; events from a socket that is no longer current must not touch the new one
+        socket.on('data', (chunk) => {
+            if (this.socket === socket) {
+                this.onData(chunk);
+            }
+        });
+        socket.on('error', (err) => {
+            if (this.socket === socket) {
+                this.reset(err);
+            }
+        });
+        socket.on('close', () => {
+            if (this.socket === socket) {
+                this.reset(new Error('ML RPC connection closed'));
+            }
+        });
+        this.socket = socket;
+        return socket;
+    }
+
+    reset(err) {
+        const socket = this.socket;
+        this.socket = null;
+        this.buffer = Buffer.alloc(0);
+        if (socket) {
+            socket.destroy();
+        }
+        for (const { reject, timer, sent } of this.pending.values()) {
+            clearTimeout(timer);
+            reject(sent ? err : new MlRpcConnectionError(err));
+        }
+        this.pending.clear();
+    }
+
+    onData(chunk) {
+        this.buffer = Buffer.concat([this.buffer, chunk]);
+        while (this.buffer.length >= HEADER_BYTES) {
+            const length = this.buffer.readUInt32BE(1);
+            if (this.buffer.length < HEADER_BYTES + length) {
+                return;
+            }
+            const codec = this.buffer.toString('ascii', 0, 1);
+            const body = this.buffer.subarray(HEADER_BYTES, HEADER_BYTES + length);
+            this.buffer = this.buffer.subarray(HEADER_BYTES + length);
+
+            const message = decodeBody(codec, body);
+            const request = this.pending.get(message.id);
+            if (request) {
+                this.pending.delete(message.id);
+                clearTimeout(request.timer);
+                request.resolve(message);
+            } else if (message.id === null) {
+                // The server rejected a frame and is closing the connection
+                this.socket.destroy(new Error(message.body.error));
+            }
+        }
+    }
+
+    call(op, payload) {
+        const id = this.nextId++;
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pending.delete(id);
+                reject(new Error(`ML RPC ${op} timed out after ${this.timeout}ms`));
+            }, this.timeout);
+            const request = { resolve, reject, timer, sent: false };
+            this.pending.set(id, request);
+            this.connect().write(encodeFrame({ id, op, payload }), (err) => {
+                if (!err) {
+                    request.sent = true;
+                }
+            });
+        });
+    }
+
+    /** Resolves to { status, body } just like the HTTP endpoint's status code and JSON body */
+    generateSchedule(payload) {
+        return this.call('generate-schedule', payload);
+    }
+}
+
+module.exports = MlRpcClient;
+module.exports.MlRpcConnectionError = MlRpcConnectionError;
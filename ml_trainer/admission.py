@@ -0,0 +1,124 @@
+from typing import Iterator, Optional
+from contextlib import contextmanager
+import threading
+import logging
+import math
+import time
+import os
+
+from metrics import registry, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+admission_wait = registry.register(Histogram(
+    "scheduler_admission_wait_seconds",
+    "Time requests spent waiting for an optimizer slot",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+))
+admission_rejected = registry.register(Counter(
+    "scheduler_admission_rejected_total",
+    "Requests shed by admission control",
+    ("reason",)
+))
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted; retry_after is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Caps concurrent optimizer runs; a bounded number of requests may wait, the rest are shed"""
+
+    def __init__(self, max_concurrent: int, max_waiting: int, wait_timeout: float):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_waiting = max(0, max_waiting)
+        self.wait_timeout = wait_timeout
+        self.active = 0
+        self.waiting = 0
+        # Requests waiting on an identical run another request was admitted for (see follow)
+        self.following = 0
+        # Moving average of how long a run holds its slot, for Retry-After
+        self._avg_hold = 1.0
+        self._cond = threading.Condition()
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        backlog = self.waiting + self.following + self.active
+        return max(1, math.ceil(self._avg_hold * backlog / self.max_concurrent))
+
+    def acquire(self) -> None:
+        """Take a slot, waiting up to wait_timeout; raises AdmissionRejected when overloaded"""
+        with self._cond:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                admission_wait.observe(0.0)
+                return
+            self._check_room()
+
+            started = time.perf_counter()
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.active < self.max_concurrent, self.wait_timeout)
+            finally:
+                self.waiting -= 1
+            admission_wait.observe(time.perf_counter() - started)
+            if not admitted:
+                admission_rejected.inc(reason="timeout")
+                raise AdmissionRejected(f"Timed out after {self.wait_timeout}s waiting for the scheduler",
+                                        self.retry_after())
+            self.active += 1
+
+    def _check_room(self) -> None:
+        if self.waiting + self.following >= self.max_waiting:
+            admission_rejected.inc(reason="queue_full")
+            raise AdmissionRejected(f"Scheduler is busy ({self.waiting + self.following} requests waiting)",
+                                    self.retry_after())
+
+    def release(self, held_seconds: Optional[float] = None) -> None:
+        with self._cond:
+            self.active -= 1
+            if held_seconds is not None:
+                self._avg_hold = 0.8 * self._avg_hold + 0.2 * held_seconds
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self) -> Iterator[None]:
+        """Hold a slot for the duration of the block"""
+        self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - started)
+
+    @contextmanager
+    def follow(self) -> Iterator[None]:
+        """Count a request that waits on another request's run against the waiting room for the
+        duration of the block; it holds a thread just as a queued request does. Raises
+        AdmissionRejected when the room is full."""
+        with self._cond:
+            self._check_room()
+            self.following += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.following -= 1
+
+# Optimizer runs are CPU-bound under the GIL, so a small limit costs no throughput. Keep
+# max concurrent + max waiting below gunicorn's thread count so health checks and /metrics
+# still get a thread while the scheduler is saturated.
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get("SCHEDULER_MAX_CONCURRENT", 2)),
+    max_waiting=int(os.environ.get("SCHEDULER_ADMISSION_QUEUE", 4)),
+    wait_timeout=float(os.environ.get("SCHEDULER_ADMISSION_TIMEOUT", 10))
+)
+
+registry.register(Gauge("scheduler_admission_queue_depth", "Requests waiting for an optimizer slot",
+                        lambda: admission.waiting))
+registry.register(Gauge("scheduler_admission_active", "Optimizer runs currently admitted",
+                        lambda: admission.active))
+registry.register(Gauge("scheduler_admission_following", "Requests waiting on an identical in-flight run",
+                        lambda: admission.following))
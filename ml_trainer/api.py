@@ -1,14 +1,28 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from constraint_optimizer import ScheduleOptimizer
-from semester_based_optimizer import SemesterBasedOptimizer  # Add this import
-from data_processor import ScheduleDataProcessor
+from schedule_runner import prepare_schedule_data, run_schedule_batch
+from progress_stream import ProgressStream
+from logging_config import configure_logging
+from metrics import registry, observe_outcome, observe_phase
+import time
+from job_queue import job_queue, JobQueueFull, JobQueueUnavailable
+from schedule_cache import schedule_cache
+from catalog_store import catalog_store
+from admission import admission, AdmissionRejected
+from cancellation import CancelToken, socket_closed
+from schedule_service import fragments_for, serve_schedule
+from replan import fixed_semester_count, run_replan
+from comparison import run_comparison
+from sweep import run_sweep
+from request_payload import MAX_PAYLOAD_BYTES, PayloadError, read_json_payload
+from response_encoding import FastJSONProvider, compress_response, encode_schedule_body, orjson
 import os
 from datetime import datetime
 import logging
-import json
 
 app = Flask(__name__)
+# Werkzeug's own limit, for anything that reads the body without read_json_payload
+app.config["MAX_CONTENT_LENGTH"] = MAX_PAYLOAD_BYTES
 # Update CORS configuration
 CORS(app, resources={
     r"/*": {
@@ -18,18 +32,25 @@ CORS(app, resources={
             "http://web:3000",
             "*"  # Temporarily allow all origins for testing
         ],
-        "methods": ["GET", "POST", "OPTIONS"],
+        "methods": ["GET", "POST", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization", "Origin"],
         "expose_headers": ["Content-Type", "Authorization"]
     }
 })
 
-data_processor = ScheduleDataProcessor()
+# Serialize jsonify() responses with orjson when it is installed
+if orjson is not None:
+    app.json = FastJSONProvider(app)
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Upper bound on payloads accepted by /generate-schedules
+MAX_BATCH_SIZE = int(os.environ.get('SCHEDULER_MAX_BATCH', 500))
+# Routes whose large bodies have courseData streamed into the catalog store (see payload_stream)
+STREAMED_CATALOG_ENDPOINTS = {"generate_schedule", "generate_schedule_stream", "register_catalog"}
+
 # Add health check endpoint
 @app.route('/', methods=['GET'])
 def health_check():
@@ -51,6 +72,66 @@ def ping():
         "port": os.environ.get('PORT', 'unknown')
     })
 
+@app.before_request
+def parse_json_payload():
+    """Read, size-check and parse POST bodies before any route runs, rejecting bad ones early"""
+    if request.method != 'POST':
+        return None
+    try:
+        g.payload, g.catalog = read_json_payload(request, request.endpoint in STREAMED_CATALOG_ENDPOINTS)
+    except PayloadError as e:
+        logger.warning("Rejected request payload", extra={
+            "path": request.path,
+            "status": e.status,
+            "reason": str(e)
+        })
+        return jsonify(e.report or {
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), e.status
+
+@app.after_request
+def compress(response):
+    """Compress responses for clients that accept gzip or deflate"""
+    return compress_response(request, response)
+
+def schedule_response(body, fragments, status=200, client_semesters=0):
+    """Build a JSON response from pre-encoded course fragments instead of jsonify"""
+    return Response(encode_schedule_body(body, fragments, client_semesters), status=status, mimetype='application/json')
+
+def client_disconnected_probe():
+    """Callable telling whether this request's client has hung up, or None when the server doesn't expose the socket"""
+    client_socket = request.environ.get("gunicorn.socket") or request.environ.get("werkzeug.socket")
+    if client_socket is None:
+        return None
+    return lambda: socket_closed(client_socket)
+
+def overloaded_response(error):
+    """Fast 503 for requests shed by admission control"""
+    logger.warning(str(error))
+    response = jsonify({
+        "error": str(error),
+        "metadata": {
+            "success": False,
+            "timestamp": str(datetime.now())
+        }
+    })
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of scheduler metrics"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    """Hit and miss counters for the schedule result cache"""
+    return jsonify(schedule_cache.stats())
+
 @app.route('/generate-schedule', methods=['POST', 'OPTIONS'])
 def generate_schedule():
     """Generate and return a complete course schedule"""
@@ -58,53 +139,76 @@ def generate_schedule():
         return '', 204
         
     try:
-        logger.info("=== Schedule Generation Request ===")
-        data = request.json
-        logger.info(f"Incoming payload: {json.dumps(data, indent=2)}")
-        
-        # Process raw data into scheduler-friendly format
-        processor = ScheduleDataProcessor()
-        processed_data = processor.process_payload(data)
-        logger.info(f"Processed data complete with {len(processed_data['classes'])} courses")
-        
-        # Check if processing was successful
-        if "error" in processed_data:
-            logger.error(f"Data processing failed: {processed_data['error']}")
-            return jsonify(processed_data), 400
-        
-        # Determine which optimizer to use based on approach
-        approach = processed_data["parameters"].get("approach", "credits-based")
-        logger.info(f"Using scheduling approach: {approach}")
-        
-        if approach == "semesters-based":
-            # Use the new semester-based optimizer
-            optimizer = SemesterBasedOptimizer()
-            logger.info("Using SemesterBasedOptimizer")
-        else:
-            # Use the existing constraint optimizer for credits-based
-            optimizer = ScheduleOptimizer()
-            logger.info("Using ScheduleOptimizer (credits-based)")
+        data = g.payload
+        served = serve_schedule(data, request.content_length, disconnected=client_disconnected_probe(),
+                                catalog=g.catalog)
         
-        # Generate the schedule
-        schedule_result = optimizer.create_schedule(processed_data)
+        # Course JSON is encoded once per registered catalog and reused across responses
+        serialize_started = time.perf_counter()
+        response = schedule_response(served.body, fragments_for(data, g.catalog), served.status)
+        if served.cache != "HIT":
+            observe_phase("json_serialization", time.perf_counter() - serialize_started, served.approach)
+        response.headers["X-Cache"] = served.cache
+        return response
         
-        # Log the result
-        logger.info(f"Schedule generation complete with {len(schedule_result.get('schedule', []))} semesters")
-        logger.info(f"Schedule metadata: {schedule_result.get('metadata', {})}")
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.exception("Error generating schedule:")
+        return jsonify({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), 500
+
+@app.route('/replan-schedule', methods=['POST', 'OPTIONS'])
+def replan_schedule():
+    """Reschedule from cutoffSemester on, keeping the earlier semesters of existingSchedule fixed"""
+    if request.method == 'OPTIONS':
+        return '', 204
         
-        # Check if schedule generation was successful
-        if "error" in schedule_result:
-            logger.error(f"Schedule generation failed: {schedule_result['error']}")
-            return jsonify(schedule_result), 500
+    try:
+        data = g.payload
+        probe = client_disconnected_probe()
+        with CancelToken(probe) as token, admission.admit():
+            outcome = run_replan(data, cancel_token=token)
+        observe_outcome(outcome)
         
+        # The fixed semesters are the client's dicts; they must not fill the catalog's shared fragments
+        return schedule_response(outcome.body, fragments_for(data), outcome.status,
+                                 fixed_semester_count(outcome.body))
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.exception("Error re-planning schedule:")
         return jsonify({
-            "metadata": schedule_result.get('metadata', {}),
-            "schedule": schedule_result.get('schedule', []),
-            "timestamp": str(datetime.now())
-        })
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), 500
+
+@app.route('/compare-schedules', methods=['POST', 'OPTIONS'])
+def compare_schedules():
+    """Schedule one payload with both approaches in parallel and summarize them side by side"""
+    if request.method == 'OPTIONS':
+        return '', 204
         
+    try:
+        data = g.payload
+        probe = client_disconnected_probe()
+        # The runs are recorded per approach by run_comparison
+        with CancelToken(probe) as token, admission.admit():
+            outcome = run_comparison(data, token)
+        
+        return schedule_response(outcome.body, fragments_for(data), outcome.status)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except Exception as e:
-        logger.exception("Error generating schedule:")
+        logger.exception("Error comparing schedules:")
         return jsonify({
             "error": str(e),
             "metadata": {
@@ -113,108 +217,190 @@ def generate_schedule():
             }
         }), 500
 
-@app.route('/test-connection', methods=['POST'])
-def test_connection():
-    """Test endpoint to verify connection and payload handling"""
+@app.route('/sweep-schedules', methods=['POST', 'OPTIONS'])
+def sweep_schedules():
+    """Evaluate a grid of preference overrides over one catalog in parallel"""
+    if request.method == 'OPTIONS':
+        return '', 204
+        
     try:
-        logger.info("=== Test Connection Request ===")
-        logger.info(f"Headers: {dict(request.headers)}")
-        data = request.json
+        data = g.payload
+        probe = client_disconnected_probe()
+        # The runs are recorded one by one by run_sweep
+        with CancelToken(probe) as token, admission.admit():
+            outcome = run_sweep(data, token)
         
+        catalog_ref = outcome.body.get("metadata", {}).get("catalogRef")
+        entry = catalog_store.get(catalog_ref) if catalog_ref else None
+        return schedule_response(outcome.body, entry.fragments if entry else None, outcome.status)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.exception("Error sweeping preferences:")
         return jsonify({
-            "status": "success",
-            "received_data": data,
-            "timestamp": str(datetime.now()),
-            "headers_received": dict(request.headers)
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), 500
+
+@app.route('/generate-schedule/stream', methods=['POST', 'OPTIONS'])
+def generate_schedule_stream():
+    """Generate a schedule, streaming each finalized semester as a Server-Sent Event"""
+    if request.method == 'OPTIONS':
+        return '', 204
+        
+    try:
+        logger.info("=== Streaming Schedule Generation Request ===")
+        data = g.payload
+        
+        processed_data, error = prepare_schedule_data(data, g.catalog)
+        if error:
+            return jsonify(error.body), error.status
+            
+        admission.acquire()
+        try:
+            stream = ProgressStream(processed_data, on_finish=admission.release).start()
+        except Exception:
+            admission.release()
+            raise
+        return Response(stream.events(), mimetype='text/event-stream', headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
         })
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except Exception as e:
-        logger.exception("Error in test connection:")
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error starting schedule stream:")
+        return jsonify({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), 500
 
-@app.route('/test-payload', methods=['POST'])
-def test_payload():
-    """Test endpoint for payload validation"""
+@app.route('/generate-schedules', methods=['POST', 'OPTIONS'])
+def generate_schedules():
+    """Generate schedules for a batch of payloads across the process pool"""
+    if request.method == 'OPTIONS':
+        return '', 204
+        
     try:
-        data = request.json
-        logger.info("=== Test Payload Request ===")
-        logger.info(f"Received payload with {len(data.get('courseData', []))} courses")
-        logger.info(f"Preferences: {data.get('preferences', {})}")
+        data = g.payload
+        payloads = data.get("payloads") if isinstance(data, dict) else data
+        
+        if not isinstance(payloads, list):
+            return jsonify({"error": "Expected a list of payloads"}), 400
+            
+        if len(payloads) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch size {len(payloads)} exceeds limit of {MAX_BATCH_SIZE}"}), 413
         
-        # Validate key components
-        course_data = data.get('courseData', [])
-        preferences = data.get('preferences', {})
+        logger.info(f"=== Batch Schedule Request with {len(payloads)} payloads ===")
+        with admission.admit():
+            results = run_schedule_batch(payloads)
         
         return jsonify({
-            "status": "success",
-            "payload_size": len(str(data)),
-            "courses_count": len(course_data),
-            "preferences": preferences,
+            "results": results,
+            "succeeded": sum(1 for r in results if r["error"] is None),
+            "failed": sum(1 for r in results if r["error"] is not None),
             "timestamp": str(datetime.now())
         })
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except Exception as e:
-        logger.exception("Error in test payload:")
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error generating schedule batch:")
+        return jsonify({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }), 500
 
-@app.route('/test-course-data', methods=['POST'])
-def test_course_data():
-    """Test endpoint to verify course data processing"""
+@app.route('/catalogs', methods=['POST', 'OPTIONS'])
+def register_catalog():
+    """Process a catalog once and return a catalogRef for later schedule requests"""
+    if request.method == 'OPTIONS':
+        return '', 204
+        
     try:
-        data = request.json
-        logger.info("=== Course Data Test ===")
-        
-        # Verify course data structure
-        course_data = data.get('courseData', [])
-        logger.info(f"Number of courses: {len(course_data)}")
-        for course in course_data:
-            logger.info(f"Course: {course.get('course_name')}")
-            logger.info(f"Sections: {len(course.get('sections', []))}")
+        data = g.payload
+        course_data = data.get("courseData") if isinstance(data, dict) else None
+        if g.catalog is not None:
+            # A large body was processed while it was parsed; only this route keeps it
+            entry, error = catalog_store.add(g.catalog), None
+        elif not course_data:
+            return jsonify({"error": "Missing courseData in payload"}), 400
+        else:
+            entry, error = catalog_store.register(course_data)
+        if error:
+            return jsonify(error), 400
             
-        # Process with data processor
-        processor = ScheduleDataProcessor()
-        processed = processor.process_payload(data)
-        
-        return jsonify({
-            "status": "success",
-            "course_count": len(course_data),
-            "processed_data": processed,
-            "timestamp": str(datetime.now())
-        })
+        response = jsonify(entry.to_dict())
+        response.headers["ETag"] = f'"{entry.ref}"'
+        return response, 201
     except Exception as e:
-        logger.exception("Error processing course data:")
+        logger.exception("Error registering catalog:")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/test-optimizer', methods=['POST'])
-def test_optimizer():
-    """Test endpoint for the optimizer functionality"""
-    try:
-        data = request.json
-        logger.info("=== Testing Optimizer ===")
-        
-        # Process the data
-        processor = ScheduleDataProcessor()
-        processed_data = processor.process_payload(data)
-        
-        # Determine approach and test appropriate optimizer
-        approach = processed_data["parameters"].get("approach", "credits-based")
+@app.route('/catalogs/<catalog_ref>', methods=['GET'])
+def get_catalog(catalog_ref):
+    """Check whether a catalog is still registered"""
+    entry = catalog_store.get(catalog_ref)
+    if entry is None:
+        return jsonify({"error": f"Unknown catalog {catalog_ref}"}), 404
         
-        if approach == "semesters-based":
-            optimizer = SemesterBasedOptimizer()
-        else:
-            optimizer = ScheduleOptimizer()
+    response = jsonify(entry.to_dict())
+    response.headers["ETag"] = f'"{entry.ref}"'
+    return response
+
+@app.route('/jobs', methods=['POST', 'OPTIONS'])
+def submit_job():
+    """Queue a schedule request and return its job id immediately"""
+    if request.method == 'OPTIONS':
+        return '', 204
         
-        logger.info(f"Testing {approach} optimizer...")
+    try:
+        data = g.payload
+        job = job_queue.submit(data)
         
         return jsonify({
-            "status": "success",
-            "approach": approach,
-            "processed_data": processed_data,
-            "course_count": len(processed_data.get('classes', {})),
+            "jobId": job.id,
+            "status": job.status,
+            "statusUrl": f"/jobs/{job.id}",
             "timestamp": str(datetime.now())
-        })
+        }), 202
+    except JobQueueFull as e:
+        logger.warning(str(e))
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    except JobQueueUnavailable as e:
+        return jsonify({"error": str(e)}), 501
     except Exception as e:
-        logger.exception("Error in optimizer test:")
+        logger.exception("Error submitting job:")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def get_job(job_id):
+    """Return the status of a queued job, and its result once finished; DELETE cancels it"""
+    try:
+        job = job_queue.cancel(job_id) if request.method == 'DELETE' else job_queue.get(job_id)
+    except JobQueueUnavailable as e:
+        return jsonify({"error": str(e)}), 501
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    if request.method == 'DELETE' and job.status in ("completed", "failed"):
+        return jsonify({"error": f"Job {job_id} already {job.status}", **job.to_dict()}), 409
+    return jsonify(job.to_dict())
+
+# The diagnostic /test-* routes echo payloads back, so production builds leave them out
+if os.environ.get('SCHEDULER_DEBUG_ROUTES') == '1' or os.environ.get('FLASK_ENV') == 'development':
+    from debug_routes import debug_routes
+    app.register_blueprint(debug_routes)
+
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
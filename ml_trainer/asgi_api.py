@@ -0,0 +1,454 @@
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+from datetime import datetime
+import concurrent.futures
+import contextlib
+import functools
+import threading
+import asyncio
+import logging
+import time
+import os
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from admission import admission, AdmissionRejected
+from cancellation import CancelToken
+from catalog_store import catalog_store
+from job_queue import job_queue, JobQueueFull, JobQueueUnavailable
+from logging_config import configure_logging
+from metrics import registry, observe_outcome, observe_phase
+from payload_stream import STREAM_MIN_BYTES
+from progress_stream import ProgressStream
+from replan import fixed_semester_count, run_replan
+from comparison import run_comparison
+from sweep import run_sweep
+from request_payload import (BodyDecoder, PayloadError, READ_TIMEOUT_SECONDS,
+                             check_body_headers, parse_body_stream, parse_json_body)
+from response_encoding import (COMPRESS_MIN_BYTES, best_encoding, compress_bytes, dumps,
+                               encode_schedule_body)
+from schedule_cache import schedule_cache
+from schedule_runner import (prepare_schedule_data, run_processed_schedule_in_pool,
+                             run_schedule_batch)
+from schedule_service import fragments_for, serve_schedule
+
+# asyncio variant of api.py: sockets, slow clients and idle keep-alives are handled on the event
+# loop, and optimizer runs go to the process pool. Same routes, payloads and responses.
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Upper bound on payloads accepted by /generate-schedules
+MAX_BATCH_SIZE = int(os.environ.get('SCHEDULER_MAX_BATCH', 500))
+
+def _error_body(message: str) -> Dict:
+    return {
+        "error": message,
+        "metadata": {
+            "success": False,
+            "timestamp": str(datetime.now())
+        }
+    }
+
+def _encoded_response(request: Request, body: bytes, status: int = 200,
+                      media_type: str = "application/json", headers: Optional[Dict] = None) -> Response:
+    """Response with the same gzip/deflate negotiation api.py applies after each request"""
+    headers = dict(headers or {})
+    if 200 <= status < 300 and len(body) >= COMPRESS_MIN_BYTES:
+        encoding = best_encoding(request.headers.get("accept-encoding"))
+        if encoding is not None:
+            body = compress_bytes(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Vary"] = "Accept-Encoding"
+    return Response(body, status_code=status, media_type=media_type, headers=headers)
+
+def json_response(request: Request, content: Any, status: int = 200, headers: Optional[Dict] = None) -> Response:
+    return _encoded_response(request, dumps(content), status, headers=headers)
+
+async def schedule_response(request: Request, body: Dict, fragments, status: int = 200,
+                            client_semesters: int = 0) -> Response:
+    """Encode from pre-encoded course fragments off the event loop; large schedules take a while"""
+    encoded = await run_in_threadpool(encode_schedule_body, body, fragments, client_semesters)
+    return await run_in_threadpool(_encoded_response, request, encoded, status)
+
+def overloaded_response(request: Request, error: AdmissionRejected) -> Response:
+    """Fast 503 for requests shed by admission control"""
+    logger.warning(str(error))
+    return json_response(request, _error_body(str(error)), 503, {"Retry-After": str(error.retry_after)})
+
+@contextlib.asynccontextmanager
+async def disconnect_watch(request: Request) -> AsyncIterator[threading.Event]:
+    """Event that is set if the client hangs up while the route is still working on its body"""
+    gone = threading.Event()
+
+    async def watch() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        gone.set()
+
+    task = asyncio.create_task(watch())
+    try:
+        yield gone
+    finally:
+        task.cancel()
+
+def _is_json(request: Request) -> bool:
+    mimetype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return mimetype == "application/json" or (mimetype.startswith("application/") and mimetype.endswith("+json"))
+
+async def _next_chunk(chunks: AsyncIterator[bytes]) -> Optional[bytes]:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+def _chunks_from_loop(chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop,
+                      deadline: float) -> Iterator[bytes]:
+    """Iterate an async body stream from a worker thread, each chunk read on the loop"""
+    while True:
+        future = asyncio.run_coroutine_threadsafe(_next_chunk(chunks), loop)
+        try:
+            chunk = future.result(max(deadline - time.monotonic(), 0))
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise PayloadError("Timed out reading request body", 408)
+        if chunk is None:
+            return
+        yield chunk
+
+async def read_payload(request: Request, stream_catalog: bool = False) -> Tuple[Any, Any]:
+    """Async counterpart of read_json_payload: the body is read on the loop, so a slow upload holds no thread.
+
+    With stream_catalog, a body that passes STREAM_MIN_BYTES is finished by parse_body_stream in
+    the threadpool, which pulls the remaining chunks from the loop as it parses them.
+    """
+    content_length = request.headers.get("content-length")
+    check_body_headers(_is_json(request), int(content_length) if content_length and content_length.isdigit() else None)
+    decoder = BodyDecoder(request.headers.get("content-encoding", "identity").strip().lower())
+    deadline = time.monotonic() + READ_TIMEOUT_SECONDS
+    chunks = request.stream()
+    head = bytearray()
+
+    async def read_head() -> bool:
+        async for chunk in chunks:
+            head.extend(decoder.decode(chunk))
+            if stream_catalog and len(head) >= STREAM_MIN_BYTES:
+                return False
+        head.extend(decoder.flush())
+        return True
+
+    try:
+        complete = await asyncio.wait_for(read_head(), READ_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise PayloadError("Timed out reading request body", 408)
+    if complete:
+        return parse_json_body(bytes(head))
+    # Building the catalog from a large body takes a while; keep it off the loop
+    return await run_in_threadpool(parse_body_stream, _chunks_from_loop(chunks, asyncio.get_running_loop(), deadline),
+                                   decoder, bytes(head))
+
+def json_endpoint(endpoint, stream_catalog: bool = False):
+    """Answer OPTIONS, and parse POST bodies into request.state.payload before the route runs"""
+    @functools.wraps(endpoint)
+    async def wrapper(request: Request) -> Response:
+        if request.method == "OPTIONS":
+            return Response(status_code=204)
+        if request.method == "POST":
+            try:
+                request.state.payload, request.state.catalog = await read_payload(request, stream_catalog)
+            except PayloadError as e:
+                logger.warning("Rejected request payload", extra={
+                    "path": request.url.path,
+                    "status": e.status,
+                    "reason": str(e)
+                })
+                return json_response(request, e.report or _error_body(str(e)), e.status)
+        return await endpoint(request)
+    return wrapper
+
+def catalog_endpoint(endpoint):
+    """json_endpoint whose large bodies have courseData streamed into the catalog store (see payload_stream)"""
+    return json_endpoint(endpoint, stream_catalog=True)
+
+async def health_check(request: Request) -> Response:
+    """Health check endpoint"""
+    return json_response(request, {
+        "status": "healthy",
+        "service": "course-scheduler-ml",
+        "timestamp": str(datetime.now())
+    })
+
+async def ping(request: Request) -> Response:
+    """Health check endpoint with more details"""
+    return json_response(request, {
+        "status": "healthy",
+        "service": "course-scheduler-ml",
+        "timestamp": str(datetime.now()),
+        "env": os.environ.get('FLASK_ENV', 'unknown'),
+        "port": os.environ.get('PORT', 'unknown')
+    })
+
+async def metrics(request: Request) -> Response:
+    """Prometheus text exposition of scheduler metrics"""
+    return Response(registry.render(), media_type='text/plain; version=0.0.4')
+
+async def cache_stats(request: Request) -> Response:
+    """Hit and miss counters for the schedule result cache"""
+    return json_response(request, schedule_cache.stats())
+
+@catalog_endpoint
+async def generate_schedule(request: Request) -> Response:
+    """Generate and return a complete course schedule"""
+    try:
+        data = request.state.payload
+        content_length = request.headers.get("content-length")
+        # The helper thread only waits on the cache, admission and the pool; the optimizer runs in a worker process
+        async with disconnect_watch(request) as gone:
+            served = await run_in_threadpool(serve_schedule, data, int(content_length) if content_length else None,
+                                             run_processed_schedule_in_pool, gone.is_set, request.state.catalog)
+
+        serialize_started = time.perf_counter()
+        response = await schedule_response(request, served.body, fragments_for(data, request.state.catalog),
+                                           served.status)
+        if served.cache != "HIT":
+            observe_phase("json_serialization", time.perf_counter() - serialize_started, served.approach)
+        response.headers["X-Cache"] = served.cache
+        return response
+
+    except AdmissionRejected as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception("Error generating schedule:")
+        return json_response(request, _error_body(str(e)), 500)
+
+def _replan(data: Dict, disconnected: Callable[[], bool]):
+    with CancelToken(disconnected) as token, admission.admit():
+        outcome = run_replan(data, run_processed_schedule_in_pool, token)
+    observe_outcome(outcome)
+    return outcome
+
+@json_endpoint
+async def replan_schedule(request: Request) -> Response:
+    """Reschedule from cutoffSemester on, keeping the earlier semesters of existingSchedule fixed"""
+    try:
+        data = request.state.payload
+        async with disconnect_watch(request) as gone:
+            outcome = await run_in_threadpool(_replan, data, gone.is_set)
+        # The fixed semesters are the client's dicts; they must not fill the catalog's shared fragments
+        return await schedule_response(request, outcome.body, fragments_for(data), outcome.status,
+                                       fixed_semester_count(outcome.body))
+    except AdmissionRejected as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception("Error re-planning schedule:")
+        return json_response(request, _error_body(str(e)), 500)
+
+def _compare(data: Dict, disconnected: Callable[[], bool]):
+    with CancelToken(disconnected) as token, admission.admit():
+        return run_comparison(data, token)
+
+@json_endpoint
+async def compare_schedules(request: Request) -> Response:
+    """Schedule one payload with both approaches in parallel and summarize them side by side"""
+    try:
+        data = request.state.payload
+        async with disconnect_watch(request) as gone:
+            outcome = await run_in_threadpool(_compare, data, gone.is_set)
+        return await schedule_response(request, outcome.body, fragments_for(data), outcome.status)
+    except AdmissionRejected as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception("Error comparing schedules:")
+        return json_response(request, _error_body(str(e)), 500)
+
+def _sweep(data: Dict, disconnected: Callable[[], bool]):
+    with CancelToken(disconnected) as token, admission.admit():
+        return run_sweep(data, token)
+
+@json_endpoint
+async def sweep_schedules(request: Request) -> Response:
+    """Evaluate a grid of preference overrides over one catalog in parallel"""
+    try:
+        data = request.state.payload
+        async with disconnect_watch(request) as gone:
+            outcome = await run_in_threadpool(_sweep, data, gone.is_set)
+        catalog_ref = outcome.body.get("metadata", {}).get("catalogRef")
+        entry = catalog_store.get(catalog_ref) if catalog_ref else None
+        return await schedule_response(request, outcome.body, entry.fragments if entry else None, outcome.status)
+    except AdmissionRejected as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception("Error sweeping preferences:")
+        return json_response(request, _error_body(str(e)), 500)
+
+@catalog_endpoint
+async def generate_schedule_stream(request: Request) -> Response:
+    """Generate a schedule, streaming each finalized semester as a Server-Sent Event"""
+    try:
+        logger.info("=== Streaming Schedule Generation Request ===")
+        processed_data, error = await run_in_threadpool(prepare_schedule_data, request.state.payload,
+                                                        request.state.catalog)
+        if error:
+            return json_response(request, error.body, error.status)
+
+        # Progress callbacks need the optimizer in this process, so streamed runs use a thread here
+        await run_in_threadpool(admission.acquire)
+        try:
+            stream = ProgressStream(processed_data, on_finish=admission.release,
+                                    loop=asyncio.get_running_loop()).start()
+        except Exception:
+            admission.release()
+            raise
+        return StreamingResponse(stream.async_events(), media_type='text/event-stream', headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        })
+    except AdmissionRejected as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception("Error starting schedule stream:")
+        return json_response(request, _error_body(str(e)), 500)
+
+def _run_batch(payloads):
+    with admission.admit():
+        return run_schedule_batch(payloads)
+
+@json_endpoint
+async def generate_schedules(request: Request) -> Response:
+    """Generate schedules for a batch of payloads across the process pool"""
+    try:
+        data = request.state.payload
+        payloads = data.get("payloads") if isinstance(data, dict) else data
+
+        if not isinstance(payloads, list):
+            return json_response(request, {"error": "Expected a list of payloads"}, 400)
+
+        if len(payloads) > MAX_BATCH_SIZE:
+            return json_response(request, {"error": f"Batch size {len(payloads)} exceeds limit of {MAX_BATCH_SIZE}"}, 413)
+
+        logger.info(f"=== Batch Schedule Request with {len(payloads)} payloads ===")
+        results = await run_in_threadpool(_run_batch, payloads)
+
+        return json_response(request, {
+            "results": results,
+            "succeeded": sum(1 for r in results if r["error"] is None),
+            "failed": sum(1 for r in results if r["error"] is not None),
+            "timestamp": str(datetime.now())
+        })
+    except AdmissionRejected as e:
+        return overloaded_response(request, e)
+    except Exception as e:
+        logger.exception("Error generating schedule batch:")
+        return json_response(request, _error_body(str(e)), 500)
+
+@catalog_endpoint
+async def register_catalog(request: Request) -> Response:
+    """Process a catalog once and return a catalogRef for later schedule requests"""
+    try:
+        data = request.state.payload
+        course_data = data.get("courseData") if isinstance(data, dict) else None
+        if request.state.catalog is not None:
+            # A large body was processed while it was parsed; only this route keeps it
+            entry, error = catalog_store.add(request.state.catalog), None
+        elif not course_data:
+            return json_response(request, {"error": "Missing courseData in payload"}, 400)
+        else:
+            entry, error = await run_in_threadpool(catalog_store.register, course_data)
+        if error:
+            return json_response(request, error, 400)
+
+        return json_response(request, entry.to_dict(), 201, {"ETag": f'"{entry.ref}"'})
+    except Exception as e:
+        logger.exception("Error registering catalog:")
+        return json_response(request, {"error": str(e)}, 500)
+
+async def get_catalog(request: Request) -> Response:
+    """Check whether a catalog is still registered"""
+    catalog_ref = request.path_params["catalog_ref"]
+    entry = catalog_store.get(catalog_ref)
+    if entry is None:
+        return json_response(request, {"error": f"Unknown catalog {catalog_ref}"}, 404)
+    return json_response(request, entry.to_dict(), headers={"ETag": f'"{entry.ref}"'})
+
+@json_endpoint
+async def submit_job(request: Request) -> Response:
+    """Queue a schedule request and return its job id immediately"""
+    try:
+        job = job_queue.submit(request.state.payload)
+
+        return json_response(request, {
+            "jobId": job.id,
+            "status": job.status,
+            "statusUrl": f"/jobs/{job.id}",
+            "timestamp": str(datetime.now())
+        }, 202)
+    except JobQueueFull as e:
+        logger.warning(str(e))
+        return json_response(request, {"error": str(e)}, 503, {"Retry-After": "5"})
+    except JobQueueUnavailable as e:
+        return json_response(request, {"error": str(e)}, 501)
+    except Exception as e:
+        logger.exception("Error submitting job:")
+        return json_response(request, {"error": str(e)}, 500)
+
+async def get_job(request: Request) -> Response:
+    """Return the status of a queued job, and its result once finished; DELETE cancels it"""
+    job_id = request.path_params["job_id"]
+    try:
+        job = job_queue.cancel(job_id) if request.method == 'DELETE' else job_queue.get(job_id)
+    except JobQueueUnavailable as e:
+        return json_response(request, {"error": str(e)}, 501)
+    if job is None:
+        return json_response(request, {"error": f"Unknown job {job_id}"}, 404)
+    if request.method == 'DELETE' and job.status in ("completed", "failed"):
+        return json_response(request, {"error": f"Job {job_id} already {job.status}", **job.to_dict()}, 409)
+    return json_response(request, job.to_dict())
+
+async def warm_up_on_startup() -> None:
+    """uvicorn has no preload_app, so each worker warms itself up before taking requests"""
+    if os.environ.get("SCHEDULER_WARM_UP", "1") == "1":
+        from warmup import warm_up
+        await run_in_threadpool(warm_up)
+
+routes = [
+    Route('/', health_check, methods=['GET']),
+    Route('/ping', ping, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/cache-stats', cache_stats, methods=['GET']),
+    Route('/generate-schedule', generate_schedule, methods=['POST', 'OPTIONS']),
+    Route('/replan-schedule', replan_schedule, methods=['POST', 'OPTIONS']),
+    Route('/compare-schedules', compare_schedules, methods=['POST', 'OPTIONS']),
+    Route('/sweep-schedules', sweep_schedules, methods=['POST', 'OPTIONS']),
+    Route('/generate-schedule/stream', generate_schedule_stream, methods=['POST', 'OPTIONS']),
+    Route('/generate-schedules', generate_schedules, methods=['POST', 'OPTIONS']),
+    Route('/catalogs', register_catalog, methods=['POST', 'OPTIONS']),
+    Route('/catalogs/{catalog_ref}', get_catalog, methods=['GET']),
+    Route('/jobs', submit_job, methods=['POST', 'OPTIONS']),
+    Route('/jobs/{job_id}', get_job, methods=['GET', 'DELETE'])
+]
+
+# Same CORS policy as api.py
+middleware = [
+    Middleware(CORSMiddleware,
+               allow_origins=[
+                   "https://course-scheduler-web.onrender.com",
+                   "http://localhost:3000",
+                   "http://web:3000",
+                   "*"  # Temporarily allow all origins for testing
+               ],
+               allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
+               allow_headers=["Content-Type", "Authorization", "Origin"],
+               expose_headers=["Content-Type", "Authorization"])
+]
+
+app = Starlette(routes=routes, middleware=middleware, on_startup=[warm_up_on_startup])
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("asgi_api:app", host="0.0.0.0", port=int(os.environ.get('PORT', 5000)),
+                workers=int(os.environ.get("WEB_CONCURRENCY", 1)), log_config=None)
@@ -0,0 +1,166 @@
+from typing import Callable, List, Optional
+import multiprocessing
+import threading
+import logging
+import socket
+import select
+import time
+import os
+
+from metrics import registry, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Status for runs stopped because nobody is waiting for them (nginx's "client closed request")
+CANCELLED_STATUS = 499
+# Runs in pool workers see cancellation through one shared byte per in-flight token
+CANCEL_SLOTS = int(os.environ.get("SCHEDULER_CANCEL_SLOTS", 256))
+# How long a submit waits for another run to hand its slot back before starting without one
+SLOT_WAIT_SECONDS = float(os.environ.get("SCHEDULER_CANCEL_SLOT_WAIT", 10))
+# How often a token may run its probe (a socket peek); checkpoints in between are free
+PROBE_INTERVAL_SECONDS = 0.02
+
+class RunCancelled(Exception):
+    """Raised at an optimizer checkpoint once the run's result is no longer wanted"""
+
+_flags = None
+_free_slots: List[int] = []
+_slots_lock = threading.Lock()
+_slot_returned = threading.Condition(_slots_lock)
+# Pool runs that started without a slot, so cancelling them can't reach the worker
+_untracked_runs = 0
+
+registry.register(Gauge("scheduler_cancel_slots_in_use", "Shared cancellation flags held by in-flight pool runs",
+                        lambda: CANCEL_SLOTS - len(_free_slots) if _flags is not None else 0))
+registry.register(Gauge("scheduler_cancel_untracked_runs_total",
+                        "Pool runs started without a cancellation flag because every slot was taken",
+                        lambda: _untracked_runs, type_name="counter"))
+
+def shared_flags():
+    """The flag array handed to pool workers when they start; created on first use"""
+    global _flags, _free_slots
+    with _slots_lock:
+        if _flags is None:
+            _flags = multiprocessing.RawArray("b", CANCEL_SLOTS)
+            _free_slots = list(range(CANCEL_SLOTS))
+        return _flags
+
+def attach_worker_flags(flags) -> None:
+    """Process pool initializer: remember the parent's flag array"""
+    global _flags
+    _flags = flags
+
+class CancelToken:
+    """Cooperative cancellation for one run.
+
+    cancel() stops the run at its next checkpoint. probe, if given, is polled from checkpoints
+    (and by threads waiting on a pool worker) to notice a vanished client. A token pickled into
+    a pool worker keeps working through a shared flag slot: call claim_slot() before submitting,
+    and use the token as a context manager so the slot is returned when the run is over.
+    """
+
+    def __init__(self, probe: Optional[Callable[[], bool]] = None):
+        self._event = threading.Event()
+        self._probe = probe
+        self._next_probe = 0.0
+        self._slot: Optional[int] = None
+        self._untracked_reported = False
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: str = "Run cancelled") -> None:
+        if self.reason is None:
+            self.reason = reason
+        self._event.set()
+        if self._slot is not None and _flags is not None:
+            _flags[self._slot] = 1
+
+    def poll(self) -> bool:
+        """True once the run should stop; runs the probe when it is due"""
+        if self._event.is_set():
+            return True
+        if self._slot is not None and _flags is not None and _flags[self._slot]:
+            self._event.set()
+            return True
+        if self._probe is not None and time.monotonic() >= self._next_probe:
+            self._next_probe = time.monotonic() + PROBE_INTERVAL_SECONDS
+            if self._probe():
+                self.cancel("Client disconnected")
+        return self._event.is_set()
+
+    def check(self, phase: str) -> None:
+        """Checkpoint: raise RunCancelled if the run should stop"""
+        if self.poll():
+            raise RunCancelled(f"{self.reason or 'Run cancelled'} during {phase}")
+
+    def claim_slot(self, timeout: float = SLOT_WAIT_SECONDS) -> bool:
+        """Take a shared flag slot before the token is sent to a pool worker, waiting up to timeout
+        for one to be returned; False (logged and counted) if the run will go out without one"""
+        shared_flags()
+        with _slots_lock:
+            if self._slot is not None:
+                return True
+            if _slot_returned.wait_for(lambda: _free_slots, timeout):
+                self._take_slot()
+                return True
+            self._report_untracked()
+            return False
+
+    def _take_slot(self) -> None:
+        self._slot = _free_slots.pop()
+        _flags[self._slot] = 1 if self._event.is_set() else 0
+
+    def _report_untracked(self) -> None:
+        global _untracked_runs
+        if self._untracked_reported:
+            return
+        self._untracked_reported = True
+        _untracked_runs += 1
+        logger.warning(f"All {CANCEL_SLOTS} cancellation slots are in use; this pool run can't be cancelled "
+                       "(raise SCHEDULER_CANCEL_SLOTS)")
+
+    def __getstate__(self):
+        # Only the slot crosses the process boundary. Pickling happens on the executor's feeder
+        # thread, which must not wait, so a token without a claimed slot only takes a free one
+        if self._slot is None:
+            with _slots_lock:
+                if _flags is not None and _free_slots:
+                    self._take_slot()
+                else:
+                    self._report_untracked()
+        return {"slot": self._slot, "reason": self.reason}
+
+    def __setstate__(self, state) -> None:
+        self.__init__()
+        self._slot = state["slot"]
+        self.reason = state["reason"]
+
+    def close(self) -> None:
+        """Give the shared slot back; the token stays usable in this process"""
+        with _slots_lock:
+            if self._slot is not None:
+                _flags[self._slot] = 0
+                _free_slots.append(self._slot)
+                self._slot = None
+                _slot_returned.notify()
+
+    def __enter__(self) -> "CancelToken":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def socket_closed(sock: socket.socket) -> bool:
+    """True once the peer has closed its end; peeks, so pipelined request bytes are left alone"""
+    try:
+        # A socket with a timeout waits that long inside recv even with MSG_DONTWAIT, so only
+        # peek once select says a read won't block
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+    except (BlockingIOError, InterruptedError, socket.timeout):
+        return False
+    except ValueError:  # TLS sockets can't peek; assume the client is still there
+        return False
+    except OSError:
+        return True
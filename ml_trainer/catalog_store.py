@@ -0,0 +1,93 @@
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field
+import logging
+import time
+import os
+
+from data_processor import ScheduleDataProcessor
+from payload_validator import PayloadValidator
+from compiled_catalog import CompiledCatalog
+from schedule_cache import ScheduleCache, payload_digest
+from response_encoding import CourseFragmentCache
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CatalogEntry:
+    """A processed catalog, shared read-only by every request that references it"""
+    ref: str
+    # Dense form the optimizers run on, compiled once at registration
+    compiled: CompiledCatalog = field(repr=False)
+    registered_at: float = field(default_factory=time.time)
+    # Encoded course JSON, filled in as schedules over this catalog are serialized
+    fragments: CourseFragmentCache = field(default_factory=CourseFragmentCache, repr=False)
+
+    def to_dict(self) -> Dict:
+        return {
+            "catalogRef": self.ref,
+            "classCount": len(self.compiled),
+            "registeredAt": self.registered_at
+        }
+
+class CatalogStore:
+    """Processed catalogs keyed by the content hash of their courseData"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._cache = ScheduleCache(max_entries, ttl_seconds)
+
+    def register(self, course_data: List[Dict]) -> Tuple[Optional[CatalogEntry], Optional[Dict]]:
+        """Process and store a catalog; returns (entry, None) or (None, error)"""
+        ref = payload_digest(course_data)
+        entry = self._cache.get(ref)
+        if entry is not None:
+            return entry, None
+
+        return self._store(ref, ScheduleDataProcessor().process_catalog(course_data))
+
+    def register_stream(self, courses: Iterable[Dict], digest: Callable[[], str],
+                        validator: Optional[PayloadValidator] = None) -> Tuple[Optional[CatalogEntry], Optional[Dict]]:
+        """Process courses parsed one at a time; digest gives the ref once they are all read.
+
+        Unlike register, a new catalog is request-scoped: the entry is returned but not stored, so
+        large bodies sent straight to the schedule routes don't evict catalogs registered on
+        purpose. add() stores it when the request is itself a registration.
+        """
+        catalog = ScheduleDataProcessor().process_catalog(courses, validator)
+        if "error" in catalog:
+            return None, catalog
+        entry = self._cache.get(digest())
+        if entry is not None:
+            return entry, None
+        return self._entry(digest(), catalog), None
+
+    def add(self, entry: CatalogEntry) -> CatalogEntry:
+        """Store an entry from register_stream; returns the one already stored under its ref, if any"""
+        stored = self._cache.get(entry.ref)
+        if stored is not None:
+            return stored
+        self._cache.put(entry.ref, entry)
+        logger.info(f"Registered catalog {entry.ref[:12]} with {len(entry.compiled)} classes")
+        return entry
+
+    def _entry(self, ref: str, catalog: Dict) -> CatalogEntry:
+        return CatalogEntry(ref=ref, compiled=catalog["catalog"])
+
+    def _store(self, ref: str, catalog: Dict) -> Tuple[Optional[CatalogEntry], Optional[Dict]]:
+        if "error" in catalog:
+            return None, catalog
+        return self.add(self._entry(ref, catalog)), None
+
+    def get(self, ref: str) -> Optional[CatalogEntry]:
+        return self._cache.get(ref)
+
+    def resolve(self, ref: str, held: Optional[CatalogEntry] = None) -> Optional[CatalogEntry]:
+        """The entry for ref, taken from held when the caller already has it, so an eviction since can't lose it"""
+        return held if held is not None and held.ref == ref else self._cache.get(ref)
+
+    def stats(self) -> Dict:
+        return self._cache.stats()
+
+catalog_store = CatalogStore(
+    max_entries=int(os.environ.get("SCHEDULER_CATALOG_STORE_SIZE", 64)),
+    ttl_seconds=float(os.environ.get("SCHEDULER_CATALOG_TTL", 86400))
+)
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import logging
+import time
+
+from cancellation import CancelToken
+from deadline import is_partial
+from metrics import observe_outcome
+from payload_validator import PayloadValidator, TARGET_SEMESTERS_MESSAGE
+from schedule_ranking import schedule_summary
+from schedule_runner import ScheduleOutcome, cancelled_outcome, prepare_schedule_data, run_candidates
+
+logger = logging.getLogger(__name__)
+
+APPROACHES = ("credits-based", "semesters-based")
+
+def _approach_data(processed_data: Dict, approach: str) -> Dict:
+    return {**processed_data, "parameters": {**processed_data["parameters"], "approach": approach, "alternatives": None}}
+
+def _missing_parameters(processed_data: Dict, approach: str) -> Optional[ScheduleOutcome]:
+    """The 400 the data processor gives when this approach is asked for without its parameters"""
+    if approach == "semesters-based" and not processed_data["parameters"].get("targetSemesters"):
+        validator = PayloadValidator()
+        validator.add("preferences.targetSemesters", TARGET_SEMESTERS_MESSAGE)
+        return ScheduleOutcome(validator.report(), 400)
+    return None
+
+def _approach_result(outcome: ScheduleOutcome) -> Dict:
+    if outcome.status != 200:
+        return {"status": outcome.status, "error": outcome.body.get("error"), "metadata": outcome.body.get("metadata", {})}
+    return {
+        "status": outcome.status,
+        "summary": schedule_summary(outcome.body["schedule"]),
+        "metadata": outcome.body["metadata"],
+        "schedule": outcome.body["schedule"]
+    }
+
+def _fewest_semesters(results: Dict[str, Dict]) -> List[str]:
+    """The approaches whose plan finishes soonest; both on a tie, none if neither completed.
+
+    A plan cut short by its time budget leaves courses out, so it isn't compared.
+    """
+    counts = {approach: result["summary"]["semesterCount"] for approach, result in results.items()
+              if result["status"] == 200 and not is_partial(result)}
+    if not counts:
+        return []
+    fewest = min(counts.values())
+    return [approach for approach in APPROACHES if counts.get(approach) == fewest]
+
+def run_comparison(payload: Dict, cancel_token: Optional[CancelToken] = None) -> ScheduleOutcome:
+    """Schedule one payload with every approach at once, on the process pool, and summarize the plans side by side"""
+    try:
+        processed_data, error = prepare_schedule_data(payload)
+        if error:
+            return error
+
+        outcomes = {approach: _missing_parameters(processed_data, approach) for approach in APPROACHES}
+        runnable = [approach for approach, outcome in outcomes.items() if outcome is None]
+
+        started = time.perf_counter()
+        ran = run_candidates([_approach_data(processed_data, approach) for approach in runnable], cancel_token)
+        if cancel_token is not None and cancel_token.poll():
+            return cancelled_outcome(cancel_token.reason)
+        elapsed = time.perf_counter() - started
+        # Each run is recorded under its own approach, as if it had been requested alone
+        for approach, outcome in zip(runnable, ran):
+            observe_outcome(outcome)
+            outcomes[approach] = outcome
+
+        results = {approach: _approach_result(outcome) for approach, outcome in outcomes.items()}
+        if all(result["status"] != 200 for result in results.values()):
+            failed = outcomes[APPROACHES[0]]
+            return ScheduleOutcome({**failed.body, "approaches": results}, failed.status)
+
+        fewest = _fewest_semesters(results)
+        logger.info(f"Compared {len(APPROACHES)} approaches in {elapsed:.3f}s, fewest semesters: {fewest}")
+        return ScheduleOutcome({
+            "metadata": {
+                "success": True,
+                "fewestSemesters": fewest,
+                "comparisonSeconds": elapsed
+            },
+            "approaches": results,
+            "timestamp": str(datetime.now())
+        }, 200)
+
+    except Exception as e:
+        logger.exception("Error comparing approaches:")
+        return ScheduleOutcome({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }, 500)
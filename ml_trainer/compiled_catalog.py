@@ -0,0 +1,63 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+from array import array
+
+@dataclass(frozen=True)
+class Course:
+    id: int
+    name: str
+    class_number: str
+    credits: int
+    prerequisites: List[int]
+    corequisites: List[int]
+    semesters_offered: List[str]
+    is_elective: bool
+    section_id: int
+    credits_needed: int = None
+    course_type: str = ""
+    course_id: str = ""
+    is_elective_section: bool = False
+
+def _csr(rows: Sequence[Sequence[int]]) -> Tuple[array, array]:
+    """Offsets and flat targets for a list of neighbour lists; row i is targets[offsets[i]:offsets[i + 1]]"""
+    offsets = array("i", [0])
+    targets = array("i")
+    for row in rows:
+        targets.extend(row)
+        offsets.append(len(targets))
+    return offsets, targets
+
+class CompiledCatalog:
+    """A processed catalog in indexed, read-only form, built once and shared by every run over it.
+
+    Course i (in courseData order) is courses[i], and index maps a class id to i.
+    Reverse-prerequisite (dependent) edges, which no course lists itself, are a CSR array of
+    dense indices; prerequisites outside the catalog are dropped.
+    """
+
+    def __init__(self, courses: Sequence[Course]):
+        self.courses: Tuple[Course, ...] = tuple(courses)
+        self.ids = array("i", (course.id for course in self.courses))
+        self.index: Dict[int, int] = {}
+        for i, course in enumerate(self.courses):
+            self.index.setdefault(course.id, i)  # Like a list scan, the first course with an id wins
+
+        dependents: List[List[int]] = [[] for _ in self.courses]
+        for i, course in enumerate(self.courses):
+            # One edge per dependent, however often it lists the prerequisite
+            for prereq_id in dict.fromkeys(course.prerequisites):
+                prereq = self.index.get(prereq_id)
+                if prereq is not None:
+                    dependents[prereq].append(i)
+        self.dependent_offsets, self.dependent_targets = _csr(dependents)
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def course(self, course_id: int) -> Optional[Course]:
+        i = self.index.get(course_id)
+        return self.courses[i] if i is not None else None
+
+    def dependents_of(self, i: int) -> array:
+        """Courses that list course i as a prerequisite"""
+        return self.dependent_targets[self.dependent_offsets[i]:self.dependent_offsets[i + 1]]
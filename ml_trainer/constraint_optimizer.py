@@ -1,23 +1,14 @@
-from typing import Dict, List, Set, Tuple, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Set, Tuple, Optional
+from dataclasses import dataclass, replace
 from datetime import datetime
 import logging
+import random
 
-@dataclass
-class Course:
-    id: int
-    name: str
-    class_number: str
-    credits: int
-    prerequisites: List[int]
-    corequisites: List[int]
-    semesters_offered: List[str]
-    is_elective: bool
-    section_id: int
-    credits_needed: int = None
-    course_type: str = ""  # Already present
-    course_id: str = ""    # Add this
-    is_elective_section: bool = False  # Add this
+from metrics import PhaseTimer
+from deadline import Deadline
+from cancellation import CancelToken, RunCancelled
+from run_context import RunContext, bind_run, current_run
+from compiled_catalog import Course
 
 @dataclass
 class Semester:
@@ -33,39 +24,27 @@ class Semester:
     def total_credits(self) -> int:
         return sum(c.credits for c in self.classes)
 
-class SchedulingLogFilter(logging.Filter):
-    def filter(self, record):
-        if not isinstance(record.msg, str):
-            return True
-            
-        # Convert message to string if it's a dict
-        message = str(record.msg)
-        
-        # Check for both the exact message and JSON-like content
-        if ('Generated schedule response' in message or
-            '"metadata":' in message or
-            "'metadata':" in message or
-            message.startswith('{') and ('schedule' in message or 'metadata' in message)):
-            return False
-            
-        return True
-
-# Configure logging with the enhanced filter
-logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
-# Apply filter to root logger to catch all logging
-logging.getLogger().addFilter(SchedulingLogFilter())
-logger.addFilter(SchedulingLogFilter())
+# Upper bound of the random boost added to each priority when a prioritySeed is set
+PRIORITY_JITTER = 10
 
 class ScheduleOptimizer:
-    def __init__(self):
-        self.satisfied_sections: Set[int] = set()
+    """Holds no per-run state, so one instance can serve every thread; see RunContext"""
+
+    @property
+    def _run(self) -> RunContext:
+        return current_run()
+
+    def _report_progress(self, event: str, data: Dict) -> None:
+        """Notify the progress listener, if any, that the schedule has advanced"""
+        if self._run.progress_callback:
+            self._run.progress_callback(event, data)
         
-    def _is_first_year_semester(self, semester: Semester, start_semester: str) -> bool:
+    def _is_first_year_semester(self, semester: Semester, start_semester: str, first_year_semesters: int) -> bool:
         """
-        Check if semester is in first year (first 3 semesters)
-        Returns True for first 3 semesters from start, regardless of type
+        Check if semester is in first year (first first_year_semesters semesters)
+        Returns True for those semesters from start, regardless of type
         """
         start_type, start_year = start_semester.split()
         start_year = int(start_year)
@@ -91,7 +70,7 @@ class ScheduleOptimizer:
         target = (semester.type, semester.year)
         try:
             index = sem_sequence.index(target)
-            return index < 3  # First 3 semesters are first year
+            return index < first_year_semesters
         except ValueError:
             return False
 
@@ -99,7 +78,7 @@ class ScheduleOptimizer:
 
     def _get_semester_credit_limit(self, semester: Semester, params: Dict) -> int:
         """Get credit limit for semester considering first year status"""
-        if self._is_first_year_semester(semester, params["startSemester"]):
+        if self._is_first_year_semester(semester, params["startSemester"], params["firstYearSemesters"]):
             if semester.type == "Spring":
                 return params["firstYearLimits"]["springCredits"]
             return params["firstYearLimits"]["fallWinterCredits"]
@@ -108,30 +87,12 @@ class ScheduleOptimizer:
                 return params["springCredits"]
             return params["fallWinterCredits"]
 
-    def _convert_to_courses(self, raw_classes: Dict) -> List[Course]:
-        """Convert raw class data to Course objects"""
-        courses = []
-        for id, data in raw_classes.items():
-            course = Course(
-                id=int(id),
-                name=data["class_name"],
-                class_number=data.get("class_number", ""),
-                credits=data["credits"],
-                prerequisites=data.get("prerequisites", []),
-                corequisites=data.get("corequisites", []),
-                semesters_offered=data["semesters_offered"],
-                is_elective=data.get("is_elective", False),
-                section_id=data["section_id"],
-                credits_needed=data.get("credits_needed"),
-                course_type=data.get("course_type", ""),
-                course_id=str(data.get("course_id", "")),  # Add this
-                is_elective_section=data.get("is_elective_section", False)  # Add this
-            )
-            courses.append(course)
-        return courses
-
     def _sort_by_prerequisites(self, courses: List[Course]) -> List[Course]:
         """Sort courses optimizing for earliest possible graduation"""
+        # First course per id, as the list scans this replaced returned
+        by_id: Dict[int, Course] = {}
+        for course in courses:
+            by_id.setdefault(course.id, course)
         # Create mappings for prerequisite chains and dependent courses
         prereq_chains = {}
         dependent_courses = {}
@@ -144,7 +105,7 @@ class ScheduleOptimizer:
                 return set()
             seen.add(course_id)
             
-            course = next((c for c in courses if c.id == course_id), None)
+            course = by_id.get(course_id)
             if not course:
                 return set()
                 
@@ -164,7 +125,7 @@ class ScheduleOptimizer:
                 return 0
             seen.add(course_id)
             
-            course = next((c for c in courses if c.id == course_id), None)
+            course = by_id.get(course_id)
             if not course or not course.prerequisites:
                 return 0
                 
@@ -199,6 +160,11 @@ class ScheduleOptimizer:
             c.id                            # Stable sort
         ))
 
+    def _unlocks_count(self, course: Course, remaining_ids: Set[int]) -> int:
+        """How many of the remaining courses list course as a prerequisite"""
+        catalog = self._run.catalog
+        return sum(1 for i in catalog.dependents_of(catalog.index[course.id]) if catalog.ids[i] in remaining_ids)
+
     def _can_schedule_in_semester(self, course: Course, scheduled_courses: List[Course]) -> bool:
         """Check if all prerequisites for a course have been scheduled"""
         scheduled_ids = {c.id for c in scheduled_courses}
@@ -254,16 +220,24 @@ class ScheduleOptimizer:
         current_major_count = self._count_major_courses_in_semester(semester_courses)
         
         # Check if adding this course would exceed the limit
-        courses_to_add = self._get_course_with_coreqs(course, self._all_courses)
+        courses_to_add = self._get_course_with_coreqs(course)
         major_courses_to_add = sum(1 for c in courses_to_add if self._is_major_course(c))
         
         return current_major_count + major_courses_to_add <= major_class_limit
 
-    def create_schedule(self, processed_data: Dict) -> Dict:
+    def create_schedule(self, processed_data: Dict,
+                        progress_callback: Optional[Callable[[str, Dict], None]] = None,
+                        cancel_token: Optional[CancelToken] = None,
+                        phase_timer: Optional[PhaseTimer] = None) -> Dict:
         """Create a schedule with integrated EIL and regular courses"""
+        run = RunContext(progress_callback, cancel_token or CancelToken(), phase_timer or PhaseTimer())
+        with bind_run(run):
+            return self._create_schedule(processed_data)
+
+    def _create_schedule(self, processed_data: Dict) -> Dict:
         try:
             # Validate input
-            if not processed_data.get("classes"):
+            if not processed_data.get("catalog"):
                 logger.error("No classes in processed data")
                 return {
                     "error": "No classes to schedule",
@@ -284,17 +258,22 @@ class ScheduleOptimizer:
                 }
                 
             # Add logging for schedule generation
-            logger.info(f"Starting schedule creation with {len(processed_data['classes'])} classes")
+            logger.info(f"Starting schedule creation with {len(processed_data['catalog'])} classes")
             
             # Initialize tracking sets
-            self.satisfied_sections = set()
             scheduled_course_ids = set()
             
             params = processed_data["parameters"]
+            self._run.deadline = Deadline(params.get("timeBudgetMs"))
+            # prioritySeed perturbs priority ties and elective picks to produce alternative schedules
+            seed = params.get("prioritySeed")
+            self._run.rng = random.Random(seed) if seed is not None else None
             # Remove this log
             # logger.info(f"Received scheduling parameters: {params}")
             
-            self._all_courses = self._convert_to_courses(processed_data["classes"])
+            # Compiled once by the data processor (or at registration) and shared read-only
+            self._run.catalog = processed_data["catalog"]
+            self._run.all_courses = list(self._run.catalog.courses)
             
             # Handle empty or missing firstYearLimits
             if not params.get("firstYearLimits") or not isinstance(params["firstYearLimits"], dict):
@@ -309,11 +288,12 @@ class ScheduleOptimizer:
                 params["fallWinterCredits"],
                 params["springCredits"],
                 params["firstYearLimits"]["fallWinterCredits"],
-                params["firstYearLimits"]["springCredits"]
+                params["firstYearLimits"]["springCredits"],
+                params["firstYearSemesters"]
             )
             
             # Group courses by section
-            sections = self._group_by_section(self._all_courses)
+            sections = self._group_by_section(self._run.all_courses)
             
             # Track all courses to be scheduled
             courses_to_schedule = []
@@ -331,7 +311,7 @@ class ScheduleOptimizer:
                             if combination:
                                 courses_to_schedule.extend(combination)
                                 # Keep this log as it's useful for tracking elective combinations
-                                logger.info(f"Selected electives for section {section_id}: {[c.class_number for c in combination]}")
+                                logger.debug("Selected electives for section %s: %s", section_id, [c.class_number for c in combination])
                         except ValueError as e:
                             logger.error(f"Failed to satisfy section {section_id}: {str(e)}")
                             return {
@@ -366,15 +346,23 @@ class ScheduleOptimizer:
                     first_sem_required.append(course)
             
             # Sort regular courses by prerequisites
-            sorted_regular_courses = self._sort_by_prerequisites(regular_courses)
+            with self._run.phase_timer.phase("sort_prerequisites"):
+                sorted_regular_courses = self._sort_by_prerequisites(regular_courses)
             
             # Integrated scheduling - single loop for all courses
             current_semester_idx = 0
             scheduled_semesters = []
             remaining_courses = sorted_regular_courses.copy()
             all_scheduled_courses = []
+            self._run.phase_timer.start("semester_loop")
             
             while remaining_courses or first_sem_required or first_sem_flexible or second_sem_required:
+                # Out of time: keep the semesters finalized so far and report the rest as unscheduled
+                self._run.cancel_token.check("semester_loop")
+                if self._run.deadline.check("semester_loop"):
+                    logger.warning("Time budget exhausted after %d semesters", len(scheduled_semesters))
+                    break
+                    
                 # Create new semester if needed
                 if current_semester_idx >= len(semesters):
                     last_sem = semesters[-1]
@@ -429,6 +417,7 @@ class ScheduleOptimizer:
                 # Check if we should force religion course scheduling
                 force_religion_scheduling = self._should_force_religion_scheduling(remaining_courses, scheduled_semesters)
 
+                remaining_ids = {c.id for c in remaining_courses}
                 for course in remaining_courses:
                     # Skip if already scheduled
                     if course.id in scheduled_course_ids:
@@ -451,7 +440,7 @@ class ScheduleOptimizer:
                             continue  # Skip this religion course if we already have one
                         
                         # Also check if any corequisites are religion courses
-                        added_courses_preview = self._add_course_with_coreqs(course, remaining_courses)
+                        added_courses_preview = self._add_course_with_coreqs(course)
                         religion_in_coreqs = sum(1 for c in added_courses_preview if self._is_religion_class(c))
                         if religion_in_coreqs > 1:  # More than just the main course
                             continue  # Skip if corequisites include other religion courses
@@ -461,7 +450,7 @@ class ScheduleOptimizer:
 
                     # 1. HIGHEST priority for courses that unlock the most other courses
                     # Look at ALL remaining courses, not just those that can be scheduled this semester
-                    unlocks_count = sum(1 for c in remaining_courses if course.id in c.prerequisites)
+                    unlocks_count = self._unlocks_count(course, remaining_ids)
                     priority += unlocks_count * 20  # Increased weight significantly
 
                     # 2. Additional priority boost for courses with NO prerequisites (foundation courses)
@@ -494,6 +483,10 @@ class ScheduleOptimizer:
                     
                     course_priorities.append((course, priority))
 
+                if self._run.rng:
+                    course_priorities = [(course, priority + self._run.rng.uniform(0, PRIORITY_JITTER))
+                                         for course, priority in course_priorities]
+
                 # Sort courses by priority (highest first)
                 course_priorities.sort(key=lambda x: x[1], reverse=True)
 
@@ -509,7 +502,7 @@ class ScheduleOptimizer:
                         
                         try:
                             # Add course and its corequisites
-                            added_courses = self._add_course_with_coreqs(course, remaining_courses)
+                            added_courses = self._add_course_with_coreqs(course)
                             
                             # Enhanced religion course validation
                             if self._is_religion_class(course):
@@ -532,13 +525,13 @@ class ScheduleOptimizer:
                             # Log major course scheduling for debugging
                             if self._is_major_course(course):
                                 major_count = self._count_major_courses_in_semester(semester_courses)
-                                logger.info(f"Scheduled major course {course.class_number} in {semester.type} {semester.year} (major count: {major_count}/{major_class_limit})")
+                                logger.debug("Scheduled major course %s in %s %s (major count: %s/%s)",
+                                             course.class_number, semester.type, semester.year, major_count, major_class_limit)
                             
-                            # Remove scheduled courses
-                            for c in added_courses:
-                                if c in remaining_courses:
-                                    remaining_courses.remove(c)
-                                    scheduled_course_ids.add(c.id)
+                            # Remove scheduled courses by id: added_courses may hold this run's retyped copies
+                            removed_ids = {c.id for c in added_courses} & {c.id for c in remaining_courses}
+                            remaining_courses[:] = [c for c in remaining_courses if c.id not in removed_ids]
+                            scheduled_course_ids.update(removed_ids)
                         except Exception as e:
                             logger.error(f"Error scheduling {course.class_number}: {str(e)}")
                             continue
@@ -551,6 +544,10 @@ class ScheduleOptimizer:
                         "classes": [self._course_to_dict(c) for c in semester_courses],
                         "totalCredits": current_credits
                     })
+                    self._report_progress("semester", {
+                        "index": len(scheduled_semesters) - 1,
+                        "semester": scheduled_semesters[-1]
+                    })
                 
                 # Move to next semester if we scheduled courses or reached credit limit
                 if courses_scheduled_this_semester or current_credits >= semester.credit_limit:
@@ -566,23 +563,33 @@ class ScheduleOptimizer:
                 if not (remaining_courses or first_sem_required or first_sem_flexible or second_sem_required):
                     break
 
+            self._run.phase_timer.stop("semester_loop")
+            unscheduled = [c.class_number for c in
+                           remaining_courses + first_sem_required + first_sem_flexible + second_sem_required]
+
             # Optimize final semesters to eliminate unnecessary semesters by strategically swapping religion courses
-            scheduled_semesters = self._optimize_final_semesters(scheduled_semesters, params)
+            with self._run.phase_timer.phase("optimize_final_semesters"):
+                scheduled_semesters = self._optimize_final_semesters(scheduled_semesters, params)
 
             return {
                 "metadata": {
                     "approach": "integrated-scheduling",
                     "startSemester": params["startSemester"],
+                    # A plan cut short by the time budget is incomplete
+                    "success": not (self._run.deadline.expired and unscheduled),
                     "score": 1.0,
                     "improvements": [
                         "Integrated EIL and regular course scheduling",
                         "Maximized semester utilization",
                         "Maintained all course scheduling rules and constraints",
                         "Optimized schedule to eliminate unnecessary semesters"
-                    ]
+                    ],
+                    **self._run.deadline.describe(unscheduled)
                 },
                 "schedule": scheduled_semesters
             }
+        except RunCancelled:
+            raise
         except Exception as e:
             logger.error(f"Error in schedule creation: {str(e)}")
             return {
@@ -597,14 +604,14 @@ class ScheduleOptimizer:
                             regular_fall_winter: int,
                             regular_spring: int,
                             first_year_fall_winter: int,
-                            first_year_spring: int) -> List[Semester]:
+                            first_year_spring: int,
+                            first_year_semesters: int) -> List[Semester]:
         sem_type, year = start_semester.split()
         year = int(year)
         
         semesters = []
         for i in range(15):  # Generate more semesters to ensure we don't run out
-            # First 3 semesters are first year
-            is_first_year = i < 3
+            is_first_year = i < first_year_semesters
             if sem_type == "Spring":
                 credit_limit = first_year_spring if is_first_year else regular_spring
             else:
@@ -635,18 +642,20 @@ class ScheduleOptimizer:
 
     def _find_best_elective_combination(self, courses: List[Course], credits_needed: int) -> List[Course]:
         """Find optimal combination of elective courses that meets or exceeds credit requirement"""
-        logger.info(f"Looking for combination totaling at least {credits_needed} credits from section {courses[0].section_id}")
+        logger.debug("Looking for combination totaling at least %s credits from section %s", credits_needed, courses[0].section_id)
         
         # Get only elective courses
         elective_courses = [c for c in courses if c.is_elective]
+        if self._run.rng:
+            self._run.rng.shuffle(elective_courses)
         
         # Calculate total available credits in this section INCLUDING corequisites
         total_available_credits = 0
         for course in elective_courses:
-            course_with_coreqs = self._get_course_with_coreqs(course, self._all_courses)
+            course_with_coreqs = self._get_course_with_coreqs(course)
             total_available_credits += sum(c.credits for c in course_with_coreqs)
     
-        logger.info(f"Section {courses[0].section_id} has {total_available_credits} total credits available (including corequisites)")
+        logger.debug("Section %s has %s total credits available (including corequisites)", courses[0].section_id, total_available_credits)
     
         if total_available_credits < credits_needed:
             error_msg = (f"Section {courses[0].section_id} requires {credits_needed} credits but only has "
@@ -656,8 +665,8 @@ class ScheduleOptimizer:
     
         # Track section fulfillment
         section_id = courses[0].section_id
-        if section_id in self.satisfied_sections:
-            logger.info(f"Section {section_id} already satisfied")
+        if section_id in self._run.satisfied_sections:
+            logger.debug("Section %s already satisfied", section_id)
             return []
             
         best_combination = None
@@ -670,7 +679,7 @@ class ScheduleOptimizer:
             
             # Add courses one by one until we exceed or meet the requirement
             for course in elective_courses[:size]:
-                course_and_coreqs = self._get_course_with_coreqs(course, self._all_courses)
+                course_and_coreqs = self._get_course_with_coreqs(course)
                 current_combo.extend(course_and_coreqs)
                 current_total = sum(c.credits for c in current_combo)
                 
@@ -682,23 +691,23 @@ class ScheduleOptimizer:
                 
         # If we found a valid combination, use it
         if best_combination:
-            self.satisfied_sections.add(section_id)
-            logger.info(f"Found combination for section {section_id}: {[c.class_number for c in best_combination]} = {best_total} cr "
-                       f"(needed {credits_needed})")
+            self._run.satisfied_sections.add(section_id)
+            logger.debug("Found combination for section %s: %s = %s cr (needed %s)",
+                         section_id, [c.class_number for c in best_combination], best_total, credits_needed)
             return best_combination
 
         logger.warning(f"Could not meet credit requirement for section {section_id}: needed {credits_needed} credits")
         return []  # Return empty list instead of None
 
-    def _get_course_with_coreqs(self, course: Course, available_courses: List[Course]) -> List[Course]:
-        """Get a course and all its corequisites"""
+    def _get_course_with_coreqs(self, course: Course, available_ids: Optional[Set[int]] = None) -> List[Course]:
+        """Get a course and all its corequisites, limited to available_ids when given"""
         result = [course]
         
         # Add all corequisites
         for coreq_id in course.corequisites:
             if isinstance(coreq_id, dict):
                 coreq_id = coreq['id']
-            coreq = next((c for c in available_courses if c.id == coreq_id), None)
+            coreq = self._run.catalog.course(coreq_id) if available_ids is None or coreq_id in available_ids else None
             if coreq and coreq not in result:
                 result.append(coreq)
                 
@@ -766,7 +775,7 @@ class ScheduleOptimizer:
         
         return total
 
-    def _add_course_with_coreqs(self, course: Course, remaining_courses: List[Course]) -> List[Course]:
+    def _add_course_with_coreqs(self, course: Course) -> List[Course]:
         """Add a course and its corequisites, ensuring one-way corequisites are scheduled together"""
         # Start with the main course
         added = [course]
@@ -783,31 +792,26 @@ class ScheduleOptimizer:
                 if coreq_id in required_coreqs:
                     continue
                 
-                # First try to find in remaining_courses
-                coreq = next((c for c in remaining_courses if c.id == coreq_id), None)
-                
-                # If not found, look in all courses
-                if not coreq:
-                    coreq = next((c for c in self._all_courses if c.id == coreq_id), None)
+                coreq = self._run.catalog.course(coreq_id)
                 
                 if coreq:
+                    coreq = self._run.retyped.get(coreq_id, coreq)
                     required_coreqs.add(coreq_id)
                     to_check.append(coreq)
                     
                     # If this is a system course being pulled in by a non-system course,
                     # update its course_type to match the parent
                     if coreq.course_type == "system" and course.course_type != "system":
-                        logger.info(f"Updating {coreq.class_number} type from system to {course.course_type}")
-                        coreq.course_type = course.course_type
+                        logger.debug("Updating %s type from system to %s", coreq.class_number, course.course_type)
+                        self._run.retyped[coreq_id] = replace(coreq, course_type=course.course_type)
     
         # Add all required corequisites
         for coreq_id in required_coreqs:
-            coreq = (next((c for c in remaining_courses if c.id == coreq_id), None) or 
-                    next((c for c in self._all_courses if c.id == coreq_id), None))
-            if coreq and coreq not in added:
+            coreq = self._run.retyped.get(coreq_id) or self._run.catalog.course(coreq_id)
+            if coreq and all(c.id != coreq_id for c in added):
                 added.append(coreq)
                 # Keep corequisite combination logs as they're useful for debugging
-                logger.info(f"Adding corequisite {coreq.class_number} with {course.class_number}")
+                logger.debug("Adding corequisite %s with %s", coreq.class_number, course.class_number)
     
         return added
 
@@ -822,12 +826,12 @@ class ScheduleOptimizer:
             return True
             
         # Get all courses scheduled in previous semesters only
-        courses_in_previous_semesters = []
+        courses_in_previous_semesters = set()
         for i in range(current_semester_idx):
             if i < len(scheduled_semesters):
                 semester = scheduled_semesters[i]
                 for course_dict in semester["classes"]:
-                    courses_in_previous_semesters.append(course_dict["id"])
+                    courses_in_previous_semesters.add(course_dict["id"])
 
         # Check if all prerequisites are in previous semesters
         return all(prereq_id in courses_in_previous_semesters for prereq_id in course.prerequisites)
@@ -1011,6 +1015,7 @@ class ScheduleOptimizer:
         """Get all prerequisite and corequisite chains"""
         chains = {}
         processed = set()
+        course_ids = {c.id for c in courses}
         
         for course in courses:
             # Skip if already part of another chain
@@ -1019,7 +1024,7 @@ class ScheduleOptimizer:
                 
             if course.prerequisites or course.corequisites:
                 prereq_chains = self._get_prerequisite_chain(course, courses)
-                coreq_chain = [c.class_number for c in self._get_course_with_coreqs(course, courses)]
+                coreq_chain = [c.class_number for c in self._get_course_with_coreqs(course, course_ids)]
                 
                 # Only keep longest chain for each end course 
                 longest_chains = []
@@ -1068,6 +1073,11 @@ class ScheduleOptimizer:
             
             # Check each semester starting from the end
             for last_idx in range(len(scheduled_semesters) - 1, 0, -1):
+                # Each redistribution leaves a valid schedule, so stopping between them is safe
+                self._run.cancel_token.check("optimize_final_semesters")
+                if self._run.deadline.check("optimize_final_semesters"):
+                    return scheduled_semesters
+                    
                 last_semester = scheduled_semesters[last_idx]
                 
                 # Be more aggressive about eliminating final semesters
@@ -1088,6 +1098,11 @@ class ScheduleOptimizer:
                     if self._can_eliminate_semester(last_semester, scheduled_semesters, last_idx, params):
                         if self._redistribute_semester_courses(scheduled_semesters, last_idx, params):
                             logger.info(f"Successfully eliminated {last_semester['type']} {last_semester['year']} with {last_semester['totalCredits']} credits - graduated earlier!")
+                            self._report_progress("improvement", {
+                                "pass": "optimize_final_semesters",
+                                "eliminated": f"{last_semester['type']} {last_semester['year']}",
+                                "semesterCount": len(scheduled_semesters)
+                            })
                             optimized = True
                             break
 
@@ -1330,7 +1345,8 @@ class ScheduleOptimizer:
                     earlier_semester["totalCredits"] = earlier_new_total
                     target_semester["totalCredits"] = target_new_total
                     
-                    logger.info(f"Swapped religion course {new_religion_course['class_number']} with simple course {course['class_number']}")
+                    logger.debug("Swapped religion course %s with simple course %s",
+                                 new_religion_course['class_number'], course['class_number'])
                     return True
         
         # If no swap was possible, try just adding the religion course if there's space
@@ -1,11 +1,15 @@
-import json
-from typing import Dict, List, Any, Set, Tuple
+from typing import Dict, Iterable, Any, List, Optional, Set, Tuple
 import logging
 from datetime import datetime
 
-logging.basicConfig(level=logging.INFO)
+from compiled_catalog import CompiledCatalog, Course
+from payload_validator import PayloadValidator
+
 logger = logging.getLogger(__name__)
 
+# Semesters from startSemester that count as the student's first year
+FIRST_YEAR_SEMESTERS = 3
+
 class ScheduleDataProcessor:
     """Process raw schedule data from JSON payloads into a format suitable for optimization"""
     
@@ -16,45 +20,55 @@ class ScheduleDataProcessor:
     def process_payload(self, payload: Dict) -> Dict:
         logger.info("Starting payload processing")
         
-        # Add validation checks
-        if not payload.get("courseData"):
+        # Every structural problem is reported at once, before any class is mapped
+        validator = PayloadValidator()
+        if not isinstance(payload, dict):
+            validator.add("", "Payload must be an object")
+            return validator.report()
+        validator.check_preferences(payload.get("preferences"))
+        if not payload.get("courseData") or not isinstance(payload["courseData"], list):
             logger.error("Missing courseData in payload")
-            return {"error": "Invalid payload structure"}
-            
-        if not payload.get("preferences"):
-            logger.error("Missing preferences in payload")
-            return {"error": "Invalid payload structure"}
+            validator.add("courseData", "courseData must be a non-empty list")
+            return validator.report()
         
         # Add detailed logging for dependencies
-        processed_data = self._process_payload_internal(payload)
+        processed_data = self._process_payload_internal(payload, validator)
+        if "error" in processed_data:
+            return processed_data
         
-        logger.info(f"Processed {len(processed_data['classes'])} classes")
-        logger.info(f"First 3 processed classes: {list(processed_data['classes'].items())[:3]}")
+        logger.info("Processed %d classes", len(processed_data['catalog']))
         
         return processed_data
 
-    def _process_payload_internal(self, payload: Dict) -> Dict:
-        # Original process_payload logic here
-        logger.info("Starting payload processing")
-        
-        # Log preferences
-        preferences = payload.get("preferences", {})
-        logger.info(f"Raw preferences: {json.dumps(preferences, indent=2)}")
-        
-        # Log credit limits
-        first_year_limits = preferences.get("firstYearLimits", {})
-        logger.info(f"First year limits: {json.dumps(first_year_limits, indent=2)}")
-        logger.info(f"Regular Fall/Winter credits: {preferences.get('fallWinterCredits')}")
-        logger.info(f"Regular Spring credits: {preferences.get('springCredits')}")
-        logger.info(f"Major class limit per semester: {preferences.get('majorClassLimit', 3)}")
-        
-        course_data = payload.get("courseData", [])
-        
-        # Mapping of class IDs to their full information
+    def process_catalog_payload(self, catalog: CompiledCatalog, preferences: Dict) -> Dict:
+        """Build processed data from a registered catalog and a request's preferences"""
+        logger.info("Starting payload processing with registered catalog")
+        
+        validator = PayloadValidator()
+        validator.check_preferences(preferences)
+        if not validator.valid:
+            logger.error("Invalid preferences in payload")
+            return validator.report()
+            
+        return self._build_processed_data(catalog, preferences)
+
+    def process_catalog(self, course_data: Iterable[Dict], validator: Optional[PayloadValidator] = None) -> Dict:
+        """Validate, extract and map the classes of a catalog, independent of preferences.
+
+        course_data is read once, in order, so it may be a stream of courses as they are parsed.
+        Problems are collected in validator (a fresh one by default) and reported together.
+        Returns {"catalog": CompiledCatalog} or an error report.
+        """
+        validator = validator if validator is not None else PayloadValidator()
+        # Class ID -> (raw class, course_id, course_type, section_id, is_elective_section, credits_needed);
+        # the raw class is referenced, not copied, until its Course is built
         all_classes = {}
         
         # Extract all classes and their requirements
-        for course in course_data:
+        for index, course in enumerate(course_data):
+            validator.check_course(index, course)
+            if not validator.valid:
+                continue  # Keep checking for the report, but stop building a catalog that will be rejected
             course_id = course.get("id")
             course_type = course.get("course_type")
             
@@ -69,18 +83,28 @@ class ScheduleDataProcessor:
                 credits_needed = section.get("credits_needed_to_take")
                 
                 for cls in section.get("classes", []):
-                    cls_id = cls.get("id")
-                    all_classes[cls_id] = {
-                        **cls,
-                        "course_id": course_id,
-                        "course_type": course_type,
-                        "section_id": section.get("id"),
-                        "is_elective_section": is_elective_section,
-                        "credits_needed": credits_needed
-                    }
+                    all_classes[cls.get("id")] = (cls, course_id, course_type, section.get("id"),
+                                                  is_elective_section, credits_needed)
+        
+        error = validator.report()
+        if error:
+            logger.error(f"Invalid payload with {validator.error_count} problems, first: {error['errors'][0]['message']}")
+            return error
         
         # Map prerequisites and corequisites using IDs
-        self._map_class_dependencies(all_classes)
+        return {"catalog": CompiledCatalog(self._map_class_dependencies(all_classes))}
+
+    def _process_payload_internal(self, payload: Dict, validator: PayloadValidator) -> Dict:
+        catalog = self.process_catalog(payload.get("courseData", []), validator)
+        if "error" in catalog:
+            return catalog
+            
+        return self._build_processed_data(catalog["catalog"], payload.get("preferences", {}))
+
+    def _build_processed_data(self, catalog: CompiledCatalog, preferences: Dict) -> Dict:
+        """Combine a compiled catalog with scheduling parameters taken from preferences"""
+        first_year_limits = preferences.get("firstYearLimits", {})
+        logger.debug("Raw preferences: %s", preferences)
         
         # Extract scheduling approach and parameters
         scheduling_params = {
@@ -91,36 +115,25 @@ class ScheduleDataProcessor:
             "majorClassLimit": preferences.get("majorClassLimit", 3),
             "firstYearLimits": first_year_limits,
             "limitFirstYear": preferences.get("limitFirstYear", False),
-            "targetSemesters": preferences.get("targetSemesters")
+            "firstYearSemesters": FIRST_YEAR_SEMESTERS,
+            "targetSemesters": preferences.get("targetSemesters"),
+            "timeBudgetMs": preferences.get("timeBudgetMs"),
+            "prioritySeed": preferences.get("prioritySeed"),
+            "alternatives": preferences.get("alternatives")
         }
         
-        logger.info(f"Processed scheduling parameters: {json.dumps(scheduling_params, indent=2)}")
-        
-        # Add validation for semester-based approach
-        if scheduling_params["approach"] == "semesters-based" and not scheduling_params["targetSemesters"]:
-            logger.error("Target semesters not specified for semester-based scheduling")
-            return {
-                "error": "Missing targetSemesters parameter for semester-based scheduling",
-                "metadata": {
-                    "success": False,
-                    "message": "Target semesters must be specified for semester-based scheduling"
-                }
-            }
-        
-        # Validate class data before returning
-        for cls_id, cls_info in all_classes.items():
-            required_fields = ["class_name", "credits", "semesters_offered"]
-            for field in required_fields:
-                if field not in cls_info:
-                    logger.error(f"Missing required field {field} in class {cls_id}")
-                    return {"error": f"Invalid class data: missing {field}"}
+        logger.info("Scheduling parameters", extra={
+            "approach": scheduling_params["approach"],
+            "startSemester": scheduling_params["startSemester"],
+            "targetSemesters": scheduling_params["targetSemesters"]
+        })
         
         # Add metadata to processed data
         processed_data = {
-            "classes": all_classes,
+            "catalog": catalog,
             "parameters": scheduling_params,
             "metadata": {
-                "total_classes": len(all_classes),
+                "total_classes": len(catalog),
                 "processing_timestamp": datetime.now().isoformat()
             }
         }
@@ -139,34 +152,41 @@ class ScheduleDataProcessor:
                         coreq_id = coreq.get("id") if isinstance(coreq, dict) else coreq
                         # Look up corequisite's course in all_classes
                         if coreq_id in all_classes:
-                            course_type = all_classes[coreq_id].get("course_type", "system")
+                            course_type = all_classes[coreq_id][2]
                             break
             
-                all_classes[cls_id] = {
-                    **cls,
-                    "course_id": "additional",
-                    "course_type": course_type,
-                    "section_id": section.get("id"),
-                    "is_elective_section": False,
-                    "credits_needed": None
-                }
+                all_classes[cls_id] = (cls, "additional", course_type, section.get("id"), False, None)
     
-    def _map_class_dependencies(self, all_classes: Dict):
-        """Map prerequisites and corequisites using class IDs"""
-        for cls_id, cls_info in all_classes.items():
+    def _map_class_dependencies(self, all_classes: Dict) -> List[Course]:
+        """Build a Course per class, mapping prerequisites and corequisites using class IDs"""
+        courses = []
+        for cls_id, (cls, course_id, course_type, section_id, is_elective_section, credits_needed) in all_classes.items():
             # Map prerequisites
-            prerequisites = cls_info.get("prerequisites", [])
             mapped_prereqs = []
-            for prereq_id in prerequisites:
+            for prereq_id in cls.get("prerequisites", []):
                 if isinstance(prereq_id, int) and prereq_id in all_classes:
                     mapped_prereqs.append(prereq_id)
-            cls_info["prerequisites"] = mapped_prereqs
             
             # Map corequisites
-            corequisites = cls_info.get("corequisites", [])
             mapped_coreqs = []
-            for coreq in corequisites:
+            for coreq in cls.get("corequisites", []):
                 coreq_id = coreq.get("id") if isinstance(coreq, dict) else coreq
                 if coreq_id in all_classes:
                     mapped_coreqs.append(coreq_id)
-            cls_info["corequisites"] = mapped_coreqs
\ No newline at end of file
+
+            courses.append(Course(
+                id=int(cls_id),
+                name=cls["class_name"],
+                class_number=cls.get("class_number", ""),
+                credits=cls["credits"],
+                prerequisites=mapped_prereqs,
+                corequisites=mapped_coreqs,
+                semesters_offered=cls["semesters_offered"],
+                is_elective=cls.get("is_elective", False),
+                section_id=section_id,
+                credits_needed=credits_needed,
+                course_type=course_type,
+                course_id=str(course_id),
+                is_elective_section=is_elective_section
+            ))
+        return courses
\ No newline at end of file
@@ -0,0 +1,41 @@
+from typing import Dict, List, Optional
+import time
+import os
+
+# Budget for requests that don't set timeBudgetMs; 0 (the default) means unlimited
+DEFAULT_BUDGET_MS = float(os.environ.get("SCHEDULER_TIME_BUDGET_MS", 0))
+
+def is_partial(body: Dict) -> bool:
+    """True for a plan whose time budget ran out before every course was placed"""
+    return bool(body.get("metadata", {}).get("unscheduledCourses"))
+
+class Deadline:
+    """Wall-clock budget for one schedule run; without a budget it never expires"""
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms or DEFAULT_BUDGET_MS or None
+        self._expires_at = time.perf_counter() + self.budget_ms / 1000 if self.budget_ms else None
+        # The phase that was running when the budget ran out
+        self.expired_in: Optional[str] = None
+
+    def check(self, phase: str) -> bool:
+        """Return True once the budget is spent, remembering the first phase that noticed"""
+        if self._expires_at is None:
+            return False
+        if self.expired_in is None and time.perf_counter() >= self._expires_at:
+            self.expired_in = phase
+        return self.expired_in is not None
+
+    @property
+    def expired(self) -> bool:
+        return self.expired_in is not None
+
+    def describe(self, unscheduled: List[str]) -> Dict:
+        """Metadata fields telling the client whether, where and how much the run was cut short"""
+        if self.budget_ms is None:
+            return {}
+        metadata = {"timeBudgetMs": self.budget_ms, "truncated": self.expired}
+        if self.expired:
+            metadata["truncatedPhase"] = self.expired_in
+            metadata["unscheduledCourses"] = unscheduled
+        return metadata
@@ -0,0 +1,124 @@
+from typing import Dict
+from dataclasses import asdict
+from flask import Blueprint, g, request, jsonify
+from constraint_optimizer import ScheduleOptimizer
+from semester_based_optimizer import SemesterBasedOptimizer
+from data_processor import ScheduleDataProcessor
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Diagnostic endpoints; api.py registers them only in development or with SCHEDULER_DEBUG_ROUTES=1
+debug_routes = Blueprint("debug", __name__)
+
+def _echo(processed_data: Dict) -> Dict:
+    """processed_data in JSON form, with its compiled catalog listed as classes keyed by id"""
+    catalog = processed_data.get("catalog")
+    if catalog is None:
+        return processed_data
+    echoed = {key: value for key, value in processed_data.items() if key != "catalog"}
+    echoed["classes"] = {course.id: asdict(course) for course in catalog.courses}
+    return echoed
+
+@debug_routes.route('/test-connection', methods=['POST'])
+def test_connection():
+    """Test endpoint to verify connection and payload handling"""
+    try:
+        logger.info("=== Test Connection Request ===")
+        logger.info(f"Headers: {dict(request.headers)}")
+        data = g.payload
+        
+        return jsonify({
+            "status": "success",
+            "received_data": data,
+            "timestamp": str(datetime.now()),
+            "headers_received": dict(request.headers)
+        })
+    except Exception as e:
+        logger.exception("Error in test connection:")
+        return jsonify({"error": str(e)}), 500
+
+@debug_routes.route('/test-payload', methods=['POST'])
+def test_payload():
+    """Test endpoint for payload validation"""
+    try:
+        data = g.payload
+        logger.info("=== Test Payload Request ===")
+        logger.info(f"Received payload with {len(data.get('courseData', []))} courses")
+        logger.info(f"Preferences: {data.get('preferences', {})}")
+        
+        # Validate key components
+        course_data = data.get('courseData', [])
+        preferences = data.get('preferences', {})
+        
+        return jsonify({
+            "status": "success",
+            "payload_size": len(str(data)),
+            "courses_count": len(course_data),
+            "preferences": preferences,
+            "timestamp": str(datetime.now())
+        })
+    except Exception as e:
+        logger.exception("Error in test payload:")
+        return jsonify({"error": str(e)}), 500
+
+@debug_routes.route('/test-course-data', methods=['POST'])
+def test_course_data():
+    """Test endpoint to verify course data processing"""
+    try:
+        data = g.payload
+        logger.info("=== Course Data Test ===")
+        
+        # Verify course data structure
+        course_data = data.get('courseData', [])
+        logger.info(f"Number of courses: {len(course_data)}")
+        for course in course_data:
+            logger.info(f"Course: {course.get('course_name')}")
+            logger.info(f"Sections: {len(course.get('sections', []))}")
+            
+        # Process with data processor
+        processor = ScheduleDataProcessor()
+        processed = processor.process_payload(data)
+        
+        return jsonify({
+            "status": "success",
+            "course_count": len(course_data),
+            "processed_data": _echo(processed),
+            "timestamp": str(datetime.now())
+        })
+    except Exception as e:
+        logger.exception("Error processing course data:")
+        return jsonify({"error": str(e)}), 500
+
+@debug_routes.route('/test-optimizer', methods=['POST'])
+def test_optimizer():
+    """Test endpoint for the optimizer functionality"""
+    try:
+        data = g.payload
+        logger.info("=== Testing Optimizer ===")
+        
+        # Process the data
+        processor = ScheduleDataProcessor()
+        processed_data = processor.process_payload(data)
+        
+        # Determine approach and test appropriate optimizer
+        approach = processed_data["parameters"].get("approach", "credits-based")
+        
+        if approach == "semesters-based":
+            optimizer = SemesterBasedOptimizer()
+        else:
+            optimizer = ScheduleOptimizer()
+        
+        logger.info(f"Testing {approach} optimizer...")
+        
+        return jsonify({
+            "status": "success",
+            "approach": approach,
+            "processed_data": _echo(processed_data),
+            "course_count": len(processed_data["catalog"]),
+            "timestamp": str(datetime.now())
+        })
+    except Exception as e:
+        logger.exception("Error in optimizer test:")
+        return jsonify({"error": str(e)}), 500
@@ -1 +1 @@
-exec gunicorn --bind 0.0.0.0:$PORT --workers 1 --threads 8 --timeout 0 api:app
\ No newline at end of file
+exec gunicorn --config gunicorn.conf.py api:app
\ No newline at end of file
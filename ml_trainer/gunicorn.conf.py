@@ -0,0 +1,37 @@
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+timeout = 0
+
+# Import the app (Flask, optimizers, preloaded catalogs) once in the master; workers fork from it warm
+preload_app = True
+
+# A unix: RPC socket is bound once here in the master; every worker accepts from the inherited socket
+rpc_listener = None
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before any worker is forked"""
+    global rpc_listener
+    if os.environ.get("SCHEDULER_WARM_UP", "1") == "1":
+        from warmup import warm_up
+        warm_up()
+    address = os.environ.get("SCHEDULER_RPC_BIND", "")
+    if address.startswith("unix:"):
+        from rpc_server import bind_unix_socket
+        rpc_listener = bind_unix_socket(address[len("unix:"):])
+
+def post_fork(server, worker):
+    """Jobs are held per worker, so the job API is only served when there is a single one (-w overrides WEB_CONCURRENCY)"""
+    from job_queue import job_queue
+    job_queue.set_web_workers(server.cfg.workers)
+    if server.cfg.workers > 1:
+        server.log.warning("Job API disabled: each of the %d workers would only see its own jobs", server.cfg.workers)
+
+def post_worker_init(worker):
+    """Serve the binary RPC transport from each worker alongside HTTP when SCHEDULER_RPC_BIND is set"""
+    address = os.environ.get("SCHEDULER_RPC_BIND")
+    if address:
+        from rpc_server import start_rpc_server
+        start_rpc_server(address, threads, rpc_listener)
@@ -0,0 +1,190 @@
+from typing import Dict, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from concurrent.futures import CancelledError
+from concurrent.futures.process import BrokenProcessPool
+import threading
+import logging
+import queue
+import time
+import uuid
+import os
+
+from cancellation import CANCELLED_STATUS, CancelToken
+from metrics import registry, Gauge, observe_outcome
+from schedule_runner import (ScheduleOutcome, cancelled_outcome, get_process_pool, reset_process_pool,
+                             submit_schedule, wait_for_outcome)
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFull(Exception):
+    """Raised when the pending job queue is at capacity"""
+
+class JobQueueUnavailable(Exception):
+    """Raised when this process can't serve the job API because it is one of several web workers"""
+
+@dataclass
+class Job:
+    id: str
+    payload: Optional[Dict]
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    outcome: Optional[ScheduleOutcome] = None
+    cancel_token: CancelToken = field(default_factory=CancelToken, repr=False)
+
+    def to_dict(self) -> Dict:
+        """Serialize the job for the status endpoint"""
+        job_dict = {
+            "jobId": self.id,
+            "status": self.status,
+            "submittedAt": datetime.fromtimestamp(self.submitted_at).isoformat(),
+            "startedAt": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "finishedAt": datetime.fromtimestamp(self.finished_at).isoformat() if self.finished_at else None
+        }
+        if self.outcome is not None:
+            job_dict["resultStatus"] = self.outcome.status
+            job_dict["result"] = self.outcome.body
+        return job_dict
+
+class JobQueue:
+    """Bounded in-process job queue drained into the schedule process pool.
+
+    Jobs live in this process's memory, so a job can only be polled from the web worker that
+    queued it. With more than one web worker (web_workers) the queue is disabled rather than
+    answering 404 for jobs another worker holds.
+    """
+
+    def __init__(self, max_pending: int, dispatchers: int, job_ttl: float, web_workers: int = 1):
+        self.max_pending = max_pending
+        self.dispatchers = dispatchers
+        self.job_ttl = job_ttl
+        self.set_web_workers(web_workers)
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=max_pending)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, payload: Dict) -> Job:
+        """Queue a payload and return its job without waiting for the schedule"""
+        self._check_enabled()
+        self._ensure_dispatchers()
+
+        job = Job(id=uuid.uuid4().hex, payload=payload)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise JobQueueFull(f"Job queue is full ({self.max_pending} pending)")
+
+        logger.info(f"Queued job {job.id} ({self._queue.qsize()} pending)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._check_enabled()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; a running one stops at its optimizer's next checkpoint"""
+        self._check_enabled()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished_at is not None:
+                return job
+            job.cancel_token.cancel("Job cancelled")
+            if job.status == "queued":
+                # The dispatcher drops it when it comes up
+                job.status = "cancelled"
+                job.outcome = cancelled_outcome("Job cancelled")
+                job.finished_at = time.time()
+                job.payload = None
+        logger.info(f"Cancelled job {job.id}")
+        return job
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def set_web_workers(self, web_workers: int) -> None:
+        """Record how many web workers serve the app; the job API is disabled unless there is one"""
+        self.enabled = web_workers == 1
+        self._disabled_reason = (f"The job API needs a single web worker; this server runs {web_workers} "
+                                 "(set WEB_CONCURRENCY=1 to use it)")
+
+    def _check_enabled(self) -> None:
+        if not self.enabled:
+            raise JobQueueUnavailable(self._disabled_reason)
+
+    def _ensure_dispatchers(self) -> None:
+        """Start dispatcher and pruner threads lazily so nothing runs before a gunicorn fork"""
+        with self._lock:
+            if self._threads:
+                return
+            targets = [(self._dispatch_loop, f"job-dispatcher-{i}") for i in range(self.dispatchers)]
+            for target, name in targets + [(self._prune_loop, "job-pruner")]:
+                thread = threading.Thread(target=target, name=name, daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.status == "cancelled":
+                    self._queue.task_done()
+                    continue
+                job.status = "running"
+                job.started_at = time.time()
+                payload, job.payload = job.payload, None
+
+            pool = get_process_pool()
+            try:
+                with job.cancel_token:
+                    job.outcome = wait_for_outcome(submit_schedule(pool, payload, job.cancel_token), job.cancel_token)
+            except CancelledError:
+                job.outcome = cancelled_outcome(job.cancel_token.reason)
+            except BrokenProcessPool as e:
+                reset_process_pool(pool)
+                job.outcome = ScheduleOutcome({"error": f"Worker process failed: {e}"}, 500)
+            except Exception as e:
+                logger.exception(f"Job {job.id} failed:")
+                job.outcome = ScheduleOutcome({"error": str(e)}, 500)
+
+            observe_outcome(job.outcome)
+            if job.outcome.status == CANCELLED_STATUS:
+                job.status = "cancelled"
+            else:
+                job.status = "completed" if job.outcome.status == 200 else "failed"
+            job.finished_at = time.time()
+            logger.info(f"Job {job.id} {job.status} in {job.finished_at - job.started_at:.2f}s")
+            self._queue.task_done()
+
+    def _prune_loop(self) -> None:
+        """Prune on a timer, so results don't outlive job_ttl by much when no new jobs come in"""
+        while True:
+            time.sleep(min(self.job_ttl, 60))
+            self._prune_finished()
+
+    def _prune_finished(self) -> None:
+        """Forget finished jobs once their results have been kept for job_ttl seconds"""
+        cutoff = time.time() - self.job_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+job_queue = JobQueue(
+    max_pending=int(os.environ.get("SCHEDULER_JOB_QUEUE_SIZE", 100)),
+    dispatchers=int(os.environ.get("SCHEDULER_POOL_WORKERS", os.cpu_count() or 1)),
+    job_ttl=float(os.environ.get("SCHEDULER_JOB_TTL", 600)),
+    # The worker count gunicorn.conf.py and uvicorn --workers both default to
+    web_workers=int(os.environ.get("WEB_CONCURRENCY", 1))
+)
+
+registry.register(Gauge("scheduler_job_queue_depth", "Jobs waiting for a worker",
+                        job_queue.pending))
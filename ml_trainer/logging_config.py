@@ -0,0 +1,103 @@
+from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+import itertools
+import logging
+import queue
+import os
+
+# Attributes every LogRecord has; anything else came in through `extra=` and is logged as a field
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+# Log args of these types can't change before the listener formats the record
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, bytes, type(None))
+
+_listener: Optional[QueueListener] = None
+
+class KeyValueFormatter(logging.Formatter):
+    """Format records as logfmt-style key=value pairs, including fields passed via `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = [
+            f"time={self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}",
+            f"level={record.levelname}",
+            f"logger={record.name}",
+            f"msg={self._quote(record.getMessage())}"
+        ]
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS:
+                fields.append(f"{key}={self._quote(str(value))}")
+        if record.exc_info:
+            fields.append(f"exc={self._quote(self.formatException(record.exc_info))}")
+        return " ".join(fields)
+
+    @staticmethod
+    def _quote(value: str) -> str:
+        if value and not any(ch in value for ch in ' "=\n'):
+            return value
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread.
+
+    The stock prepare() formats every record in the thread that logged it. Here a record's args
+    are merged into its message up front only when one of them is mutable (a dict or list the
+    caller may change before the listener gets to it); everything else is formatted by the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        # A dict here is the caller's own mapping (logger.info("%(k)s", mapping)), mutable itself
+        if args and (isinstance(args, dict) or not all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+class DebugSampleFilter(logging.Filter):
+    """Let through only one in every `sample_every` DEBUG records; other levels always pass"""
+
+    def __init__(self, sample_every: int):
+        super().__init__()
+        self.sample_every = max(1, sample_every)
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG:
+            return True
+        return next(self._counter) % self.sample_every == 0
+
+def configure_logging() -> None:
+    """Route all logging through a queue so request threads never block on formatting or I/O.
+
+    SCHEDULER_LOG_LEVEL sets the root level (default INFO) and SCHEDULER_LOG_DEBUG_SAMPLE
+    keeps one in N debug records when the level is DEBUG. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    level = os.environ.get("SCHEDULER_LOG_LEVEL", "INFO").upper()
+    sample_every = int(os.environ.get("SCHEDULER_LOG_DEBUG_SAMPLE", 1))
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(KeyValueFormatter())
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampleFilter(sample_every))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def _restart_after_fork() -> None:
+    """The listener thread does not survive fork (gunicorn preload, process pool workers)"""
+    global _listener
+    if _listener is not None:
+        _listener = None
+        configure_logging()
+
+os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,186 @@
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import threading
+import bisect
+import time
+
+from deadline import is_partial
+
+# Seconds; spans sub-millisecond passes up to the slowest double-major catalogs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Approach label values; anything else a request sends is counted as "other" so it can't add series
+APPROACH_LABELS = ("credits-based", "semesters-based")
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+class Gauge(_Metric):
+    """A value read from a callback at scrape time; type_name="counter" for monotonic sources"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float], type_name: str = "gauge"):
+        super().__init__(name, help_text)
+        self._read = read
+        self.type_name = type_name
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(self._read())}"]
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class PhaseTimer:
+    """Collects wall-clock durations of named scheduling phases for one run"""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self._started: Dict[str, float] = {}
+
+    def start(self, phase: str) -> None:
+        self._started[phase] = time.perf_counter()
+
+    def stop(self, phase: str) -> None:
+        started = self._started.pop(phase, None)
+        if started is not None:
+            self.durations[phase] = self.durations.get(phase, 0.0) + time.perf_counter() - started
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        self.start(phase)
+        try:
+            yield
+        finally:
+            self.stop(phase)
+
+registry = Registry()
+
+phase_duration = registry.register(Histogram(
+    "scheduler_phase_duration_seconds",
+    "Time spent in each schedule generation phase",
+    ("phase", "approach")
+))
+schedules_total = registry.register(Counter(
+    "scheduler_schedules_total",
+    "Schedule generation runs by approach and HTTP status",
+    ("approach", "status")
+))
+catalog_size = registry.register(Histogram(
+    "scheduler_catalog_classes",
+    "Number of classes in the catalogs that were scheduled",
+    ("approach",),
+    buckets=(10, 25, 50, 75, 100, 150, 200, 300, 500)
+))
+semester_count = registry.register(Histogram(
+    "scheduler_schedule_semesters",
+    "Number of semesters in generated schedules",
+    ("approach",),
+    buckets=(4, 6, 8, 10, 12, 14, 16, 20, 25)
+))
+
+def approach_label(approach) -> str:
+    if not approach:
+        return "unknown"
+    return approach if approach in APPROACH_LABELS else "other"
+
+def observe_phase(phase: str, seconds: float, approach: Optional[str] = None) -> None:
+    phase_duration.observe(seconds, phase=phase, approach=approach_label(approach))
+
+def observe_outcome(outcome) -> None:
+    """Record the timings and stats a ScheduleOutcome carries back from wherever it ran"""
+    approach = approach_label(outcome.stats.get("approach"))
+    schedules_total.inc(approach=approach, status=outcome.status)
+    for phase, seconds in outcome.timings.items():
+        observe_phase(phase, seconds, approach)
+    if "catalogSize" in outcome.stats:
+        catalog_size.observe(outcome.stats["catalogSize"], approach=approach)
+    if outcome.status == 200 and not is_partial(outcome.body) and "semesterCount" in outcome.stats:
+        semester_count.observe(outcome.stats["semesterCount"], approach=approach)
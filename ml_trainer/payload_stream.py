@@ -0,0 +1,128 @@
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+import itertools
+import hashlib
+import json
+import sys
+import os
+
+from request_payload import PayloadError
+from catalog_store import CatalogEntry, catalog_store
+from payload_validator import PayloadValidator
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; without it every body is parsed whole
+    ijson = None
+
+# Bodies at least this large are parsed incrementally; smaller ones parse faster whole
+STREAM_MIN_BYTES = int(os.environ.get("SCHEDULER_STREAM_MIN_BYTES", 256 * 1024))
+
+Event = Tuple[str, Any]
+
+def should_stream(body: bytes) -> bool:
+    """Whether body is a JSON object big enough to be worth parsing incrementally"""
+    return ijson is not None and len(body) >= STREAM_MIN_BYTES and body.lstrip()[:1] == b"{"
+
+def _build_value(events: Iterator[Event], event: str, value: Any) -> Any:
+    """Assemble one complete JSON value from basic_parse events, starting from its first one"""
+    if event == "start_map":
+        root = {}
+    elif event == "start_array":
+        root = []
+    else:
+        return value
+    stack = [root]
+    key = None
+    for event, value in events:
+        if event == "map_key":
+            # json.loads shares key strings across dicts; ijson makes a new one for every key
+            key = sys.intern(value)
+            continue
+        if event == "end_map" or event == "end_array":
+            stack.pop()
+            if not stack:
+                return root
+            continue
+        if event == "start_map":
+            value = {}
+        elif event == "start_array":
+            value = []
+        container = stack[-1]
+        if type(container) is list:
+            container.append(value)
+        else:
+            container[key] = value
+        if event == "start_map" or event == "start_array":
+            stack.append(value)
+    raise ijson.IncompleteJSONError("Incomplete JSON content")
+
+class CourseStream:
+    """Iterates courseData one course at a time, hashing each as payload_digest would hash the whole list"""
+
+    def __init__(self, events: Iterator[Event]):
+        self._events = events
+        self._hash = hashlib.sha256(b"[")
+        self._count = 0
+
+    def __iter__(self) -> Iterator[Dict]:
+        for event, value in self._events:
+            if event == "end_array":
+                return
+            course = _build_value(self._events, event, value)
+            if self._count:
+                self._hash.update(b",")
+            self._hash.update(json.dumps(course, sort_keys=True, separators=(",", ":"),
+                                         ensure_ascii=False).encode("utf-8"))
+            self._count += 1
+            yield course
+
+    def digest(self) -> str:
+        """payload_digest of the full courseData list; only valid once the stream is consumed"""
+        final = self._hash.copy()
+        final.update(b"]")
+        return final.hexdigest()
+
+def parse_streamed_payload(body: BinaryIO) -> Tuple[Dict, Optional[CatalogEntry]]:
+    """Parse a JSON object body, read from a file, without building its courseData tree; returns
+    (payload, catalog).
+
+    Courses are read one at a time and processed into a catalog as they arrive, so the request
+    holds the processed catalog but never the raw body or the parsed course tree. The courseData
+    key comes back as the catalog's catalogRef, which the schedule routes accept in its place; a
+    catalogRef sent by the client takes precedence, as it does unstreamed. catalog is
+    request-scoped (see CatalogStore.register_stream): the request resolves the ref through it.
+    """
+    events = ijson.basic_parse(body, use_float=True)
+    payload: Dict = {}
+    catalog = None
+    validator = PayloadValidator()
+    try:
+        next(events)  # start_map, checked by should_stream
+        for event, key in events:
+            if event == "end_map":
+                break
+            event, value = next(events)
+            if key != "courseData" or event != "start_array":
+                payload[key] = _build_value(events, event, value)
+                continue
+
+            first = next(events)
+            if first[0] == "end_array":
+                payload[key] = []  # Rejected downstream like any empty courseData
+                continue
+            courses = CourseStream(itertools.chain([first], events))
+            catalog, _ = catalog_store.register_stream(courses, courses.digest, validator)
+        for _ in events:
+            raise PayloadError("Malformed JSON: trailing data after the payload")
+    except ijson.JSONError as e:
+        raise PayloadError(f"Malformed JSON: {e}")
+
+    if not validator.valid:
+        # Report the preferences' problems with the catalog's, as an unstreamed payload would
+        validator.check_preferences(payload.get("preferences"))
+        report = validator.report()
+        raise PayloadError(report["error"], report=report)
+
+    if catalog is not None:
+        payload.setdefault("catalogRef", catalog.ref)
+    return payload, catalog
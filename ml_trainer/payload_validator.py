@@ -0,0 +1,137 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+import re
+import os
+
+REQUIRED_CLASS_FIELDS = ("class_name", "credits", "semesters_offered")
+# "Fall 2025": a semester type the optimizers know and a four-digit year
+START_SEMESTER_FORMAT = re.compile(r"(Fall|Winter|Spring) \d{4}")
+# Problems listed in one report; any beyond this are only counted
+MAX_REPORTED_ERRORS = int(os.environ.get("SCHEDULER_MAX_VALIDATION_ERRORS", 100))
+# Most alternative schedules one request may ask for
+MAX_ALTERNATIVES = int(os.environ.get("SCHEDULER_MAX_ALTERNATIVES", 5))
+TARGET_SEMESTERS_MESSAGE = "Missing targetSemesters parameter for semester-based scheduling"
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+class PayloadValidator:
+    """Collects every structural problem in a payload, so a client can fix them all in one round-trip.
+
+    Courses are checked one at a time as they are read, which also works while courseData is
+    being streamed. Prerequisites can only be resolved once every class id has been seen, so
+    report() checks them at the end and builds the 400 body.
+    """
+
+    def __init__(self):
+        self.errors: List[Dict] = []
+        self.error_count = 0
+        self._class_ids: Set[Any] = set()
+        # (path, class id, prerequisite id), resolved by report()
+        self._prerequisites: List[Tuple[str, Any, Any]] = []
+
+    @property
+    def valid(self) -> bool:
+        return self.error_count == 0
+
+    def add(self, path: str, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"path": path, "message": message})
+
+    def check_preferences(self, preferences: Any) -> None:
+        if not isinstance(preferences, dict) or not preferences:
+            self.add("preferences", "preferences is required")
+            return
+        start_semester = preferences.get("startSemester")
+        if start_semester is None:
+            self.add("preferences.startSemester", "startSemester is required")
+        elif not isinstance(start_semester, str) or not START_SEMESTER_FORMAT.fullmatch(start_semester):
+            self.add("preferences.startSemester",
+                     f'startSemester must be a semester and year such as "Fall 2025", got {start_semester!r}')
+
+        if preferences.get("approach") == "semesters-based" and not preferences.get("targetSemesters"):
+            self.add("preferences.targetSemesters", TARGET_SEMESTERS_MESSAGE)
+        time_budget = preferences.get("timeBudgetMs")
+        if time_budget is not None and (isinstance(time_budget, bool) or not isinstance(time_budget, (int, float))
+                                        or time_budget <= 0):
+            self.add("preferences.timeBudgetMs",
+                     f"timeBudgetMs must be a positive number of milliseconds, got {time_budget!r}")
+        priority_seed = preferences.get("prioritySeed")
+        if priority_seed is not None and not _is_int(priority_seed):
+            self.add("preferences.prioritySeed", f"prioritySeed must be an integer, got {priority_seed!r}")
+        alternatives = preferences.get("alternatives")
+        if alternatives is not None and (not _is_int(alternatives) or not 1 <= alternatives <= MAX_ALTERNATIVES):
+            self.add("preferences.alternatives",
+                     f"alternatives must be an integer between 1 and {MAX_ALTERNATIVES}, got {alternatives!r}")
+
+    def check_course(self, index: int, course: Any) -> None:
+        path = f"courseData[{index}]"
+        if not isinstance(course, dict):
+            self.add(path, "Course must be an object")
+            return
+        sections = course.get("sections", [])
+        if not isinstance(sections, list):
+            self.add(f"{path}.sections", "sections must be a list")
+            return
+        for section_index, section in enumerate(sections):
+            section_path = f"{path}.sections[{section_index}]"
+            if not isinstance(section, dict):
+                self.add(section_path, "Section must be an object")
+                continue
+            classes = section.get("classes", [])
+            if not isinstance(classes, list):
+                self.add(f"{section_path}.classes", "classes must be a list")
+                continue
+            for class_index, cls in enumerate(classes):
+                self._check_class(f"{section_path}.classes[{class_index}]", cls)
+
+    def _check_class(self, path: str, cls: Any) -> None:
+        if not isinstance(cls, dict):
+            self.add(path, "Class must be an object")
+            return
+        class_id = cls.get("id")
+        if not _is_int(class_id):
+            self.add(f"{path}.id", f"Class id must be an integer, got {class_id!r}")
+            label = "Class"
+        else:
+            self._class_ids.add(class_id)
+            label = f"Class {class_id}"
+
+        for field in REQUIRED_CLASS_FIELDS:
+            if field not in cls:
+                self.add(f"{path}.{field}", f"{label} is missing {field}")
+        credits = cls.get("credits", 0)
+        if isinstance(credits, bool) or not isinstance(credits, (int, float)) or credits < 0:
+            self.add(f"{path}.credits", f"{label} credits must be a non-negative number, got {credits!r}")
+        if not isinstance(cls.get("semesters_offered", []), list):
+            self.add(f"{path}.semesters_offered", f"{label} semesters_offered must be a list")
+        if not isinstance(cls.get("corequisites", []), list):
+            self.add(f"{path}.corequisites", f"{label} corequisites must be a list")
+
+        prerequisites = cls.get("prerequisites", [])
+        if not isinstance(prerequisites, list):
+            self.add(f"{path}.prerequisites", f"{label} prerequisites must be a list")
+            return
+        for prerequisite_index, prerequisite in enumerate(prerequisites):
+            self._prerequisites.append((f"{path}.prerequisites[{prerequisite_index}]", class_id, prerequisite))
+
+    def report(self) -> Optional[Dict]:
+        """The 400 body listing every problem found, or None if there were none; call after the last course"""
+        for path, class_id, prerequisite in self._prerequisites:
+            if not _is_int(prerequisite) or prerequisite not in self._class_ids:
+                self.add(path, f"Class {class_id} requires {prerequisite!r}, which is not a class in courseData")
+        self._prerequisites = []
+
+        if self.valid:
+            return None
+        first = self.errors[0]["message"]
+        more = self.error_count - 1
+        return {
+            "error": f"{first} (and {more} more problem{'s' if more != 1 else ''})" if more else first,
+            "errors": self.errors,
+            "metadata": {
+                "success": False,
+                "message": "Invalid payload",
+                "errorCount": self.error_count
+            }
+        }
@@ -0,0 +1,103 @@
+from typing import Iterator, Optional
+from collections import Counter
+from contextlib import contextmanager
+import itertools
+import threading
+import logging
+import types
+import sys
+import os
+
+logger = logging.getLogger(__name__)
+
+# Profile one in every N optimizer runs per process; 0 (the default) turns profiling off
+SAMPLE_EVERY = int(os.environ.get("SCHEDULER_PROFILE_SAMPLE_N", 0))
+INTERVAL_SECONDS = float(os.environ.get("SCHEDULER_PROFILE_INTERVAL_MS", 5)) / 1000
+# Collapsed stacks ("frame;frame;frame count") go to PROFILE_DIR/scheduler-<pid>.collapsed,
+# ready for flamegraph.pl or speedscope
+PROFILE_DIR = os.environ.get("SCHEDULER_PROFILE_DIR", "/tmp/scheduler-profiles")
+
+_run_counter = itertools.count()
+_stacks: Counter = Counter()
+_stacks_lock = threading.Lock()
+
+def _frame_label(frame: types.FrameType) -> str:
+    module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+    return f"{module}:{frame.f_code.co_name}"
+
+def _collapse(frame: Optional[types.FrameType], skip_outer: int) -> str:
+    """Render a stack root-first, dropping the frames that were already on it when profiling began"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels[skip_outer:])
+
+def _stack_depth(frame: Optional[types.FrameType]) -> int:
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+class StackSampler:
+    """Samples one thread's stack at a fixed interval from a daemon thread"""
+
+    def __init__(self, thread_id: int, skip_outer: int, interval: float):
+        self.thread_id = thread_id
+        self.skip_outer = skip_outer
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = _collapse(frame, self.skip_outer)
+            # Drop samples of the profiled thread entering or leaving the profiler itself
+            if ";profiler:" not in stack:
+                self.samples[stack] += 1
+
+def _flush() -> None:
+    """Rewrite this process's collapsed-stack file with everything aggregated so far"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"scheduler-{os.getpid()}.collapsed")
+    with _stacks_lock:
+        lines = [f"{stack} {count}\n" for stack, count in _stacks.most_common() if stack]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.writelines(lines)
+    os.replace(tmp_path, path)
+
+@contextmanager
+def maybe_profile(label: str) -> Iterator[None]:
+    """Profile the enclosed block for one in every SAMPLE_EVERY calls"""
+    if not SAMPLE_EVERY or next(_run_counter) % SAMPLE_EVERY:
+        yield
+        return
+
+    # sys._getframe(2) is the caller's frame (1 is contextmanager's __enter__)
+    sampler = StackSampler(threading.get_ident(), _stack_depth(sys._getframe(2)) - 1, INTERVAL_SECONDS)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        with _stacks_lock:
+            for stack, count in sampler.samples.items():
+                _stacks[f"{label};{stack}"] += count
+        try:
+            _flush()
+        except OSError as e:
+            logger.warning(f"Could not write profile: {e}")
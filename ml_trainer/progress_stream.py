@@ -0,0 +1,96 @@
+from typing import AsyncIterator, Callable, Dict, Iterator, Optional
+import threading
+import asyncio
+import logging
+import queue
+
+from cancellation import CancelToken, RunCancelled
+from metrics import observe_outcome
+from schedule_runner import ScheduleOutcome, run_processed_schedule
+from response_encoding import dumps
+
+logger = logging.getLogger(__name__)
+
+class StreamAbandoned(RunCancelled):
+    """Raised inside the optimizer once the client has stopped reading the stream"""
+
+def format_sse(event: str, data: Dict) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+class ProgressStream:
+    """Runs an optimizer in a background thread and yields its progress as Server-Sent Events"""
+
+    def __init__(self, processed_data: Dict, on_finish: Optional[Callable[[], None]] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.processed_data = processed_data
+        self._on_finish = on_finish
+        # With a loop, events are handed to it directly so async_events() waits without a thread
+        self._loop = loop
+        self._events = asyncio.Queue() if loop is not None else queue.Queue()
+        self._abandoned = threading.Event()
+        # Stops the optimizer at its next checkpoint, not only at the next progress event
+        self._cancel_token = CancelToken(self._abandoned.is_set)
+
+    def start(self) -> "ProgressStream":
+        thread = threading.Thread(target=self._run, name="schedule-progress", daemon=True)
+        thread.start()
+        return self
+
+    def _put(self, item: Optional[str]) -> None:
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._events.put_nowait, item)
+            except RuntimeError:  # The loop has shut down; nobody is listening anymore
+                self._abandoned.set()
+        else:
+            self._events.put(item)
+
+    def _on_progress(self, event: str, data: Dict) -> None:
+        if self._abandoned.is_set():
+            raise StreamAbandoned("Client closed the progress stream")
+        # Encode right away: later passes keep mutating the semester dicts
+        self._put(format_sse(event, data))
+
+    def _run(self) -> None:
+        try:
+            outcome = run_processed_schedule(self.processed_data, self._on_progress, self._cancel_token)
+        except Exception as e:
+            logger.exception("Error in streamed schedule generation:")
+            outcome = ScheduleOutcome({"error": str(e)}, 500)
+        finally:
+            if self._on_finish is not None:
+                self._on_finish()
+        observe_outcome(outcome)
+
+        if self._abandoned.is_set():
+            logger.info("Progress stream abandoned by client")
+        else:
+            event = "result" if outcome.status == 200 else "error"
+            self._put(format_sse(event, {**outcome.body, "status": outcome.status}))
+        self._put(None)
+
+    def events(self) -> Iterator[str]:
+        """Yield encoded events until the final schedule has been sent"""
+        try:
+            # Comment line so the client sees the stream open before the first semester is done
+            yield ": stream opened\n\n"
+            while True:
+                item = self._events.get()
+                if item is None:
+                    return
+                yield item
+        finally:
+            self._abandoned.set()
+
+    async def async_events(self) -> AsyncIterator[str]:
+        """events() for a stream started with a loop"""
+        try:
+            yield ": stream opened\n\n"
+            while True:
+                item = await self._events.get()
+                if item is None:
+                    return
+                yield item
+        finally:
+            self._abandoned.set()
@@ -0,0 +1,167 @@
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import replace
+from datetime import datetime
+import logging
+
+from cancellation import CancelToken
+from compiled_catalog import CompiledCatalog
+from data_processor import FIRST_YEAR_SEMESTERS
+from schedule_runner import ScheduleOutcome, prepare_schedule_data, run_processed_schedule
+
+logger = logging.getLogger(__name__)
+
+SEMESTER_TYPES = ("Winter", "Spring", "Fall")  # Order within a calendar year
+
+def semester_index(semester: str) -> int:
+    """Position of "Type YYYY" in the Winter -> Spring -> Fall sequence; raises ValueError if malformed"""
+    sem_type, year = semester.split()
+    if sem_type not in SEMESTER_TYPES:
+        raise ValueError(f"Unknown semester type {sem_type!r}")
+    return int(year) * len(SEMESTER_TYPES) + SEMESTER_TYPES.index(sem_type)
+
+def split_schedule(existing_schedule: List[Dict], cutoff: int) -> Tuple[List[Dict], Set[int]]:
+    """Semesters before the cutoff, kept as-is, and the ids of the courses they complete"""
+    fixed = [s for s in existing_schedule if semester_index(f"{s['type']} {s['year']}") < cutoff]
+    fixed.sort(key=lambda s: semester_index(f"{s['type']} {s['year']}"))
+    completed = {c["id"] for s in fixed for c in s.get("classes", []) if "id" in c}
+    return fixed, completed
+
+def remaining_courses(catalog: CompiledCatalog, completed: Set[int]) -> CompiledCatalog:
+    """Drop completed courses and treat them as satisfied prerequisites for the rest.
+
+    Only the courses that change are copied; the rest stay shared with the registered catalog.
+    """
+    # Credits already earned in each elective section count toward its requirement. As when the
+    # optimizer picks electives, a course's corequisites (labs) count with it.
+    earned: Dict[int, int] = {}
+    for class_id in completed:
+        course = catalog.course(class_id)
+        if not (course and course.is_elective_section):
+            continue
+        credits = course.credits
+        for coreq_id in course.corequisites:
+            coreq = catalog.course(coreq_id)
+            if coreq_id in completed and coreq and coreq.section_id != course.section_id:
+                credits += coreq.credits
+        earned[course.section_id] = earned.get(course.section_id, 0) + credits
+
+    remaining = []
+    for course in catalog.courses:
+        if course.id in completed:
+            continue
+        prerequisites = [p for p in course.prerequisites if p not in completed]
+        corequisites = [c for c in course.corequisites if c not in completed]
+        credits_needed = course.credits_needed
+        section_earned = earned.get(course.section_id, 0)
+        if course.is_elective and credits_needed and section_earned:
+            if section_earned >= credits_needed:
+                continue  # Elective section already satisfied
+            credits_needed -= section_earned
+
+        if (len(prerequisites) != len(course.prerequisites) or len(corequisites) != len(course.corequisites)
+                or credits_needed != course.credits_needed):
+            course = replace(course, prerequisites=prerequisites, corequisites=corequisites, credits_needed=credits_needed)
+        remaining.append(course)
+    return CompiledCatalog(remaining)
+
+def run_replan(payload: Dict,
+               runner: Optional[Callable[..., ScheduleOutcome]] = None,
+               cancel_token: Optional[CancelToken] = None) -> ScheduleOutcome:
+    """Reschedule everything from cutoffSemester on, keeping the earlier semesters of existingSchedule fixed"""
+    try:
+        existing_schedule = payload.get("existingSchedule") if isinstance(payload, dict) else None
+        cutoff_semester = payload.get("cutoffSemester") if isinstance(payload, dict) else None
+        if not isinstance(existing_schedule, list) or not cutoff_semester:
+            return ScheduleOutcome({
+                "error": "Re-planning needs existingSchedule and cutoffSemester",
+                "metadata": {"success": False}
+            }, 400)
+        try:
+            cutoff = semester_index(cutoff_semester)
+            fixed, completed = split_schedule(existing_schedule, cutoff)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return ScheduleOutcome({
+                "error": f"Invalid existingSchedule or cutoffSemester: {e}",
+                "metadata": {"success": False}
+            }, 400)
+
+        processed_data, error = prepare_schedule_data(payload)
+        if error:
+            return error
+
+        original_catalog = processed_data["catalog"]
+        params = dict(processed_data["parameters"])
+        elapsed = cutoff - semester_index(params["startSemester"])
+        processed_data = {
+            **processed_data,
+            "catalog": remaining_courses(original_catalog, completed),
+            "parameters": params
+        }
+        logger.info(f"Re-planning from {cutoff_semester}: {len(fixed)} fixed semesters, "
+                    f"{len(completed)} completed and {len(processed_data['catalog'])} remaining classes")
+
+        if not processed_data["catalog"]:
+            return ScheduleOutcome({
+                "metadata": {"success": True, "replan": _replan_metadata(cutoff_semester, fixed, completed, 0)},
+                "schedule": fixed,
+                "timestamp": str(datetime.now())
+            })
+
+        original_target = params.get("targetSemesters")
+        params["startSemester"] = cutoff_semester
+        params["alternatives"] = None  # Alternatives would each need the fixed semesters spliced back in
+        if params.get("targetSemesters"):
+            params["targetSemesters"] = max(1, params["targetSemesters"] - max(0, elapsed))
+        # Only the part of the first year still ahead of the cutoff gets first-year limits
+        params["firstYearSemesters"] = min(FIRST_YEAR_SEMESTERS, max(0, FIRST_YEAR_SEMESTERS - elapsed))
+
+        outcome = (runner or run_processed_schedule)(processed_data, cancel_token=cancel_token)
+        if outcome.status != 200:
+            return outcome
+
+        # Spreading toward targetSemesters can leave semesters empty, at the end or between filled
+        # ones, when little is left
+        new_semesters = [semester for semester in outcome.body["schedule"] if semester["classes"]]
+        _restore_requirements(new_semesters, original_catalog)
+        metadata = dict(outcome.body["metadata"])
+        metadata["replan"] = _replan_metadata(cutoff_semester, fixed, completed,
+                                              sum(len(semester["classes"]) for semester in new_semesters))
+        if "actualSemesters" in metadata:
+            metadata["actualSemesters"] = len(fixed) + len(new_semesters)
+            metadata["targetSemesters"] = original_target
+
+        outcome.body = {**outcome.body, "metadata": metadata, "schedule": fixed + new_semesters}
+        outcome.stats["semesterCount"] = len(outcome.body["schedule"])
+        return outcome
+
+    except Exception as e:
+        logger.exception("Error re-planning schedule:")
+        return ScheduleOutcome({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }, 500)
+
+def _restore_requirements(semesters: List[Dict], original_catalog: CompiledCatalog) -> None:
+    """Put back the prerequisites that were stripped because earlier semesters satisfied them"""
+    for semester in semesters:
+        for course in semester["classes"]:
+            original = original_catalog.course(course["id"])
+            if original is not None:
+                course["prerequisites"] = original.prerequisites
+                course["corequisites"] = original.corequisites
+                course["credits_needed"] = original.credits_needed
+
+def fixed_semester_count(body: Dict) -> int:
+    """How many leading semesters of a replan response are the client's own, kept as sent"""
+    return body.get("metadata", {}).get("replan", {}).get("fixedSemesters", 0)
+
+def _replan_metadata(cutoff_semester: str, fixed: List[Dict], completed: Set[int], rescheduled: int) -> Dict:
+    return {
+        "cutoffSemester": cutoff_semester,
+        "fixedSemesters": len(fixed),
+        "completedCourses": len(completed),
+        "rescheduledCourses": rescheduled
+    }
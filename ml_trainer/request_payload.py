@@ -0,0 +1,215 @@
+from typing import Any, Dict, Iterator, Optional, Tuple
+from flask import Request
+import socket
+import zlib
+import io
+import json
+import time
+import os
+
+try:
+    import orjson
+except ImportError:  # optional, see response_encoding
+    orjson = None
+
+# Largest JSON body accepted, measured after decompression
+MAX_PAYLOAD_BYTES = int(os.environ.get("SCHEDULER_MAX_PAYLOAD_BYTES", 10 * 1024 * 1024))
+READ_CHUNK_BYTES = 64 * 1024
+# Total time a client gets to send its body, so a trickling upload can't hold a thread forever
+READ_TIMEOUT_SECONDS = float(os.environ.get("SCHEDULER_BODY_READ_TIMEOUT", 30))
+
+# zlib window bits: 16+ expects a gzip header, a plain value expects a zlib (deflate) header
+_DECOMPRESS_WBITS = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "x-gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS
+}
+
+class PayloadError(Exception):
+    """A request body that was rejected while reading or parsing it, with the HTTP status to answer with.
+
+    report, when set, is the full response body (a validation report listing every problem).
+    """
+
+    def __init__(self, message: str, status: int = 400, report: Optional[Dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.report = report
+
+def _read_chunks(stream) -> Iterator[bytes]:
+    """Yield body chunks until EOF, giving up once READ_TIMEOUT_SECONDS have passed"""
+    deadline = time.monotonic() + READ_TIMEOUT_SECONDS
+    while True:
+        if time.monotonic() > deadline:
+            raise PayloadError("Timed out reading request body", 408)
+        try:
+            chunk = stream.read(READ_CHUNK_BYTES)
+        except socket.timeout:
+            raise PayloadError("Timed out reading request body", 408)
+        if not chunk:
+            return
+        yield chunk
+
+class BodyDecoder:
+    """Decodes a body chunk by chunk, inflating gzip/deflate as it goes and enforcing MAX_PAYLOAD_BYTES.
+
+    Shared by the WSGI reader below and the asyncio front end, which feeds it from the event loop.
+    feed()/finish() collect the whole body; decode()/flush() hand each piece back instead.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "identity":
+            self._decompressor = None
+        elif encoding in _DECOMPRESS_WBITS:
+            self._decompressor = zlib.decompressobj(_DECOMPRESS_WBITS[encoding])
+        else:
+            raise PayloadError(f"Unsupported Content-Encoding: {encoding}", 415)
+        self.size = 0
+        self._body = bytearray()
+
+    def _count(self, size: int) -> None:
+        self.size += size
+        if self.size > MAX_PAYLOAD_BYTES:
+            what = "Payload" if self._decompressor is None else "Decompressed payload"
+            raise PayloadError(f"{what} exceeds {MAX_PAYLOAD_BYTES} bytes", 413)
+
+    def decode(self, chunk: bytes) -> bytes:
+        """The decoded bytes of one chunk as received"""
+        if self._decompressor is None:
+            self._count(len(chunk))
+            return chunk
+
+        # Inflate with a bounded output size, stopping as soon as it passes the limit (zip bombs)
+        decoded = bytearray()
+        try:
+            while chunk:
+                part = self._decompressor.decompress(chunk, MAX_PAYLOAD_BYTES + 1 - self.size)
+                self._count(len(part))
+                decoded += part
+                chunk = self._decompressor.unconsumed_tail
+        except zlib.error as e:
+            raise PayloadError(f"Invalid {self.encoding} body: {e}")
+        return bytes(decoded)
+
+    def flush(self) -> bytes:
+        """Whatever the decompressor still holds once the last chunk is in"""
+        if self._decompressor is None:
+            return b""
+        try:
+            rest = self._decompressor.flush()
+        except zlib.error as e:
+            raise PayloadError(f"Invalid {self.encoding} body: {e}")
+        if not self._decompressor.eof:
+            raise PayloadError(f"Truncated {self.encoding} body")
+        self._count(len(rest))
+        return rest
+
+    def feed(self, chunk: bytes) -> None:
+        self._body += self.decode(chunk)
+
+    def finish(self) -> bytes:
+        self._body += self.flush()
+        return bytes(self._body)
+
+class BodyReader:
+    """Read-only file over a body that is still arriving: chunks are decoded as they are read and
+    not kept once handed out. head is the start of the body, already decoded."""
+
+    def __init__(self, head: bytes, chunks: Iterator[bytes], decoder: BodyDecoder):
+        self._buffer = memoryview(head)
+        self._chunks = chunks
+        self._decoder = decoder
+        self._done = False
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            return b"".join(iter(lambda: self.read(READ_CHUNK_BYTES), b""))
+        while not self._buffer and not self._done and size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._done = True
+                self._buffer = memoryview(self._decoder.flush())
+            else:
+                self._buffer = memoryview(self._decoder.decode(chunk))
+        data = bytes(self._buffer[:size])
+        self._buffer = self._buffer[size:]
+        return data
+
+def check_body_headers(is_json: bool, content_length: Optional[int]) -> None:
+    """Reject a body by its headers alone, before any of it is read"""
+    if not is_json:
+        raise PayloadError("Expected an application/json body", 415)
+
+    # Content-Length is the wire size, so this also rejects oversized compressed bodies unread
+    if content_length is not None and content_length > MAX_PAYLOAD_BYTES:
+        raise PayloadError(f"Payload exceeds {MAX_PAYLOAD_BYTES} bytes", 413)
+
+def parse_json_body(body: bytes, stream_catalog: bool = False) -> Tuple[Any, Any]:
+    """Parse a request body; returns (payload, catalog).
+
+    With stream_catalog, a large payload has its courseData streamed into the catalog store and
+    catalog is the CatalogEntry it was registered as; otherwise catalog is None.
+    """
+    if not body:
+        raise PayloadError("Empty request body")
+    if stream_catalog:
+        # Imported here because payload_stream (through the catalog store) imports this module
+        from payload_stream import parse_streamed_payload, should_stream
+        if should_stream(body):
+            return parse_streamed_payload(io.BytesIO(body))
+    try:
+        return (orjson.loads(body) if orjson is not None else json.loads(body)), None
+    except ValueError as e:
+        raise PayloadError(f"Malformed JSON: {e}")
+
+def parse_body_stream(chunks: Iterator[bytes], decoder: BodyDecoder, head: bytes = b"") -> Tuple[Any, Any]:
+    """Read and parse a body as it arrives, streaming a large payload's courseData into the catalog
+    store; returns (payload, catalog) as parse_json_body does.
+
+    The first STREAM_MIN_BYTES are decoded (head is any part already decoded by the caller). A
+    body that ends before then is parsed whole; a larger one is handed to the streaming parser
+    chunk by chunk, so the raw body is never held in full.
+    """
+    # Imported here because payload_stream (through the catalog store) imports this module
+    from payload_stream import STREAM_MIN_BYTES, parse_streamed_payload, should_stream
+    body = bytearray(head)
+    for chunk in chunks:
+        body += decoder.decode(chunk)
+        if len(body) >= STREAM_MIN_BYTES:
+            break
+    else:
+        body += decoder.flush()
+        return parse_json_body(bytes(body))
+
+    if should_stream(body):
+        return parse_streamed_payload(BodyReader(bytes(body), chunks, decoder))
+    for chunk in chunks:
+        body += decoder.decode(chunk)
+    body += decoder.flush()
+    return parse_json_body(bytes(body))
+
+def read_json_payload(request: Request, stream_catalog: bool = False) -> Tuple[Any, Any]:
+    """Read, decompress and parse a JSON request body, enforcing MAX_PAYLOAD_BYTES throughout.
+
+    Returns (payload, catalog) as parse_json_body does; with stream_catalog the body is parsed by
+    parse_body_stream as it is read.
+    """
+    check_body_headers(request.is_json, request.content_length)
+
+    # Bound each blocking recv too; the deadline check alone only runs between chunks
+    # only while the body is read; the probe and response writes keep the server's own timeout
+    client_socket = request.environ.get("gunicorn.socket")
+    if client_socket is not None:
+        previous_timeout = client_socket.gettimeout()
+        client_socket.settimeout(READ_TIMEOUT_SECONDS)
+    try:
+        decoder = BodyDecoder(request.headers.get("Content-Encoding", "identity").strip().lower())
+        if stream_catalog:
+            return parse_body_stream(_read_chunks(request.stream), decoder)
+        for chunk in _read_chunks(request.stream):
+            decoder.feed(chunk)
+        return parse_json_body(decoder.finish())
+    finally:
+        if client_socket is not None:
+            client_socket.settimeout(previous_timeout)
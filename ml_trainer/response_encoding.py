@@ -0,0 +1,124 @@
+from typing import Any, Dict, List, Optional, Tuple
+from flask import Request, Response
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import parse_accept_header
+import zlib
+import gzip
+import json
+import os
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder produces the same JSON, just slower
+    orjson = None
+
+# Responses smaller than this are not worth the compression CPU
+COMPRESS_MIN_BYTES = int(os.environ.get("SCHEDULER_COMPRESS_MIN_BYTES", 1024))
+COMPRESS_LEVEL = int(os.environ.get("SCHEDULER_COMPRESS_LEVEL", 5))
+
+def dumps(obj: Any) -> bytes:
+    """Encode compact, key-sorted JSON (as jsonify does) with orjson when installed, otherwise with json"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson; install only when orjson is available"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+
+class CourseFragmentCache:
+    """Encoded JSON for course dicts, built once per catalog and reused by every response.
+
+    Only course_type can differ between two dicts of the same course (system corequisites take
+    the type of the course that pulls them in), so it is part of the key.
+    """
+
+    def __init__(self):
+        self._fragments: Dict[Tuple[Any, Any], bytes] = {}
+
+    def encode(self, course: Dict) -> bytes:
+        key = (course.get("id"), course.get("course_type"))
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = dumps(course)
+            self._fragments[key] = fragment
+        return fragment
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+def _encode_object(obj: Dict, encoded_values: Dict[str, bytes]) -> bytes:
+    """Encode a dict, splicing in already-encoded JSON for the keys in encoded_values"""
+    parts = []
+    for key, value in sorted(obj.items()):
+        encoded = encoded_values.get(key)
+        parts.append(dumps(key) + b":" + (encoded if encoded is not None else dumps(value)))
+    return b"{" + b",".join(parts) + b"}"
+
+def _encode_semester(semester: Dict, fragments: CourseFragmentCache) -> bytes:
+    classes = b"[" + b",".join(fragments.encode(course) for course in semester.get("classes", [])) + b"]"
+    return _encode_object(semester, {"classes": classes})
+
+def encode_schedule_body(body: Dict, fragments: Optional[CourseFragmentCache] = None,
+                         client_semesters: int = 0) -> bytes:
+    """Encode a schedule response by concatenating pre-encoded course fragments.
+
+    The first client_semesters semesters came from the request (a replan's fixed semesters), so
+    their courses are encoded as sent, apart from fragments, which holds only catalog courses.
+    """
+    fragments = fragments if fragments is not None else CourseFragmentCache()
+    if isinstance(body.get("approaches"), dict):
+        # A comparison: one schedule per approach
+        approaches = _encode_object(body["approaches"], {
+            approach: encode_schedule_body(result, fragments) for approach, result in body["approaches"].items()
+        })
+        return _encode_object(body, {"approaches": approaches})
+    if isinstance(body.get("variants"), list):
+        # A sweep: rows carry a schedule only when includeSchedules was set
+        variants = b"[" + b",".join(encode_schedule_body(row, fragments) for row in body["variants"]) + b"]"
+        return _encode_object(body, {"variants": variants})
+    if "schedule" not in body:
+        return dumps(body)
+    semesters: List[Dict] = body["schedule"]
+    client_fragments = CourseFragmentCache()
+    schedule = b"[" + b",".join(_encode_semester(semester, client_fragments if i < client_semesters else fragments)
+                                for i, semester in enumerate(semesters)) + b"]"
+    encoded = {"schedule": schedule}
+    if isinstance(body.get("alternatives"), list):
+        encoded["alternatives"] = b"[" + b",".join(encode_schedule_body(alternative, fragments)
+                                                   for alternative in body["alternatives"]) + b"]"
+    return _encode_object(body, encoded)
+
+def best_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """gzip or deflate, whichever the Accept-Encoding header prefers, or None"""
+    return parse_accept_header(accept_encoding).best_match(["gzip", "deflate"])
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+    return zlib.compress(data, COMPRESS_LEVEL)
+
+def compress_response(request: Request, response: Response) -> Response:
+    """gzip or deflate a buffered response when the client's Accept-Encoding allows it"""
+    if (response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or not 200 <= response.status_code < 300):
+        return response
+
+    encoding = request.accept_encodings.best_match(["gzip", "deflate"])
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.set_data(compress_bytes(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,201 @@
+from typing import Any, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import socketserver
+import threading
+import logging
+import socket
+import struct
+import json
+import os
+
+from admission import AdmissionRejected
+from logging_config import configure_logging
+from request_payload import MAX_PAYLOAD_BYTES
+from response_encoding import dumps, encode_schedule_body
+from schedule_service import fragments_for, serve_schedule
+
+try:
+    import msgpack
+except ImportError:  # clients fall back to the JSON codec
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Frame: 1 codec byte (b"m" MessagePack, b"j" JSON), 4-byte big-endian body length, body.
+# Responses use the codec of the request they answer.
+FRAME_HEADER = struct.Struct(">cI")
+CODEC_MSGPACK = b"m"
+CODEC_JSON = b"j"
+
+class FrameError(Exception):
+    """The peer sent something that is not a valid frame; the connection is closed after replying"""
+
+def decode_body(codec: bytes, body: bytes) -> Any:
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise FrameError("MessagePack is not installed on the server, use the JSON codec")
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+    if codec == CODEC_JSON:
+        return json.loads(body)
+    raise FrameError(f"Unknown codec {codec!r}")
+
+def encode_frame(codec: bytes, message: Dict, fragments=None) -> bytes:
+    if codec == CODEC_MSGPACK and msgpack is not None:
+        body = msgpack.packb(message, use_bin_type=True)
+    elif "body" in message:
+        # Splice the schedule in from pre-encoded course fragments, as /generate-schedule does
+        rest = dumps({key: value for key, value in message.items() if key != "body"})
+        body = b'{"body":' + encode_schedule_body(message["body"], fragments) + (b"," + rest[1:] if len(rest) > 2 else b"}")
+        codec = CODEC_JSON
+    else:
+        body = dumps(message)
+        codec = CODEC_JSON
+    return FRAME_HEADER.pack(codec, len(body)) + body
+
+def _read_exactly(stream, size: int) -> Optional[bytes]:
+    data = stream.read(size)
+    if not data:
+        return None
+    if len(data) < size:
+        raise FrameError("Connection closed mid-frame")
+    return data
+
+def read_frame(stream) -> Optional[Tuple[bytes, Any]]:
+    """Read one frame; returns (codec, message) or None at a clean end of stream"""
+    header = _read_exactly(stream, FRAME_HEADER.size)
+    if header is None:
+        return None
+    codec, length = FRAME_HEADER.unpack(header)
+    if length > MAX_PAYLOAD_BYTES:
+        raise FrameError(f"Frame exceeds {MAX_PAYLOAD_BYTES} bytes")
+    body = _read_exactly(stream, length) if length else b""
+    if body is None:
+        raise FrameError("Connection closed mid-frame")
+    try:
+        return codec, decode_body(codec, body)
+    except (ValueError, TypeError) as e:
+        raise FrameError(f"Malformed frame body: {e}")
+
+def handle_message(message: Any) -> Tuple[Dict, Any]:
+    """Run one RPC request; returns the response message and the fragment cache for its schedule"""
+    if not isinstance(message, dict):
+        return {"id": None, "status": 400, "body": {"error": "Expected a request object"}}, None
+
+    request_id = message.get("id")
+    op = message.get("op")
+    if op == "ping":
+        return {"id": request_id, "status": 200, "body": {"status": "healthy"}}, None
+    if op != "generate-schedule":
+        return {"id": request_id, "status": 400, "body": {"error": f"Unknown op {op!r}"}}, None
+
+    payload = message.get("payload")
+    try:
+        served = serve_schedule(payload)
+    except AdmissionRejected as e:
+        logger.warning(str(e))
+        return {"id": request_id, "status": 503, "retryAfter": e.retry_after,
+                "body": {"error": str(e), "metadata": {"success": False}}}, None
+    except Exception as e:
+        logger.exception("Error generating schedule over RPC:")
+        return {"id": request_id, "status": 500, "body": {"error": str(e), "metadata": {"success": False}}}, None
+    return {"id": request_id, "status": served.status, "cache": served.cache, "body": served.body}, fragments_for(payload)
+
+class RPCHandler(socketserver.StreamRequestHandler):
+    """One persistent client connection; requests run concurrently and answer out of order by id"""
+
+    def handle(self) -> None:
+        write_lock = threading.Lock()
+
+        def respond(codec: bytes, message: Any) -> None:
+            response, fragments = handle_message(message)
+            frame = encode_frame(codec, response, fragments)
+            with write_lock:
+                try:
+                    self.wfile.write(frame)
+                    self.wfile.flush()
+                except OSError:
+                    logger.info("RPC client went away before its response was sent")
+
+        while True:
+            try:
+                frame = read_frame(self.rfile)
+            except FrameError as e:
+                logger.warning(f"Closing RPC connection: {e}")
+                with write_lock:
+                    try:
+                        self.wfile.write(encode_frame(CODEC_JSON, {"id": None, "status": 400, "body": {"error": str(e)}}))
+                    except OSError:
+                        pass
+                return
+            except OSError:
+                return
+            if frame is None:
+                return
+            self.server.executor.submit(respond, *frame)
+
+class _ServerMixin:
+    daemon_threads = True
+    executor: ThreadPoolExecutor
+
+class ThreadingTCPRPCServer(_ServerMixin, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+    def server_bind(self) -> None:
+        # Every gunicorn worker listens on the same port; the kernel spreads connections
+        if hasattr(socket, "SO_REUSEPORT"):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().server_bind()
+
+class ThreadingUnixRPCServer(_ServerMixin, socketserver.ThreadingUnixStreamServer):
+    pass
+
+def _remove_stale_socket(path: str) -> None:
+    """Unlink a Unix socket left behind by a dead process, but never one that is still being served"""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+    else:
+        raise OSError(f"RPC socket {path} is already being served")
+    finally:
+        probe.close()
+
+def bind_unix_socket(path: str) -> socket.socket:
+    """Listen on a Unix socket path. Bind it once and hand the socket to every process serving it:
+    a second bind would replace the first process's socket file and strand its listener."""
+    _remove_stale_socket(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(ThreadingUnixRPCServer.request_queue_size)
+    return listener
+
+def start_rpc_server(address: str, threads: int = 8, listener: Optional[socket.socket] = None):
+    """Serve RPC on "unix:/path/to.sock" or "host:port" from a daemon thread; returns the server.
+
+    A Unix address is served from listener when given (see bind_unix_socket) and bound here otherwise.
+    """
+    if address.startswith("unix:"):
+        if listener is None:
+            listener = bind_unix_socket(address[len("unix:"):])
+        server = ThreadingUnixRPCServer(listener.getsockname(), RPCHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = listener
+    else:
+        host, _, port = address.rpartition(":")
+        server = ThreadingTCPRPCServer((host or "0.0.0.0", int(port)), RPCHandler)
+    server.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="rpc")
+
+    thread = threading.Thread(target=server.serve_forever, name="rpc-server", daemon=True)
+    thread.start()
+    logger.info(f"RPC server listening on {address} (codecs: {'msgpack, json' if msgpack else 'json'})")
+    return server
+
+if __name__ == "__main__":
+    configure_logging()
+    start_rpc_server(os.environ.get("SCHEDULER_RPC_BIND", "0.0.0.0:5050"),
+                     int(os.environ.get("GUNICORN_THREADS", 8)))
+    threading.Event().wait()
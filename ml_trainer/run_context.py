@@ -0,0 +1,41 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+from contextvars import ContextVar
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import random
+
+from metrics import PhaseTimer
+from deadline import Deadline
+from cancellation import CancelToken
+
+@dataclass
+class RunContext:
+    """Everything one create_schedule call changes while it runs; the engine and its courses stay untouched"""
+    progress_callback: Optional[Callable[[str, Dict], None]] = None
+    cancel_token: CancelToken = field(default_factory=CancelToken)
+    phase_timer: PhaseTimer = field(default_factory=PhaseTimer)
+    deadline: Deadline = field(default_factory=Deadline)
+    rng: Optional[random.Random] = None
+    catalog: Any = None  # CompiledCatalog
+    all_courses: List[Any] = field(default_factory=list)
+    satisfied_sections: Set[int] = field(default_factory=set)
+    # Corequisite id -> this run's copy of it, retyped after the course that pulled it in
+    retyped: Dict[int, Any] = field(default_factory=dict)
+
+# Bound for the duration of a run, so each thread (or task) sees its own run on a shared engine
+_current_run: ContextVar[Optional[RunContext]] = ContextVar("current_run", default=None)
+
+def current_run() -> RunContext:
+    run = _current_run.get()
+    if run is None:
+        raise RuntimeError("No schedule run is active; call create_schedule")
+    return run
+
+@contextmanager
+def bind_run(run: RunContext) -> Iterator[RunContext]:
+    """Make run the current one until the block exits"""
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
@@ -4,8 +4,9 @@ from typing import Dict, List
 from constraint_optimizer import ScheduleOptimizer, Course  # Add Course here
 from semester_based_optimizer import SemesterBasedOptimizer
 from data_processor import ScheduleDataProcessor
+from logging_config import configure_logging
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 def build_prereq_tree(courses: List[Course]) -> Dict:
@@ -209,7 +210,7 @@ def run_scheduler(input_path: str, output_path: str = None):
         # Show prerequisite tree
         print("\nPrerequisite Tree:")
         print("=" * 80)
-        all_courses = optimizer._convert_to_courses(processed_data["classes"])
+        all_courses = list(processed_data["catalog"].courses)
         prereq_tree = build_prereq_tree(all_courses)
         print_prereq_tree(prereq_tree)
     
@@ -0,0 +1,62 @@
+from typing import Dict, List, Optional, Tuple
+import statistics
+
+def _filled_semesters(schedule: List[Dict]) -> List[Dict]:
+    return [semester for semester in schedule if semester.get("classes")]
+
+def schedule_signature(schedule: List[Dict]) -> Tuple:
+    """Which courses land in which semester; schedules with equal signatures are the same plan"""
+    return tuple(
+        (semester["type"], semester["year"], tuple(sorted(course["id"] for course in semester["classes"])))
+        for semester in _filled_semesters(schedule)
+    )
+
+def semester_count(schedule: List[Dict]) -> int:
+    return len(_filled_semesters(schedule))
+
+def _semester_credits(schedule: List[Dict]) -> List[int]:
+    return [sum(course.get("credits", 0) for course in semester["classes"])
+            for semester in _filled_semesters(schedule)]
+
+def credit_spread(schedule: List[Dict]) -> float:
+    """Standard deviation of credits across the semesters that have classes; 0 is perfectly even"""
+    credits = _semester_credits(schedule)
+    return statistics.pstdev(credits) if len(credits) > 1 else 0.0
+
+def max_load(schedule: List[Dict]) -> int:
+    """Credits in the heaviest semester"""
+    return max(_semester_credits(schedule), default=0)
+
+def last_semester(schedule: List[Dict]) -> Optional[str]:
+    """The semester the plan finishes in, like Fall 2028"""
+    filled = _filled_semesters(schedule)
+    return f"{filled[-1]['type']} {filled[-1]['year']}" if filled else None
+
+def religion_spread(schedule: List[Dict]) -> Dict[str, int]:
+    """Religion classes in total, semesters that have one, most in one semester, longest run of semesters without"""
+    counts = [sum(1 for course in semester["classes"] if course.get("course_type") == "religion")
+              for semester in _filled_semesters(schedule)]
+    longest_gap = gap = 0
+    for count in counts:
+        gap = 0 if count else gap + 1
+        longest_gap = max(longest_gap, gap)
+    return {
+        "courses": sum(counts),
+        "semesters": sum(1 for count in counts if count),
+        "maxPerSemester": max(counts, default=0),
+        "longestGap": longest_gap
+    }
+
+def schedule_summary(schedule: List[Dict]) -> Dict:
+    """Figures for comparing plans side by side"""
+    return {
+        "semesterCount": semester_count(schedule),
+        "lastSemester": last_semester(schedule),
+        "maxLoad": max_load(schedule),
+        "creditSpread": credit_spread(schedule),
+        "religionSpread": religion_spread(schedule)
+    }
+
+def rank_key(schedule: List[Dict]) -> Tuple[int, float]:
+    """Fewer semesters first, then the more evenly loaded plan"""
+    return semester_count(schedule), round(credit_spread(schedule), 6)
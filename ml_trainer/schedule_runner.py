@@ -0,0 +1,344 @@
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import multiprocessing
+import contextlib
+import threading
+import logging
+import time
+import os
+
+from admission import AdmissionRejected
+from cancellation import (CANCELLED_STATUS, PROBE_INTERVAL_SECONDS, CancelToken, RunCancelled,
+                          attach_worker_flags, shared_flags)
+from data_processor import ScheduleDataProcessor
+from catalog_store import CatalogEntry, catalog_store
+from metrics import PhaseTimer, observe_outcome
+from profiler import maybe_profile
+from schedule_ranking import credit_spread, rank_key, schedule_signature, semester_count
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ScheduleOutcome:
+    """Result of a single schedule run; picklable so it can come back from a worker process"""
+    body: Dict
+    status: int = 200
+    # Phase name -> seconds, and run stats (approach, catalog size, semester count) for /metrics
+    timings: Dict[str, float] = field(default_factory=dict)
+    stats: Dict = field(default_factory=dict)
+
+# Perturbed runs evaluated per alternative asked for; many of them land on the same plan
+ALTERNATIVE_CANDIDATES = int(os.environ.get("SCHEDULER_ALTERNATIVE_CANDIDATES", 3))
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            workers = int(os.environ.get("SCHEDULER_POOL_WORKERS", os.cpu_count() or 1))
+            logger.info(f"Starting schedule process pool with {workers} workers")
+            _process_pool = ProcessPoolExecutor(max_workers=workers, initializer=attach_worker_flags,
+                                                initargs=(shared_flags(),))
+        return _process_pool
+
+def reset_process_pool(broken_pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next call to get_process_pool starts a fresh one"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is broken_pool:
+            _process_pool = None
+    broken_pool.shutdown(wait=False)
+
+_optimizers: Dict[str, object] = {}
+
+def get_optimizer(approach: str):
+    """The shared optimizer for a scheduling approach; imported on first use to keep startup fast.
+
+    Optimizers keep per-run state in a RunContext, so one instance serves every thread.
+    """
+    key = "semesters-based" if approach == "semesters-based" else "credits-based"
+    optimizer = _optimizers.get(key)
+    if optimizer is None:
+        if key == "semesters-based":
+            from semester_based_optimizer import SemesterBasedOptimizer
+            optimizer = SemesterBasedOptimizer()
+        else:
+            from constraint_optimizer import ScheduleOptimizer
+            optimizer = ScheduleOptimizer()
+        # A racing thread may build a second one; setdefault keeps whichever landed first
+        optimizer = _optimizers.setdefault(key, optimizer)
+    return optimizer
+
+def prepare_schedule_data(payload: Dict, catalog: Optional[CatalogEntry] = None) -> Tuple[Optional[Dict], Optional[ScheduleOutcome]]:
+    """Process a raw or catalogRef payload; returns (processed_data, None) or (None, error outcome).
+
+    catalog is an entry the caller already holds (one its body was streamed into), used for a
+    catalogRef naming it instead of looking it up again.
+    """
+    processor = ScheduleDataProcessor()
+    started = time.perf_counter()
+    
+    if isinstance(payload, dict) and payload.get("catalogRef"):
+        entry = catalog_store.resolve(payload["catalogRef"], catalog)
+        if entry is None:
+            logger.warning(f"Unknown catalogRef {payload['catalogRef']}")
+            return None, ScheduleOutcome({
+                "error": "Unknown catalogRef, register the catalog again",
+                "metadata": {"success": False}
+            }, 404)
+        processed_data = processor.process_catalog_payload(entry.compiled, payload.get("preferences"))
+    else:
+        processed_data = processor.process_payload(payload)
+
+    # Check if processing was successful
+    if "error" in processed_data:
+        logger.error(f"Data processing failed: {processed_data['error']}")
+        return None, ScheduleOutcome(processed_data, 400)
+
+    logger.info("Processed data complete with %d courses", len(processed_data['catalog']))
+    processed_data["metadata"]["processing_seconds"] = time.perf_counter() - started
+    return processed_data, None
+
+def run_schedule(payload: Dict,
+                 runner: Optional[Callable[..., ScheduleOutcome]] = None,
+                 cancel_token: Optional[CancelToken] = None,
+                 admit: Optional[Callable[[], ContextManager]] = None,
+                 catalog: Optional[CatalogEntry] = None) -> ScheduleOutcome:
+    """Process a payload and generate its schedule (the body of /generate-schedule).
+
+    runner takes the processed data and runs the optimizer; it defaults to the calling thread.
+    admit, when given, is entered around the optimizer run only, so an invalid payload is
+    answered without waiting for a slot. AdmissionRejected from it propagates. catalog is
+    passed on to prepare_schedule_data.
+    """
+    try:
+        processed_data, error = prepare_schedule_data(payload, catalog)
+        if error:
+            return error
+        with admit() if admit is not None else contextlib.nullcontext():
+            return (runner or run_processed_schedule)(processed_data, cancel_token=cancel_token)
+
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.exception("Error generating schedule:")
+        return ScheduleOutcome({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }, 500)
+
+def cancelled_outcome(reason: str) -> ScheduleOutcome:
+    return ScheduleOutcome({"error": reason, "metadata": {"success": False, "cancelled": True}}, CANCELLED_STATUS)
+
+def run_processed_schedule(processed_data: Dict,
+                           progress_callback: Optional[Callable[[str, Dict], None]] = None,
+                           cancel_token: Optional[CancelToken] = None) -> ScheduleOutcome:
+    """Run the optimizer selected by the processed parameters"""
+    alternatives = processed_data["parameters"].get("alternatives") or 1
+    if alternatives > 1 and progress_callback is None:
+        return run_alternatives(processed_data, alternatives, cancel_token)
+
+    approach = processed_data["parameters"].get("approach", "credits-based")
+    logger.info(f"Using scheduling approach: {approach}")
+
+    optimizer = get_optimizer(approach)
+    logger.info(f"Using {type(optimizer).__name__}")
+
+    phase_timer = PhaseTimer()
+    try:
+        with maybe_profile(type(optimizer).__name__):
+            schedule_result = optimizer.create_schedule(processed_data, progress_callback, cancel_token, phase_timer)
+    except RunCancelled as e:
+        logger.info(f"Schedule run stopped: {e}")
+        outcome = cancelled_outcome(str(e))
+        outcome.timings = dict(phase_timer.durations)
+        outcome.stats = {"approach": approach, "catalogSize": len(processed_data["catalog"])}
+        return outcome
+
+    logger.info("Schedule generation complete with %d semesters", len(schedule_result.get('schedule', [])))
+    logger.debug("Schedule metadata: %s", schedule_result.get('metadata', {}))
+
+    timings = dict(phase_timer.durations)
+    if "processing_seconds" in processed_data.get("metadata", {}):
+        timings["payload_processing"] = processed_data["metadata"]["processing_seconds"]
+    stats = {
+        "approach": approach,
+        "catalogSize": len(processed_data["catalog"]),
+        "semesterCount": len(schedule_result.get('schedule', []))
+    }
+
+    # Check if schedule generation was successful
+    if "error" in schedule_result:
+        logger.error(f"Schedule generation failed: {schedule_result['error']}")
+        return ScheduleOutcome(schedule_result, 500, timings, stats)
+
+    # A truncated run that left courses unplaced is still a complete reply; its metadata says it's partial
+    return ScheduleOutcome({
+        "metadata": schedule_result.get('metadata', {}),
+        "schedule": schedule_result.get('schedule', []),
+        "timestamp": str(datetime.now())
+    }, 200, timings, stats)
+
+def _alternative_data(processed_data: Dict, seed: Optional[int]) -> Dict:
+    return {**processed_data, "parameters": {**processed_data["parameters"], "prioritySeed": seed, "alternatives": None}}
+
+def wait_for_outcome(future: Future, cancel_token: Optional[CancelToken] = None) -> ScheduleOutcome:
+    """future.result(), polling the token meanwhile; a worker sees the cancellation at its next checkpoint"""
+    if cancel_token is None:
+        return future.result()
+    while True:
+        try:
+            return future.result(timeout=PROBE_INTERVAL_SECONDS)
+        except FutureTimeout:
+            if cancel_token.poll():
+                future.cancel()  # Still queued: it never starts
+
+def run_candidates(candidates: List[Dict], cancel_token: Optional[CancelToken] = None) -> List[ScheduleOutcome]:
+    """Evaluate candidate runs across the process pool, or in turn when already inside a pool worker"""
+    if multiprocessing.parent_process() is not None:
+        return [run_processed_schedule(candidate, cancel_token=cancel_token) for candidate in candidates]
+
+    pool = get_process_pool()
+    try:
+        if cancel_token is not None:
+            cancel_token.claim_slot()
+        futures = [pool.submit(run_processed_schedule, candidate, None, cancel_token) for candidate in candidates]
+    except BrokenProcessPool:
+        reset_process_pool(pool)
+        raise
+
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(wait_for_outcome(future, cancel_token))
+        except CancelledError:
+            outcomes.append(cancelled_outcome(cancel_token.reason))
+        except BrokenProcessPool as e:
+            reset_process_pool(pool)
+            outcomes.append(ScheduleOutcome({"error": f"Worker process failed: {e}"}, 500))
+    return outcomes
+
+def run_alternatives(processed_data: Dict, count: int, cancel_token: Optional[CancelToken] = None) -> ScheduleOutcome:
+    """Run perturbed variants of one request and return its best distinct schedules.
+
+    The best is the response's schedule; the runners-up are listed under "alternatives".
+    """
+    base_seed = processed_data["parameters"].get("prioritySeed")
+    # The unperturbed (or requested) seed goes first so it wins ties
+    seeds = [base_seed] + [(base_seed or 0) + offset for offset in range(1, count * ALTERNATIVE_CANDIDATES)]
+    logger.info(f"Evaluating {len(seeds)} candidates for {count} alternative schedules")
+    outcomes = run_candidates([_alternative_data(processed_data, seed) for seed in seeds], cancel_token)
+    if cancel_token is not None and cancel_token.poll():
+        return cancelled_outcome(cancel_token.reason)
+
+    succeeded = [(seed, outcome) for seed, outcome in zip(seeds, outcomes) if outcome.status == 200]
+    if not succeeded:
+        return outcomes[0]
+
+    distinct = {}
+    for seed, outcome in succeeded:
+        distinct.setdefault(schedule_signature(outcome.body["schedule"]), (seed, outcome))
+    ranked = sorted(distinct.values(), key=lambda item: rank_key(item[1].body["schedule"]))[:count]
+    logger.info(f"{len(distinct)} distinct schedules from {len(seeds)} candidates, returning {len(ranked)}")
+
+    best_seed, best = ranked[0]
+    metadata = {**best.body["metadata"], "alternatives": {
+        "requested": count,
+        "candidates": len(seeds),
+        "distinct": len(distinct),
+        "returned": len(ranked),
+        "prioritySeed": best_seed,
+        "semesterCount": semester_count(best.body["schedule"]),
+        "creditSpread": credit_spread(best.body["schedule"])
+    }}
+    alternatives = [{
+        "rank": rank,
+        "prioritySeed": seed,
+        "semesterCount": semester_count(outcome.body["schedule"]),
+        "creditSpread": credit_spread(outcome.body["schedule"]),
+        "metadata": outcome.body["metadata"],
+        "schedule": outcome.body["schedule"]
+    } for rank, (seed, outcome) in enumerate(ranked[1:], start=2)]
+
+    return ScheduleOutcome({**best.body, "metadata": metadata, "alternatives": alternatives}, 200,
+                           best.timings, best.stats)
+
+def run_processed_schedule_in_pool(processed_data: Dict,
+                                   cancel_token: Optional[CancelToken] = None) -> ScheduleOutcome:
+    """run_processed_schedule on the shared process pool; the calling thread only waits"""
+    alternatives = processed_data["parameters"].get("alternatives") or 1
+    if alternatives > 1:
+        return run_alternatives(processed_data, alternatives, cancel_token)  # Fans its candidates out over the pool
+
+    pool = get_process_pool()
+    try:
+        if cancel_token is not None:
+            cancel_token.claim_slot()
+        return wait_for_outcome(pool.submit(run_processed_schedule, processed_data, None, cancel_token), cancel_token)
+    except CancelledError:
+        return cancelled_outcome(cancel_token.reason)
+    except BrokenProcessPool as e:
+        reset_process_pool(pool)
+        return ScheduleOutcome({"error": f"Worker process failed: {e}"}, 500)
+
+def submit_schedule(pool: ProcessPoolExecutor, payload: Dict, cancel_token: Optional[CancelToken] = None) -> Future:
+    """Submit a payload to the pool; catalogRef payloads are resolved here because workers don't share the catalog store"""
+    if cancel_token is not None:
+        cancel_token.claim_slot()
+    if not (isinstance(payload, dict) and payload.get("catalogRef")):
+        return pool.submit(run_schedule, payload, None, cancel_token)
+
+    future = Future()
+    try:
+        processed_data, error = prepare_schedule_data(payload)
+    except Exception as e:
+        logger.exception("Error preparing catalogRef payload:")
+        future.set_result(ScheduleOutcome({"error": str(e)}, 500))
+        return future
+        
+    if error:
+        future.set_result(error)
+        return future
+    return pool.submit(run_processed_schedule, processed_data, None, cancel_token)
+
+def run_schedule_batch(payloads: List[Dict]) -> List[Dict]:
+    """Fan a list of payloads out over the process pool and collect results in order"""
+    pool = get_process_pool()
+    try:
+        futures = [submit_schedule(pool, payload) for payload in payloads]
+    except BrokenProcessPool:
+        reset_process_pool(pool)
+        raise
+
+    results = []
+    for index, future in enumerate(futures):
+        try:
+            outcome = future.result()
+        except BrokenProcessPool as e:
+            reset_process_pool(pool)
+            outcome = ScheduleOutcome({"error": f"Worker process failed: {e}"}, 500)
+        except Exception as e:
+            logger.exception(f"Batch item {index} failed:")
+            outcome = ScheduleOutcome({"error": str(e)}, 500)
+        observe_outcome(outcome)
+        results.append(format_batch_item(index, outcome))
+    return results
+
+def format_batch_item(index: int, outcome: ScheduleOutcome) -> Dict:
+    """Shape a single outcome as an entry in a batch response"""
+    return {
+        "index": index,
+        "status": outcome.status,
+        "error": outcome.body.get("error"),
+        "metadata": outcome.body.get("metadata", {}),
+        "schedule": outcome.body.get("schedule", [])
+    }
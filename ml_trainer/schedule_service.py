@@ -0,0 +1,80 @@
+from typing import Callable, Dict, Optional
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+
+from admission import admission
+from cancellation import CancelToken
+from catalog_store import CatalogEntry, catalog_store
+from metrics import registry, Gauge, observe_outcome
+from response_encoding import CourseFragmentCache
+from schedule_cache import schedule_cache, payload_digest
+from schedule_runner import ScheduleOutcome, run_schedule
+from single_flight import schedule_flights
+
+logger = logging.getLogger(__name__)
+
+# Scrape-time gauges for the cache and single-flight state behind serve_schedule
+registry.register(Gauge("scheduler_cache_hits_total", "Schedule cache hits",
+                        lambda: schedule_cache.hits, type_name="counter"))
+registry.register(Gauge("scheduler_cache_misses_total", "Schedule cache misses",
+                        lambda: schedule_cache.misses, type_name="counter"))
+registry.register(Gauge("scheduler_cache_entries", "Schedules currently cached",
+                        lambda: schedule_cache.stats()["size"]))
+registry.register(Gauge("scheduler_coalesced_requests_total", "Requests that shared an in-flight computation",
+                        lambda: schedule_flights.shared, type_name="counter"))
+
+@dataclass
+class ServedSchedule:
+    body: Dict
+    status: int
+    cache: str  # HIT, MISS or COALESCED
+    approach: Optional[str] = None
+
+def fragments_for(payload: Dict, catalog: Optional[CatalogEntry] = None) -> CourseFragmentCache:
+    """The registered catalog's fragment cache for catalogRef payloads, else a fresh one; catalog as in prepare_schedule_data"""
+    entry = catalog_store.resolve(payload["catalogRef"], catalog) if isinstance(payload, dict) and payload.get("catalogRef") else None
+    return entry.fragments if entry is not None else CourseFragmentCache()
+
+def serve_schedule(payload: Dict, payload_bytes: Optional[int] = None,
+                   runner: Optional[Callable[..., ScheduleOutcome]] = None,
+                   disconnected: Optional[Callable[[], bool]] = None,
+                   catalog: Optional[CatalogEntry] = None) -> ServedSchedule:
+    """Answer a schedule request from the cache, a matching in-flight run, or a new admitted run.
+
+    Shared by the HTTP endpoint, the RPC server and the asyncio front end, which passes a runner
+    that moves the optimizer onto the process pool. disconnected tells whether the client has
+    gone away; catalog is the entry a streamed body was registered as. Raises AdmissionRejected
+    when overloaded.
+    """
+    # Identical payloads produce identical schedules, so serve repeats from the cache
+    cache_key = payload_digest(payload)
+    logger.info("Schedule generation request", extra={
+        "payloadDigest": cache_key[:16],
+        "payloadBytes": payload_bytes
+    })
+
+    cached_body = schedule_cache.get(cache_key)
+    if cached_body is not None:
+        logger.info("Serving schedule from cache", extra={"payloadDigest": cache_key[:16]})
+        return ServedSchedule({**cached_body, "timestamp": str(datetime.now())}, 200, "HIT")
+
+    def compute():
+        # Stop the run once its client is gone, unless coalesced requests are still waiting on it
+        probe = (lambda: disconnected() and not schedule_flights.waiters(cache_key)) if disconnected else None
+        with CancelToken(probe) as token:
+            outcome = run_schedule(payload, runner, token, admit=admission.admit, catalog=catalog)
+        observe_outcome(outcome)
+        # A run cut short by its time budget might finish next time, so don't pin it
+        if outcome.status == 200 and not outcome.body["metadata"].get("truncated"):
+            schedule_cache.put(cache_key, outcome.body)
+        return outcome
+
+    # Double clicks and retries arrive while the first run is still going; wait for it instead,
+    # taking a place in admission's waiting room since the wait holds this thread
+    outcome, shared = schedule_flights.do(cache_key, compute, admission.follow)
+    if shared:
+        logger.info("Shared in-flight schedule computation", extra={"payloadDigest": cache_key[:16]})
+
+    return ServedSchedule(outcome.body, outcome.status, "COALESCED" if shared else "MISS",
+                          outcome.stats.get("approach"))
@@ -1,23 +1,14 @@
-from typing import Dict, List, Set, Tuple, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Set, Tuple, Optional
+from dataclasses import dataclass, replace
 from datetime import datetime
 import logging
+import random
 
-@dataclass
-class Course:
-    id: int
-    name: str
-    class_number: str
-    credits: int
-    prerequisites: List[int]
-    corequisites: List[int]
-    semesters_offered: List[str]
-    is_elective: bool
-    section_id: int
-    credits_needed: int = None
-    course_type: str = ""
-    course_id: str = ""
-    is_elective_section: bool = False
+from metrics import PhaseTimer
+from deadline import Deadline
+from cancellation import CancelToken, RunCancelled
+from run_context import RunContext, bind_run, current_run
+from compiled_catalog import Course
 
 @dataclass
 class Semester:
@@ -34,57 +25,29 @@ class Semester:
     def total_credits(self) -> int:
         return sum(c.credits for c in self.classes)
 
-class SchedulingLogFilter(logging.Filter):
-    def filter(self, record):
-        if not isinstance(record.msg, str):
-            return True
-            
-        message = str(record.msg)
-        
-        if ('Generated schedule response' in message or
-            '"metadata":' in message or
-            "'metadata':" in message or
-            message.startswith('{') and ('schedule' in message or 'metadata' in message)):
-            return False
-            
-        return True
-
-# Configure logging with the enhanced filter
-logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
-# Apply filter to root logger to catch all logging
-logging.getLogger().addFilter(SchedulingLogFilter())
-logger.addFilter(SchedulingLogFilter())
+# Upper bound of the random boost added to each priority when a prioritySeed is set
+PRIORITY_JITTER = 10
 
 class SemesterBasedOptimizer:
-    def __init__(self):
-        self.satisfied_sections: Set[int] = set()
-        
-    def _convert_to_courses(self, raw_classes: Dict) -> List[Course]:
-        """Convert raw class data to Course objects"""
-        courses = []
-        for id, data in raw_classes.items():
-            course = Course(
-                id=int(id),
-                name=data["class_name"],
-                class_number=data.get("class_number", ""),
-                credits=data["credits"],
-                prerequisites=data.get("prerequisites", []),
-                corequisites=data.get("corequisites", []),
-                semesters_offered=data["semesters_offered"],
-                is_elective=data.get("is_elective", False),
-                section_id=data["section_id"],
-                credits_needed=data.get("credits_needed"),
-                course_type=data.get("course_type", ""),
-                course_id=str(data.get("course_id", "")),
-                is_elective_section=data.get("is_elective_section", False)
-            )
-            courses.append(course)
-        return courses
+    """Holds no per-run state, so one instance can serve every thread; see RunContext"""
+
+    @property
+    def _run(self) -> RunContext:
+        return current_run()
 
+    def _report_progress(self, event: str, data: Dict) -> None:
+        """Notify the progress listener, if any, that the schedule has advanced"""
+        if self._run.progress_callback:
+            self._run.progress_callback(event, data)
+        
     def _sort_by_prerequisites(self, courses: List[Course]) -> List[Course]:
         """Sort courses optimizing for balanced distribution while respecting dependencies"""
+        # First course per id, as the list scans this replaced returned
+        by_id: Dict[int, Course] = {}
+        for course in courses:
+            by_id.setdefault(course.id, course)
         prereq_chains = {}
         dependent_courses = {}
         chain_depths = {}
@@ -96,7 +59,7 @@ class SemesterBasedOptimizer:
                 return set()
             seen.add(course_id)
             
-            course = next((c for c in courses if c.id == course_id), None)
+            course = by_id.get(course_id)
             if not course:
                 return set()
                 
@@ -116,7 +79,7 @@ class SemesterBasedOptimizer:
                 return 0
             seen.add(course_id)
             
-            course = next((c for c in courses if c.id == course_id), None)
+            course = by_id.get(course_id)
             if not course or not course.prerequisites:
                 return 0
                 
@@ -146,6 +109,11 @@ class SemesterBasedOptimizer:
             c.id                            # Stable sort
         ))
 
+    def _unlocks_count(self, course: Course, remaining_ids: Set[int]) -> int:
+        """How many of the remaining courses list course as a prerequisite"""
+        catalog = self._run.catalog
+        return sum(1 for i in catalog.dependents_of(catalog.index[course.id]) if catalog.ids[i] in remaining_ids)
+
     def _is_religion_class(self, course: Course) -> bool:
         """Check if a course is a religion course"""
         return course.course_type == "religion"
@@ -170,24 +138,25 @@ class SemesterBasedOptimizer:
     def _calculate_target_credits_per_semester(self, all_courses: List[Course], 
                                              target_semesters: int, 
                                              first_year_limits: Dict,
-                                             limit_first_year: bool) -> List[int]:
+                                             limit_first_year: bool,
+                                             first_year_semesters: int) -> List[int]:
         """Calculate target credits to efficiently use all target semesters with dynamic credit allocation"""
         total_credits = sum(course.credits for course in all_courses)
         target_credits = []
         
-        if limit_first_year and first_year_limits and target_semesters >= 3:
+        if limit_first_year and first_year_limits and first_year_semesters and target_semesters >= first_year_semesters:
             # First year with limits - use the actual specified limits
             first_year_targets = [
                 first_year_limits.get("fallWinterCredits", 12),  # Winter 2025
                 first_year_limits.get("springCredits", 9),       # Spring 2025  
                 first_year_limits.get("fallWinterCredits", 12)   # Fall 2025
-            ]
+            ][3 - first_year_semesters:]  # Only what is left of the first year
             target_credits.extend(first_year_targets)
             
             # Calculate remaining credits after first year
             first_year_total = sum(first_year_targets)
             remaining_credits = total_credits - first_year_total
-            remaining_semesters = target_semesters - 3
+            remaining_semesters = target_semesters - first_year_semesters
             
             if remaining_semesters > 0:
                 # Distribute remaining credits to use maximum capacity efficiently
@@ -200,7 +169,7 @@ class SemesterBasedOptimizer:
                         sem_target = min(18, max(12, int(avg_credits) + 2))  # Aim for higher capacity
                     else:
                         # Final semester gets whatever remains
-                        allocated_so_far = sum(target_credits[3:])
+                        allocated_so_far = sum(target_credits[first_year_semesters:])
                         sem_target = remaining_credits - allocated_so_far
                         sem_target = max(3, min(sem_target, 18))  # Allow light final semester
                     
@@ -301,11 +270,19 @@ class SemesterBasedOptimizer:
         
         return best_semester_idx
 
-    def create_schedule(self, processed_data: Dict) -> Dict:
+    def create_schedule(self, processed_data: Dict,
+                        progress_callback: Optional[Callable[[str, Dict], None]] = None,
+                        cancel_token: Optional[CancelToken] = None,
+                        phase_timer: Optional[PhaseTimer] = None) -> Dict:
         """Create a schedule that uses exactly the target number of semesters"""
+        run = RunContext(progress_callback, cancel_token or CancelToken(), phase_timer or PhaseTimer())
+        with bind_run(run):
+            return self._create_schedule(processed_data)
+
+    def _create_schedule(self, processed_data: Dict) -> Dict:
         try:
             # Validate input (same as constraint optimizer)
-            if not processed_data.get("classes"):
+            if not processed_data.get("catalog"):
                 logger.error("No classes in processed data")
                 return {
                     "error": "No classes to schedule",
@@ -325,19 +302,24 @@ class SemesterBasedOptimizer:
                     }
                 }
                 
-            logger.info(f"Starting semester-based schedule creation with {len(processed_data['classes'])} classes")
+            logger.info(f"Starting semester-based schedule creation with {len(processed_data['catalog'])} classes")
             
             # Initialize tracking sets (same as constraint optimizer)
-            self.satisfied_sections = set()
             scheduled_course_ids = set()
             
             params = processed_data["parameters"]
+            self._run.deadline = Deadline(params.get("timeBudgetMs"))
+            # prioritySeed perturbs priority ties and elective picks to produce alternative schedules
+            seed = params.get("prioritySeed")
+            self._run.rng = random.Random(seed) if seed is not None else None
             target_semesters = params.get("targetSemesters")
             
             if not target_semesters:
                 raise ValueError("Target semesters not specified for semester-based scheduling")
             
-            self._all_courses = self._convert_to_courses(processed_data["classes"])
+            # Compiled once by the data processor (or at registration) and shared read-only
+            self._run.catalog = processed_data["catalog"]
+            self._run.all_courses = list(self._run.catalog.courses)
             
             # Set up first year limits (same as constraint optimizer)
             if not params.get("firstYearLimits") or not isinstance(params["firstYearLimits"], dict):
@@ -347,7 +329,7 @@ class SemesterBasedOptimizer:
                 }
             
             # Group courses by section and process electives (same as constraint optimizer)
-            sections = self._group_by_section(self._all_courses)
+            sections = self._group_by_section(self._run.all_courses)
             courses_to_schedule = []
             
             # Process each section (identical to constraint optimizer)
@@ -362,7 +344,7 @@ class SemesterBasedOptimizer:
                             combination = self._find_best_elective_combination(courses, credits_needed)
                             if combination:
                                 courses_to_schedule.extend(combination)
-                                logger.info(f"Selected electives for section {section_id}: {[c.class_number for c in combination]}")
+                                logger.debug("Selected electives for section %s: %s", section_id, [c.class_number for c in combination])
                         except ValueError as e:
                             logger.error(f"Failed to satisfy section {section_id}: {str(e)}")
                             return {
@@ -382,7 +364,8 @@ class SemesterBasedOptimizer:
                 courses_to_schedule, 
                 target_semesters,
                 params["firstYearLimits"],
-                params.get("limitFirstYear", False)
+                params.get("limitFirstYear", False),
+                params["firstYearSemesters"]
             )
             
             logger.info(f"Target credits per semester: {target_credits}")
@@ -413,15 +396,23 @@ class SemesterBasedOptimizer:
                     first_sem_required.append(course)
             
             # Sort regular courses by prerequisites (same logic, adapted for distribution)
-            sorted_regular_courses = self._sort_by_prerequisites(regular_courses)
+            with self._run.phase_timer.phase("sort_prerequisites"):
+                sorted_regular_courses = self._sort_by_prerequisites(regular_courses)
             
             # Main scheduling loop - using constraint optimizer logic with distribution adaptations
             current_semester_idx = 0
             scheduled_semesters = []
             remaining_courses = sorted_regular_courses.copy()
             all_scheduled_courses = []
+            self._run.phase_timer.start("semester_loop")
             
             while remaining_courses or first_sem_required or first_sem_flexible or second_sem_required:
+                # Out of time: keep the semesters finalized so far and report the rest as unscheduled
+                self._run.cancel_token.check("semester_loop")
+                if self._run.deadline.check("semester_loop"):
+                    logger.warning("Time budget exhausted after %d semesters", len(scheduled_semesters))
+                    break
+                    
                 # Create new semester if needed (same as constraint optimizer)
                 if current_semester_idx >= len(semesters):
                     last_sem = semesters[-1]
@@ -473,6 +464,7 @@ class SemesterBasedOptimizer:
                 # SECOND PRIORITY: Schedule regular courses with efficient packing
                 course_priorities = []
 
+                remaining_ids = {c.id for c in remaining_courses}
                 for course in remaining_courses:
                     # Skip if already scheduled
                     if course.id in scheduled_course_ids:
@@ -493,7 +485,7 @@ class SemesterBasedOptimizer:
                         if religion_courses_in_semester >= 1:
                             continue
                         
-                        added_courses_preview = self._add_course_with_coreqs(course, remaining_courses)
+                        added_courses_preview = self._add_course_with_coreqs(course)
                         religion_in_coreqs = sum(1 for c in added_courses_preview if self._is_religion_class(c))
                         if religion_in_coreqs > 1:
                             continue
@@ -502,7 +494,7 @@ class SemesterBasedOptimizer:
                     priority = 0
 
                     # 1. Highest priority for prerequisite unlocking
-                    unlocks_count = sum(1 for c in remaining_courses if course.id in c.prerequisites)
+                    unlocks_count = self._unlocks_count(course, remaining_ids)
                     priority += unlocks_count * 25
 
                     # 2. Foundation courses priority
@@ -543,6 +535,10 @@ class SemesterBasedOptimizer:
                     
                     course_priorities.append((course, priority))
 
+                if self._run.rng:
+                    course_priorities = [(course, priority + self._run.rng.uniform(0, PRIORITY_JITTER))
+                                         for course, priority in course_priorities]
+
                 # Sort by priority
                 course_priorities.sort(key=lambda x: x[1], reverse=True)
 
@@ -554,7 +550,7 @@ class SemesterBasedOptimizer:
                         
                         try:
                             # Add course and its corequisites
-                            added_courses = self._add_course_with_coreqs(course, remaining_courses)
+                            added_courses = self._add_course_with_coreqs(course)
                             
                             # Religion course validation
                             if self._is_religion_class(course):
@@ -570,15 +566,15 @@ class SemesterBasedOptimizer:
                             
                             all_scheduled_courses.extend(added_courses)
                             
-                            # Remove scheduled courses
-                            for c in added_courses:
-                                if c in remaining_courses:
-                                    remaining_courses.remove(c)
-                                    scheduled_course_ids.add(c.id)
+                            # Remove scheduled courses by id: added_courses may hold this run's retyped copies
+                            removed_ids = {c.id for c in added_courses} & {c.id for c in remaining_courses}
+                            remaining_courses[:] = [c for c in remaining_courses if c.id not in removed_ids]
+                            scheduled_course_ids.update(removed_ids)
                                     
-                            logger.info(f"Scheduled {course.class_number} in {semester.type} {semester.year} "
-                                      f"(semester {current_semester_idx + 1}/{target_semesters}, "
-                                      f"credits: {current_credits}/{semester.credit_limit})")
+                            logger.debug("Scheduled %s in %s %s (semester %s/%s, credits: %s/%s)",
+                                         course.class_number, semester.type, semester.year,
+                                         current_semester_idx + 1, target_semesters,
+                                         current_credits, semester.credit_limit)
                             
                         except Exception as e:
                             logger.error(f"Error scheduling {course.class_number}: {str(e)}")
@@ -592,8 +588,12 @@ class SemesterBasedOptimizer:
                         "classes": [self._course_to_dict(c) for c in semester_courses],
                         "totalCredits": current_credits
                     })
-                    logger.info(f"Completed {semester.type} {semester.year} with {current_credits} credits "
-                              f"(target: {semester.target_credits})")
+                    logger.debug("Completed %s %s with %s credits (target: %s)",
+                                 semester.type, semester.year, current_credits, semester.target_credits)
+                    self._report_progress("semester", {
+                        "index": len(scheduled_semesters) - 1,
+                        "semester": scheduled_semesters[-1]
+                    })
                 
                 # Move to next semester
                 current_semester_idx += 1
@@ -603,10 +603,16 @@ class SemesterBasedOptimizer:
                     break
 
             # Handle any remaining courses if we're at semester limit
-            if (remaining_courses or first_sem_required or first_sem_flexible or second_sem_required) and current_semester_idx >= target_semesters:
+            if ((remaining_courses or first_sem_required or first_sem_flexible or second_sem_required)
+                    and current_semester_idx >= target_semesters and not self._run.deadline.expired):
                 logger.warning(f"Some courses remain unscheduled at target semester limit. Creating additional semesters.")
                 
                 while remaining_courses or first_sem_required or first_sem_flexible or second_sem_required:
+                    self._run.cancel_token.check("semester_loop")
+                    if self._run.deadline.check("semester_loop"):
+                        logger.warning("Time budget exhausted while creating overflow semesters")
+                        break
+                        
                     if current_semester_idx >= len(semesters):
                         last_sem = semesters[-1]
                         new_sem = self._create_next_semester(last_sem, params)
@@ -622,15 +628,15 @@ class SemesterBasedOptimizer:
                             course_credits = self._get_total_credits(course, remaining_courses)
                             if current_credits + course_credits <= semester.credit_limit:
                                 try:
-                                    added_courses = self._add_course_with_coreqs(course, remaining_courses)
+                                    added_courses = self._add_course_with_coreqs(course)
                                     semester_courses.extend(added_courses)
                                     current_credits += course_credits
                                     
-                                    for c in added_courses:
-                                        if c in remaining_courses:
-                                            remaining_courses.remove(c)
-                                            scheduled_course_ids.add(c.id)
-                                            all_scheduled_courses.append(c)
+                                    # Remove scheduled courses by id: added_courses may hold this run's retyped copies
+                                    removed_ids = {c.id for c in added_courses} & {c.id for c in remaining_courses}
+                                    remaining_courses[:] = [c for c in remaining_courses if c.id not in removed_ids]
+                                    scheduled_course_ids.update(removed_ids)
+                                    all_scheduled_courses.extend(c for c in added_courses if c.id in removed_ids)
                                 except Exception as e:
                                     logger.error(f"Error scheduling overflow course {course.class_number}: {str(e)}")
                                     continue
@@ -653,6 +659,10 @@ class SemesterBasedOptimizer:
                             "classes": [self._course_to_dict(c) for c in semester_courses],
                             "totalCredits": current_credits
                         })
+                        self._report_progress("semester", {
+                            "index": len(scheduled_semesters) - 1,
+                            "semester": scheduled_semesters[-1]
+                        })
                     
                     current_semester_idx += 1
                     
@@ -665,30 +675,47 @@ class SemesterBasedOptimizer:
                         logger.error("Too many overflow semesters created, stopping")
                         break
 
+            self._run.phase_timer.stop("semester_loop")
+            unscheduled = [c.class_number for c in
+                           remaining_courses + first_sem_required + first_sem_flexible + second_sem_required]
+
             # Log the final result
             actual_semesters = len(scheduled_semesters)
             logger.info(f"Created schedule with {actual_semesters} semesters (target: {target_semesters})")
             
             # NEW CODE: Check if we need to spread the schedule
-            if actual_semesters < target_semesters:
+            self._run.cancel_token.check("spread_schedule_to_target_semesters")
+            if actual_semesters < target_semesters and not self._run.deadline.check("spread_schedule_to_target_semesters"):
                 logger.info(f"Schedule finished efficiently in {actual_semesters} semesters (target: {target_semesters})")
                 logger.info(f"Spreading schedule to use exactly {target_semesters} semesters")
                 
                 # Spread the schedule to fill target_semesters
-                spread_semesters = self._spread_schedule_to_target_semesters(
-                    scheduled_semesters, 
-                    target_semesters,
-                    params["startSemester"]
-                )
-                
-                # Replace with the spread schedule
-                scheduled_semesters = spread_semesters
-                actual_semesters = len(scheduled_semesters)
+                with self._run.phase_timer.phase("spread_schedule_to_target_semesters"):
+                    spread_semesters = self._spread_schedule_to_target_semesters(
+                        scheduled_semesters, 
+                        target_semesters,
+                        params["startSemester"]
+                    )
                 
-                logger.info(f"Successfully spread schedule across {actual_semesters} semesters")
+                # Replace with the spread schedule (unless the pass ran out of time and kept the packed one)
+                if spread_semesters is not scheduled_semesters:
+                    scheduled_semesters = spread_semesters
+                    actual_semesters = len(scheduled_semesters)
+                    
+                    logger.info(f"Successfully spread schedule across {actual_semesters} semesters")
+                    self._report_progress("improvement", {
+                        "pass": "spread_schedule_to_target_semesters",
+                        "semesterCount": actual_semesters
+                    })
             
+            # A plan cut short by the time budget is incomplete, however few semesters it uses
+            incomplete = self._run.deadline.expired and bool(unscheduled)
             # Success if within target or only slightly over due to constraints
-            met_target = actual_semesters <= target_semesters
+            met_target = not incomplete and actual_semesters <= target_semesters
+            if incomplete:
+                target_note = f"Target not reached: {len(unscheduled)} courses left unscheduled when time ran out"
+            else:
+                target_note = f"Target {'achieved' if met_target else f'exceeded by {actual_semesters - target_semesters}'}"
             
             return {
                 "metadata": {
@@ -697,18 +724,21 @@ class SemesterBasedOptimizer:
                     "targetSemesters": target_semesters,
                     "actualSemesters": actual_semesters,
                     "distributed": met_target,
-                    "success": True,
+                    "success": not incomplete,
                     "improvements": [
                         f"Efficiently packed courses into {actual_semesters} semesters",
                         f"Target was {target_semesters} semesters",
-                        f"Target {'achieved' if met_target else f'exceeded by {actual_semesters - target_semesters}'}",
+                        target_note,
                         "Dynamically used credit limits to fit within target",
                         "Maintained all course scheduling rules and constraints"
-                    ]
+                    ],
+                    **self._run.deadline.describe(unscheduled)
                 },
                 "schedule": scheduled_semesters
             }
         
+        except RunCancelled:
+            raise
         except Exception as e:
             logger.error(f"Error in semester-based schedule creation: {str(e)}")
             return {
@@ -731,16 +761,18 @@ class SemesterBasedOptimizer:
 
     def _find_best_elective_combination(self, courses: List[Course], credits_needed: int) -> List[Course]:
         """Find optimal combination of elective courses that meets or exceeds credit requirement"""
-        logger.info(f"Looking for combination totaling at least {credits_needed} credits from section {courses[0].section_id}")
+        logger.debug("Looking for combination totaling at least %s credits from section %s", credits_needed, courses[0].section_id)
         
         elective_courses = [c for c in courses if c.is_elective]
+        if self._run.rng:
+            self._run.rng.shuffle(elective_courses)
         
         total_available_credits = 0
         for course in elective_courses:
-            course_with_coreqs = self._get_course_with_coreqs(course, self._all_courses)
+            course_with_coreqs = self._get_course_with_coreqs(course)
             total_available_credits += sum(c.credits for c in course_with_coreqs)
     
-        logger.info(f"Section {courses[0].section_id} has {total_available_credits} total credits available (including corequisites)")
+        logger.debug("Section %s has %s total credits available (including corequisites)", courses[0].section_id, total_available_credits)
     
         if total_available_credits < credits_needed:
             error_msg = (f"Section {courses[0].section_id} requires {credits_needed} credits but only has "
@@ -749,8 +781,8 @@ class SemesterBasedOptimizer:
             raise ValueError(error_msg)
     
         section_id = courses[0].section_id
-        if section_id in self.satisfied_sections:
-            logger.info(f"Section {section_id} already satisfied")
+        if section_id in self._run.satisfied_sections:
+            logger.debug("Section %s already satisfied", section_id)
             return []
             
         best_combination = None
@@ -761,7 +793,7 @@ class SemesterBasedOptimizer:
             current_total = 0
             
             for course in elective_courses[:size]:
-                course_and_coreqs = self._get_course_with_coreqs(course, self._all_courses)
+                course_and_coreqs = self._get_course_with_coreqs(course)
                 current_combo.extend(course_and_coreqs)
                 current_total = sum(c.credits for c in current_combo)
                 
@@ -771,22 +803,22 @@ class SemesterBasedOptimizer:
                     break
                 
         if best_combination:
-            self.satisfied_sections.add(section_id)
-            logger.info(f"Found combination for section {section_id}: {[c.class_number for c in best_combination]} = {best_total} cr "
-                       f"(needed {credits_needed})")
+            self._run.satisfied_sections.add(section_id)
+            logger.debug("Found combination for section %s: %s = %s cr (needed %s)",
+                         section_id, [c.class_number for c in best_combination], best_total, credits_needed)
             return best_combination
 
         logger.warning(f"Could not meet credit requirement for section {section_id}: needed {credits_needed} credits")
         return []
 
-    def _get_course_with_coreqs(self, course: Course, available_courses: List[Course]) -> List[Course]:
-        """Get a course and all its corequisites"""
+    def _get_course_with_coreqs(self, course: Course, available_ids: Optional[Set[int]] = None) -> List[Course]:
+        """Get a course and all its corequisites, limited to available_ids when given"""
         result = [course]
         
         for coreq_id in course.corequisites:
             if isinstance(coreq_id, dict):
                 coreq_id = coreq['id']
-            coreq = next((c for c in available_courses if c.id == coreq_id), None)
+            coreq = self._run.catalog.course(coreq_id) if available_ids is None or coreq_id in available_ids else None
             if coreq and coreq not in result:
                 result.append(coreq)
                 
@@ -850,7 +882,7 @@ class SemesterBasedOptimizer:
         
         return total
 
-    def _add_course_with_coreqs(self, course: Course, remaining_courses: List[Course]) -> List[Course]:
+    def _add_course_with_coreqs(self, course: Course) -> List[Course]:
         """Add a course and its corequisites"""
         added = [course]
         required_coreqs = set()
@@ -865,25 +897,22 @@ class SemesterBasedOptimizer:
                 if coreq_id in required_coreqs:
                     continue
                 
-                coreq = next((c for c in remaining_courses if c.id == coreq_id), None)
-                
-                if not coreq:
-                    coreq = next((c for c in self._all_courses if c.id == coreq_id), None)
+                coreq = self._run.catalog.course(coreq_id)
                 
                 if coreq:
+                    coreq = self._run.retyped.get(coreq_id, coreq)
                     required_coreqs.add(coreq_id)
                     to_check.append(coreq)
                     
                     if coreq.course_type == "system" and course.course_type != "system":
-                        logger.info(f"Updating {coreq.class_number} type from system to {course.course_type}")
-                        coreq.course_type = course.course_type
+                        logger.debug("Updating %s type from system to %s", coreq.class_number, course.course_type)
+                        self._run.retyped[coreq_id] = replace(coreq, course_type=course.course_type)
     
         for coreq_id in required_coreqs:
-            coreq = (next((c for c in remaining_courses if c.id == coreq_id), None) or 
-                    next((c for c in self._all_courses if c.id == coreq_id), None))
-            if coreq and coreq not in added:
+            coreq = self._run.retyped.get(coreq_id) or self._run.catalog.course(coreq_id)
+            if coreq and all(c.id != coreq_id for c in added):
                 added.append(coreq)
-                logger.info(f"Adding corequisite {coreq.class_number} with {course.class_number}")
+                logger.debug("Adding corequisite %s with %s", coreq.class_number, course.class_number)
     
         return added
 
@@ -896,12 +925,12 @@ class SemesterBasedOptimizer:
         if not course.prerequisites:
             return True
             
-        courses_in_previous_semesters = []
+        courses_in_previous_semesters = set()
         for i in range(current_semester_idx):
             if i < len(scheduled_semesters):
                 semester = scheduled_semesters[i]
                 for course_dict in semester["classes"]:
-                    courses_in_previous_semesters.append(course_dict["id"])
+                    courses_in_previous_semesters.add(course_dict["id"])
 
         return all(prereq_id in courses_in_previous_semesters for prereq_id in course.prerequisites)
 
@@ -920,7 +949,7 @@ class SemesterBasedOptimizer:
                 credit_limit = 18
             
             # Apply first year limits if specified
-            if i < 3 and params.get("limitFirstYear"):
+            if i < params["firstYearSemesters"] and params.get("limitFirstYear"):
                 if sem_type == "Spring":
                     credit_limit = params["firstYearLimits"]["springCredits"]
                 else:
@@ -1003,6 +1032,11 @@ class SemesterBasedOptimizer:
         
         # Process each chain
         for chain in sorted_chains:
+            # A half-spread schedule is not valid; fall back to the packed one
+            self._run.cancel_token.check("spread_schedule_to_target_semesters")
+            if self._run.deadline.check("spread_schedule_to_target_semesters"):
+                return original_semesters
+                
             # Calculate how many semesters this chain should span
             chain_length = len(chain)
             chain_span = min(target_semesters, max(1, int(chain_length * 1.5)))
@@ -1264,7 +1298,7 @@ class SemesterBasedOptimizer:
                 # Update semester credits
                 semester["totalCredits"] = semester.get("totalCredits", 0) + course.get("credits", 0)
                 
-                logger.info(f"Placed {course.get('class_number', 'Unknown')} in {semester['type']} {semester['year']}")
+                logger.debug("Placed %s in %s %s", course.get('class_number', 'Unknown'), semester['type'], semester['year'])
 
     def _distribute_groups_evenly(self, groups: List[List[Dict]], semesters: List[Dict], 
                             placed_course_ids: Set[int], target_spacing: int = 1) -> None:
@@ -0,0 +1,65 @@
+from typing import Any, Callable, ContextManager, Dict, Optional, Tuple
+import contextlib
+import threading
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution whose result they all share"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any],
+           follow: Optional[Callable[[], ContextManager]] = None) -> Tuple[Any, bool]:
+        """Run fn unless a call for key is already in flight; returns (result, shared).
+
+        follow, when given, is entered around a waiting caller's wait; an exception it raises on
+        entry turns that caller away without affecting the call in flight.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            with follow() if follow is not None else contextlib.nullcontext():
+                with self._lock:
+                    call.waiters += 1
+                    self.shared += 1
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def waiters(self, key: str) -> int:
+        """How many other callers are waiting on the call in flight for key"""
+        with self._lock:
+            call = self._calls.get(key)
+            return call.waiters if call is not None else 0
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+schedule_flights = SingleFlight()
@@ -0,0 +1,80 @@
+import argparse
+import statistics
+import subprocess
+import socket
+import json
+import time
+import sys
+import os
+import urllib.request
+import urllib.error
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import() -> float:
+    """Seconds for a fresh interpreter to import api"""
+    code = "import time; t = time.perf_counter(); import api; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def measure_gunicorn(payload: bytes, env_overrides: dict) -> dict:
+    """Start gunicorn with gunicorn.conf.py and time until /ping answers and the first schedule returns"""
+    port = _free_port()
+    env = {**os.environ, "PORT": str(port), "SCHEDULER_LOG_LEVEL": "WARNING", **env_overrides}
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "api:app"],
+                              cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        while True:
+            try:
+                urllib.request.urlopen(f"{base}/ping", timeout=1).read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError("gunicorn exited during startup")
+                time.sleep(0.01)
+        ready = time.perf_counter()
+
+        request = urllib.request.Request(f"{base}/generate-schedule", data=payload,
+                                         headers={"Content-Type": "application/json"})
+        urllib.request.urlopen(request, timeout=60).read()
+        first_schedule = time.perf_counter()
+        return {
+            "ready": ready - started,
+            "first_request": first_schedule - ready,
+            "time_to_first_schedule": first_schedule - started
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+def _summarize(name: str, samples: list) -> None:
+    keys = samples[0].keys()
+    parts = [f"{key}={statistics.median(s[key] for s in samples) * 1000:.1f}ms" for key in keys]
+    print(f"{name:<28} " + " ".join(parts))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure ML service cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--payload", default=os.path.join(HERE, "Payload.json"))
+    args = parser.parse_args()
+
+    with open(args.payload, "rb") as f:
+        payload = f.read()
+    json.loads(payload)
+
+    imports = [{"import_api": measure_import()} for _ in range(args.runs)]
+    _summarize("import api", imports)
+
+    for name, env in (("gunicorn, no warm-up", {"SCHEDULER_WARM_UP": "0"}),
+                      ("gunicorn, warm-up", {"SCHEDULER_WARM_UP": "1"})):
+        _summarize(name, [measure_gunicorn(payload, env) for _ in range(args.runs)])
+
+if __name__ == "__main__":
+    main()
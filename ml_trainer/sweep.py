@@ -0,0 +1,151 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import itertools
+import logging
+import os
+
+from cancellation import CancelToken
+from catalog_store import catalog_store
+from data_processor import ScheduleDataProcessor
+from metrics import observe_outcome
+from schedule_cache import schedule_cache, payload_digest
+from schedule_ranking import schedule_summary
+from schedule_runner import ScheduleOutcome, cancelled_outcome, run_candidates
+
+logger = logging.getLogger(__name__)
+
+# Preferences a sweep may vary
+SWEEP_KEYS = ("fallWinterCredits", "springCredits", "majorClassLimit", "targetSemesters", "firstYearLimits")
+# Most variants (the product of the grid's value lists) one sweep may evaluate
+MAX_SWEEP_VARIANTS = int(os.environ.get("SCHEDULER_MAX_SWEEP", 64))
+
+def _error(message: str, status: int = 400) -> ScheduleOutcome:
+    return ScheduleOutcome({"error": message, "metadata": {"success": False}}, status)
+
+def expand_grid(grid: Any) -> Tuple[Optional[List[Dict]], Optional[ScheduleOutcome]]:
+    """Every combination of the grid's values, in grid order; returns (variants, None) or (None, error)"""
+    if not isinstance(grid, dict) or not grid:
+        return None, _error("grid must map preference names to lists of values")
+    unknown = [key for key in grid if key not in SWEEP_KEYS]
+    if unknown:
+        return None, _error(f"Cannot sweep {', '.join(unknown)}; allowed: {', '.join(SWEEP_KEYS)}")
+    for key, values in grid.items():
+        if not isinstance(values, list) or not values:
+            return None, _error(f"grid.{key} must be a non-empty list")
+
+    count = 1
+    for values in grid.values():
+        count *= len(values)
+    if count > MAX_SWEEP_VARIANTS:
+        return None, _error(f"Sweep of {count} variants exceeds limit of {MAX_SWEEP_VARIANTS}", 413)
+
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))], None
+
+def _summary_row(index: int, overrides: Dict, outcome: ScheduleOutcome, cache: str, include_schedule: bool) -> Dict:
+    row = {"index": index, "overrides": overrides, "status": outcome.status, "cache": cache}
+    if outcome.status != 200:
+        row["error"] = outcome.body.get("error")
+        return row
+    row["summary"] = schedule_summary(outcome.body["schedule"])
+    if outcome.body["metadata"].get("truncated"):
+        row["truncated"] = True
+    if include_schedule:
+        row["schedule"] = outcome.body["schedule"]
+    return row
+
+def run_sweep(payload: Dict, cancel_token: Optional[CancelToken] = None) -> ScheduleOutcome:
+    """Evaluate a grid of preference overrides over one catalog, in parallel on the process pool.
+
+    The catalog is processed once (and registered, so its catalogRef comes back). Each variant's
+    result is cached under the same key /generate-schedule uses for {"catalogRef", "preferences"},
+    so the full schedule of any row can be fetched on demand from the cache. Variants run a single
+    plan each, so when the base preferences ask for alternatives the cache is neither read nor
+    written.
+    """
+    try:
+        if not isinstance(payload, dict):
+            return _error("Invalid payload structure")
+        base_preferences = payload.get("preferences")
+        if not isinstance(base_preferences, dict) or not base_preferences:
+            return _error("Invalid payload structure")
+        variants, error = expand_grid(payload.get("grid"))
+        if error:
+            return error
+
+        if payload.get("catalogRef"):
+            entry = catalog_store.get(payload["catalogRef"])
+            if entry is None:
+                return _error("Unknown catalogRef, register the catalog again", 404)
+        elif payload.get("courseData"):
+            entry, catalog_error = catalog_store.register(payload["courseData"])
+            if catalog_error:
+                return ScheduleOutcome(catalog_error, 400)
+        else:
+            return _error("Missing courseData or catalogRef in payload")
+
+        processor = ScheduleDataProcessor()
+        outcomes: Dict[int, Tuple[ScheduleOutcome, str]] = {}
+        pending: List[Tuple[int, str, Dict]] = []
+        first_of: Dict[str, int] = {}
+        cache_keys: List[str] = []
+        for index, overrides in enumerate(variants):
+            preferences = {**base_preferences, **overrides}
+            cache_key = payload_digest({"catalogRef": entry.ref, "preferences": preferences})
+            cache_keys.append(cache_key)
+            if cache_key in first_of:
+                continue  # Same preferences as an earlier variant (a repeated grid value)
+            first_of[cache_key] = index
+
+            # One plan per variant; a sweep of alternatives would multiply the runs. That plan is
+            # only the answer /generate-schedule would give when no alternatives are asked for.
+            single_plan = preferences.get("alternatives") in (None, 1)
+            cached_body = schedule_cache.get(cache_key) if single_plan else None
+            if cached_body is not None:
+                outcomes[index] = (ScheduleOutcome(cached_body, 200), "HIT")
+                continue
+            run_preferences = {key: value for key, value in preferences.items() if key != "alternatives"}
+            processed_data = processor.process_catalog_payload(entry.compiled, run_preferences)
+            if "error" in processed_data:
+                outcomes[index] = (ScheduleOutcome(processed_data, 400), "MISS")
+                continue
+            pending.append((index, cache_key if single_plan else None, processed_data))
+
+        logger.info(f"Sweeping {len(variants)} variants over catalog {entry.ref[:12]}: "
+                    f"{len(pending)} to run, {len(outcomes)} answered without running")
+        ran = run_candidates([processed_data for _, _, processed_data in pending], cancel_token)
+        if cancel_token is not None and cancel_token.poll():
+            return cancelled_outcome(cancel_token.reason)
+        for (index, cache_key, _), outcome in zip(pending, ran):
+            observe_outcome(outcome)
+            if cache_key and outcome.status == 200 and not outcome.body["metadata"].get("truncated"):
+                schedule_cache.put(cache_key, outcome.body)
+            outcomes[index] = (outcome, "MISS")
+
+        include_schedules = bool(payload.get("includeSchedules"))
+        rows = []
+        for index, overrides in enumerate(variants):
+            outcome, cache = outcomes[first_of[cache_keys[index]]]
+            rows.append(_summary_row(index, overrides, outcome, cache, include_schedules))
+
+        return ScheduleOutcome({
+            "metadata": {
+                "success": True,
+                "catalogRef": entry.ref,
+                "grid": payload["grid"],
+                "variantCount": len(variants),
+                "succeeded": sum(1 for row in rows if row["status"] == 200)
+            },
+            "variants": rows,
+            "timestamp": str(datetime.now())
+        }, 200)
+
+    except Exception as e:
+        logger.exception("Error running preference sweep:")
+        return ScheduleOutcome({
+            "error": str(e),
+            "metadata": {
+                "success": False,
+                "timestamp": str(datetime.now())
+            }
+        }, 500)
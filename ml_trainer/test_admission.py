@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from admission import AdmissionController, AdmissionRejected
+
+PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "Payload.json")
+
+
+class AdmissionControllerTest(unittest.TestCase):
+    def test_full_queue_is_rejected_with_retry_after(self):
+        controller = AdmissionController(max_concurrent=1, max_waiting=0, wait_timeout=5)
+        controller.acquire()
+
+        with self.assertRaises(AdmissionRejected) as raised:
+            controller.acquire()
+
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertEqual(controller.active, 1)
+
+    def test_coalesced_followers_count_as_waiting(self):
+        controller = AdmissionController(max_concurrent=1, max_waiting=2, wait_timeout=5)
+        controller.acquire()
+
+        with controller.follow(), controller.follow():
+            self.assertEqual(controller.following, 2)
+            with self.assertRaises(AdmissionRejected):
+                controller.acquire()
+            with self.assertRaises(AdmissionRejected) as raised:
+                with controller.follow():
+                    pass
+            # One admitted run and two followers, at the initial one second per run
+            self.assertEqual(raised.exception.retry_after, 3)
+
+        self.assertEqual(controller.following, 0)
+        self.assertEqual(controller.waiting, 0)
+
+    def test_waiting_request_is_admitted_when_a_slot_frees(self):
+        controller = AdmissionController(max_concurrent=1, max_waiting=1, wait_timeout=5)
+        controller.acquire()
+        admitted = threading.Event()
+
+        def wait_for_slot():
+            controller.acquire()
+            admitted.set()
+
+        waiter = threading.Thread(target=wait_for_slot)
+        waiter.start()
+        while controller.waiting == 0:
+            time.sleep(0.005)
+        controller.release()
+        waiter.join(5)
+
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(controller.active, 1)
+
+    def test_wait_times_out(self):
+        controller = AdmissionController(max_concurrent=1, max_waiting=1, wait_timeout=0.01)
+        controller.acquire()
+
+        with self.assertRaises(AdmissionRejected):
+            controller.acquire()
+        self.assertEqual(controller.waiting, 0)
+
+
+class OverloadedResponseTest(unittest.TestCase):
+    def test_generate_schedule_answers_503_with_retry_after(self):
+        import api
+        from schedule_cache import schedule_cache
+
+        with open(PAYLOAD_PATH) as f:
+            payload = json.load(f)
+        saturated = AdmissionController(max_concurrent=1, max_waiting=0, wait_timeout=5)
+        saturated.acquire()
+        schedule_cache.clear()
+
+        with mock.patch("schedule_service.admission", saturated):
+            response = api.app.test_client().post("/generate-schedule", json=payload)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        self.assertFalse(response.get_json()["metadata"]["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import socket
+import time
+import unittest
+
+from cancellation import socket_closed
+
+
+class SocketClosedTest(unittest.TestCase):
+    def test_connected_socket_with_timeout_is_not_closed(self):
+        server, client = socket.socketpair()
+        self.addCleanup(server.close)
+        self.addCleanup(client.close)
+        server.settimeout(2)
+
+        started = time.monotonic()
+        self.assertFalse(socket_closed(server))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_pending_bytes_are_not_a_disconnect(self):
+        server, client = socket.socketpair()
+        self.addCleanup(server.close)
+        self.addCleanup(client.close)
+        server.settimeout(2)
+        client.sendall(b"x")
+
+        self.assertFalse(socket_closed(server))
+        self.assertEqual(server.recv(1), b"x")
+
+    def test_peer_hang_up_is_closed(self):
+        server, client = socket.socketpair()
+        self.addCleanup(server.close)
+        server.settimeout(2)
+        client.close()
+
+        self.assertTrue(socket_closed(server))
+
+
+if __name__ == "__main__":
+    unittest.main()
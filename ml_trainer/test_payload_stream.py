@@ -0,0 +1,83 @@
+import gzip
+import io
+import json
+import os
+import unittest
+from unittest import mock
+
+from data_processor import ScheduleDataProcessor
+from payload_stream import parse_streamed_payload
+from request_payload import BodyDecoder, PayloadError, parse_body_stream
+from schedule_cache import payload_digest
+
+PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "Payload.json")
+
+
+def load_body():
+    with open(PAYLOAD_PATH, "rb") as f:
+        return f.read()
+
+
+def chunked(data, size=4096):
+    return iter([data[i:i + size] for i in range(0, len(data), size)])
+
+
+class StreamedPayloadTest(unittest.TestCase):
+    def setUp(self):
+        self.body = load_body()
+        self.parsed = json.loads(self.body)
+        self.expected = ScheduleDataProcessor().process_catalog(self.parsed["courseData"])["catalog"]
+
+    def assert_same_catalog(self, payload, catalog):
+        self.assertEqual(payload["catalogRef"], payload_digest(self.parsed["courseData"]))
+        self.assertEqual(catalog.ref, payload["catalogRef"])
+        self.assertNotIn("courseData", payload)
+        self.assertEqual(payload["preferences"], self.parsed["preferences"])
+        self.assertEqual(catalog.compiled.courses, self.expected.courses)
+        self.assertEqual(list(catalog.compiled.ids), list(self.expected.ids))
+        self.assertEqual(list(catalog.compiled.dependent_targets), list(self.expected.dependent_targets))
+
+    def test_streamed_catalog_matches_json_loads(self):
+        payload, catalog = parse_streamed_payload(io.BytesIO(self.body))
+
+        self.assert_same_catalog(payload, catalog)
+
+    def test_gzip_body_streams_chunk_by_chunk(self):
+        with mock.patch("payload_stream.STREAM_MIN_BYTES", 1024):
+            payload, catalog = parse_body_stream(chunked(gzip.compress(self.body)), BodyDecoder("gzip"))
+
+        self.assert_same_catalog(payload, catalog)
+
+    def test_small_body_is_parsed_whole(self):
+        payload, catalog = parse_body_stream(chunked(self.body), BodyDecoder("identity"))
+
+        self.assertIsNone(catalog)
+        self.assertEqual(payload, self.parsed)
+
+    def test_client_catalog_ref_takes_precedence(self):
+        body = json.dumps({**self.parsed, "catalogRef": "abc"}).encode("utf-8")
+
+        payload, _ = parse_streamed_payload(io.BytesIO(body))
+
+        self.assertEqual(payload["catalogRef"], "abc")
+
+    def test_malformed_and_trailing_json_are_rejected(self):
+        for body in (self.body[:-10], self.body + b" {}"):
+            with self.assertRaises(PayloadError) as raised:
+                parse_streamed_payload(io.BytesIO(body))
+            self.assertEqual(raised.exception.status, 400)
+
+    def test_invalid_courses_are_reported_with_preferences(self):
+        self.parsed["courseData"][0]["sections"][0]["classes"][0]["credits"] = -1
+        self.parsed["preferences"]["startSemester"] = "Someday"
+        body = json.dumps(self.parsed).encode("utf-8")
+
+        with self.assertRaises(PayloadError) as raised:
+            parse_streamed_payload(io.BytesIO(body))
+
+        paths = {error["path"] for error in raised.exception.report["errors"]}
+        self.assertEqual(paths, {"courseData[0].sections[0].classes[0].credits", "preferences.startSemester"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import copy
+import json
+import os
+import unittest
+
+from payload_validator import PayloadValidator
+from schedule_runner import run_schedule
+
+PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "Payload.json")
+
+
+def load_payload():
+    with open(PAYLOAD_PATH) as f:
+        return json.load(f)
+
+
+def first_class(payload):
+    return payload["courseData"][0]["sections"][0]["classes"][0]
+
+
+class PayloadValidatorTest(unittest.TestCase):
+    def test_valid_payload_has_no_report(self):
+        payload = load_payload()
+        validator = PayloadValidator()
+        validator.check_preferences(payload["preferences"])
+        for index, course in enumerate(payload["courseData"]):
+            validator.check_course(index, course)
+
+        self.assertIsNone(validator.report())
+        self.assertTrue(validator.valid)
+
+    def test_every_problem_is_reported_in_one_400(self):
+        payload = load_payload()
+        payload["preferences"]["startSemester"] = "Autumn 2025"
+        payload["preferences"]["timeBudgetMs"] = -5
+        cls = first_class(payload)
+        del cls["class_name"]
+        cls["credits"] = "three"
+        cls["prerequisites"] = [999999]
+
+        outcome = run_schedule(payload)
+
+        self.assertEqual(outcome.status, 400)
+        paths = {error["path"] for error in outcome.body["errors"]}
+        class_path = "courseData[0].sections[0].classes[0]"
+        self.assertEqual(paths, {
+            "preferences.startSemester",
+            "preferences.timeBudgetMs",
+            f"{class_path}.class_name",
+            f"{class_path}.credits",
+            f"{class_path}.prerequisites[0]",
+        })
+        self.assertEqual(outcome.body["metadata"]["errorCount"], 5)
+        self.assertFalse(outcome.body["metadata"]["success"])
+        self.assertIn("and 4 more problems", outcome.body["error"])
+
+    def test_missing_course_data_and_preferences(self):
+        outcome = run_schedule({})
+
+        self.assertEqual(outcome.status, 400)
+        paths = [error["path"] for error in outcome.body["errors"]]
+        self.assertEqual(paths, ["preferences", "courseData"])
+
+    def test_malformed_course_data(self):
+        payload = load_payload()
+        payload["courseData"] = {"sections": []}
+
+        outcome = run_schedule(payload)
+
+        self.assertEqual(outcome.status, 400)
+        self.assertEqual([error["path"] for error in outcome.body["errors"]], ["courseData"])
+
+    def test_malformed_course_entries(self):
+        payload = load_payload()
+        payload["courseData"] = ["not a course", {"sections": "not a list"}] + payload["courseData"]
+
+        outcome = run_schedule(payload)
+
+        self.assertEqual(outcome.status, 400)
+        paths = [error["path"] for error in outcome.body["errors"]]
+        self.assertEqual(paths[:2], ["courseData[0]", "courseData[1].sections"])
+
+    def test_malformed_preferences(self):
+        payload = load_payload()
+        payload["preferences"] = {
+            "startSemester": 2025,
+            "approach": "semesters-based",
+            "alternatives": 0,
+            "prioritySeed": "x",
+        }
+
+        outcome = run_schedule(payload)
+
+        self.assertEqual(outcome.status, 400)
+        self.assertEqual({error["path"] for error in outcome.body["errors"]}, {
+            "preferences.startSemester",
+            "preferences.targetSemesters",
+            "preferences.alternatives",
+            "preferences.prioritySeed",
+        })
+
+    def test_report_caps_listed_errors_but_counts_all(self):
+        validator = PayloadValidator()
+        payload = load_payload()
+        cls = copy.deepcopy(first_class(payload))
+        cls["id"] = "bad"
+        cls["prerequisites"] = []
+        for index in range(150):
+            validator.check_course(index, {"sections": [{"classes": [cls]}]})
+
+        report = validator.report()
+
+        self.assertEqual(report["metadata"]["errorCount"], 150)
+        self.assertLessEqual(len(report["errors"]), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import os
+import unittest
+
+from replan import run_replan
+from schedule_runner import ScheduleOutcome, run_schedule
+
+PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "Payload.json")
+
+
+def load_payload():
+    with open(PAYLOAD_PATH) as f:
+        return json.load(f)
+
+
+def semester_names(schedule):
+    return [f"{semester['type']} {semester['year']}" for semester in schedule]
+
+
+class ReplanTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.payload = load_payload()
+        cls.schedule = run_schedule(cls.payload).body["schedule"]
+
+    def replan_from(self, index, runner=None):
+        cutoff = semester_names(self.schedule)[index]
+        payload = dict(self.payload, existingSchedule=self.schedule, cutoffSemester=cutoff)
+        return run_replan(payload, runner=runner)
+
+    def test_few_remaining_courses_leave_no_empty_semesters(self):
+        index = len(self.schedule) - 2
+        outcome = self.replan_from(index)
+
+        self.assertEqual(outcome.status, 200)
+        schedule = outcome.body["schedule"]
+        self.assertEqual(schedule[:index], self.schedule[:index])
+        self.assertTrue(all(semester["classes"] for semester in schedule))
+        placed = sorted(c["id"] for semester in schedule for c in semester["classes"])
+        original = sorted(c["id"] for semester in self.schedule for c in semester["classes"])
+        self.assertEqual(placed, original)
+        self.assertEqual(outcome.body["metadata"]["actualSemesters"], len(schedule))
+
+    def test_empty_semester_between_filled_ones_is_dropped(self):
+        index = len(self.schedule) - 2
+        tail = self.schedule[index:]
+
+        def runner(processed_data, cancel_token=None):
+            empty = {"type": "Spring", "year": 2099, "classes": [], "totalCredits": 0}
+            return ScheduleOutcome({
+                "metadata": {"success": True, "actualSemesters": 3},
+                "schedule": [dict(tail[0]), empty, dict(tail[1])]
+            })
+
+        outcome = self.replan_from(index, runner)
+
+        self.assertEqual(outcome.status, 200)
+        schedule = outcome.body["schedule"]
+        self.assertEqual(semester_names(schedule[index:]), semester_names(tail))
+        self.assertEqual(outcome.body["metadata"]["actualSemesters"], len(self.schedule))
+
+
+if __name__ == "__main__":
+    unittest.main()
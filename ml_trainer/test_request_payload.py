@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+import unittest
+import zlib
+from unittest import mock
+
+from request_payload import BodyDecoder, PayloadError, parse_json_body
+
+PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "Payload.json")
+
+
+def load_body():
+    with open(PAYLOAD_PATH, "rb") as f:
+        return f.read()
+
+
+def chunked(data, size=1000):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def decode(encoding, data):
+    decoder = BodyDecoder(encoding)
+    for chunk in chunked(data):
+        decoder.feed(chunk)
+    return decoder.finish()
+
+
+class BodyDecoderTest(unittest.TestCase):
+    def test_gzip_and_deflate_bodies_are_inflated(self):
+        body = load_body()
+
+        self.assertEqual(decode("gzip", gzip.compress(body)), body)
+        self.assertEqual(decode("x-gzip", gzip.compress(body)), body)
+        self.assertEqual(decode("deflate", zlib.compress(body)), body)
+        self.assertEqual(decode("identity", body), body)
+
+    def test_unsupported_encoding_is_415(self):
+        with self.assertRaises(PayloadError) as raised:
+            BodyDecoder("br")
+        self.assertEqual(raised.exception.status, 415)
+
+    def test_identity_body_over_the_limit_is_413(self):
+        with mock.patch("request_payload.MAX_PAYLOAD_BYTES", 100):
+            with self.assertRaises(PayloadError) as raised:
+                decode("identity", b"x" * 101)
+        self.assertEqual(raised.exception.status, 413)
+
+    def test_zip_bomb_is_413_before_it_is_fully_inflated(self):
+        bomb = gzip.compress(b"0" * (8 * 1024 * 1024))
+        decoder = BodyDecoder("gzip")
+
+        with mock.patch("request_payload.MAX_PAYLOAD_BYTES", 64 * 1024):
+            with self.assertRaises(PayloadError) as raised:
+                for chunk in chunked(bomb):
+                    decoder.feed(chunk)
+                decoder.finish()
+
+        self.assertEqual(raised.exception.status, 413)
+        self.assertIn("Decompressed payload", str(raised.exception))
+        self.assertLessEqual(decoder.size, 64 * 1024 + 1)
+
+    def test_corrupt_and_truncated_bodies_are_400(self):
+        compressed = gzip.compress(load_body())
+
+        with self.assertRaises(PayloadError) as corrupt:
+            decode("gzip", b"not gzip at all")
+        with self.assertRaises(PayloadError) as truncated:
+            decode("gzip", compressed[:len(compressed) // 2])
+
+        self.assertEqual(corrupt.exception.status, 400)
+        self.assertEqual(truncated.exception.status, 400)
+        self.assertIn("Truncated", str(truncated.exception))
+
+    def test_malformed_and_empty_json_are_400(self):
+        for body in (b"", b"{not json"):
+            with self.assertRaises(PayloadError) as raised:
+                parse_json_body(body)
+            self.assertEqual(raised.exception.status, 400)
+
+
+class CompressedRequestTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import api
+        cls.client = api.app.test_client()
+
+    def post(self, body, encoding):
+        return self.client.post("/catalogs", data=body, headers={
+            "Content-Type": "application/json",
+            "Content-Encoding": encoding
+        })
+
+    def test_gzip_request_is_accepted(self):
+        course_data = json.loads(load_body())["courseData"]
+        body = gzip.compress(json.dumps({"courseData": course_data}).encode("utf-8"))
+
+        response = self.post(body, "gzip")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("catalogRef", response.get_json())
+
+    def test_zip_bomb_request_is_413(self):
+        body = gzip.compress(b'{"courseData": "' + b"0" * (4 * 1024 * 1024) + b'"}')
+
+        with mock.patch("request_payload.MAX_PAYLOAD_BYTES", 64 * 1024):
+            response = self.post(body, "gzip")
+
+        self.assertEqual(response.status_code, 413)
+
+    def test_unsupported_encoding_request_is_415(self):
+        response = self.post(load_body(), "br")
+
+        self.assertEqual(response.status_code, 415)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+
+from schedule_cache import ScheduleCache, payload_digest
+
+
+class ScheduleCacheTest(unittest.TestCase):
+    def test_entry_expires_after_ttl(self):
+        cache = ScheduleCache(max_entries=4, ttl_seconds=10)
+        with mock.patch("schedule_cache.time.monotonic", return_value=100.0):
+            cache.put("key", {"schedule": []})
+        with mock.patch("schedule_cache.time.monotonic", return_value=109.0):
+            self.assertEqual(cache.get("key"), {"schedule": []})
+        with mock.patch("schedule_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("key"))
+
+        self.assertEqual(cache.stats()["size"], 0)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ScheduleCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # b is now the least recently used
+        cache.put("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_zero_size_cache_stores_nothing(self):
+        cache = ScheduleCache(max_entries=0, ttl_seconds=60)
+        cache.put("a", 1)
+
+        self.assertIsNone(cache.get("a"))
+
+    def test_digest_ignores_field_order(self):
+        first = {"preferences": {"startSemester": "Fall 2025", "approach": "credits-based"},
+                 "courseData": [{"id": 1, "sections": []}]}
+        second = {"courseData": [{"sections": [], "id": 1}],
+                  "preferences": {"approach": "credits-based", "startSemester": "Fall 2025"}}
+
+        self.assertEqual(payload_digest(first), payload_digest(second))
+
+    def test_digest_differs_when_values_differ(self):
+        self.assertNotEqual(payload_digest({"targetSemesters": 8}), payload_digest({"targetSemesters": 9}))
+        self.assertNotEqual(payload_digest({"ids": [1, 2]}), payload_digest({"ids": [2, 1]}))
+
+
+if __name__ == "__main__":
+    unittest.main()
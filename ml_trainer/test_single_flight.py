@@ -0,0 +1,102 @@
+import contextlib
+import threading
+import time
+import unittest
+
+from single_flight import SingleFlight
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.005)
+
+
+class SingleFlightTest(unittest.TestCase):
+    def run_with_followers(self, fn, followers=3):
+        """Start a leader running fn, wait for followers to join it, and collect everyone's outcome"""
+        flight = SingleFlight()
+        release = threading.Event()
+        results = []
+        lock = threading.Lock()
+
+        def leader_fn():
+            release.wait(5)
+            return fn()
+
+        def call():
+            try:
+                outcome = ("result", flight.do("key", leader_fn))
+            except Exception as e:
+                outcome = ("error", e)
+            with lock:
+                results.append(outcome)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        wait_until(lambda: flight.in_flight() == 1)
+        threads = [threading.Thread(target=call) for _ in range(followers)]
+        for thread in threads:
+            thread.start()
+        wait_until(lambda: flight.waiters("key") == followers)
+        release.set()
+        for thread in [leader] + threads:
+            thread.join(5)
+        return flight, results
+
+    def test_followers_share_the_leader_result(self):
+        calls = []
+        flight, results = self.run_with_followers(lambda: calls.append(1) or {"schedule": []})
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, (_, shared) in results), [False, True, True, True])
+        self.assertTrue(all(value == {"schedule": []} for _, (value, _) in results))
+        self.assertEqual(flight.shared, 3)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_followers_get_the_leader_exception(self):
+        error = ValueError("optimizer failed")
+
+        def fail():
+            raise error
+
+        flight, results = self.run_with_followers(fail)
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(kind == "error" and raised is error for kind, raised in results))
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_follow_rejection_leaves_the_call_in_flight(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        class Full(Exception):
+            pass
+
+        @contextlib.contextmanager
+        def reject():
+            raise Full()
+            yield
+
+        leader = threading.Thread(target=flight.do, args=("key", lambda: release.wait(5)))
+        leader.start()
+        wait_until(lambda: flight.in_flight() == 1)
+        with self.assertRaises(Full):
+            flight.do("key", lambda: None, follow=reject)
+        release.set()
+        leader.join(5)
+
+        self.assertEqual(flight.shared, 0)
+
+    def test_calls_after_completion_run_again(self):
+        flight = SingleFlight()
+        calls = []
+
+        self.assertEqual(flight.do("key", lambda: calls.append(1) or len(calls)), (1, False))
+        self.assertEqual(flight.do("key", lambda: calls.append(1) or len(calls)), (2, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import json
+import os
+import unittest
+
+from schedule_cache import payload_digest, schedule_cache
+from sweep import run_sweep
+
+PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "Payload.json")
+
+
+class SweepCacheTest(unittest.TestCase):
+    def setUp(self):
+        with open(PAYLOAD_PATH) as f:
+            payload = json.load(f)
+        payload["preferences"]["approach"] = "credits-based"
+        self.payload = {**payload, "grid": {"majorClassLimit": [3, 4]}}
+        schedule_cache.clear()
+
+    def variant_keys(self, outcome, preferences):
+        ref = outcome.body["metadata"]["catalogRef"]
+        return [payload_digest({"catalogRef": ref, "preferences": {**preferences, **row["overrides"]}})
+                for row in outcome.body["variants"]]
+
+    def test_single_plan_variants_are_cached_for_generate_schedule(self):
+        outcome = run_sweep(self.payload)
+
+        self.assertEqual(outcome.status, 200)
+        for key in self.variant_keys(outcome, self.payload["preferences"]):
+            self.assertIsNotNone(schedule_cache.get(key))
+
+    def test_variants_of_alternatives_requests_skip_the_cache(self):
+        preferences = {**self.payload["preferences"], "alternatives": 3}
+        payload = {**self.payload, "preferences": preferences}
+
+        outcome = run_sweep(payload)
+
+        self.assertEqual(outcome.status, 200)
+        self.assertTrue(all(row["status"] == 200 for row in outcome.body["variants"]))
+        for key in self.variant_keys(outcome, preferences):
+            self.assertIsNone(schedule_cache.get(key))
+        single_keys = self.variant_keys(outcome, self.payload["preferences"])
+        self.assertTrue(all(schedule_cache.get(key) is None for key in single_keys))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional
+import logging
+import json
+import time
+import os
+
+from catalog_store import catalog_store
+from schedule_runner import run_schedule
+
+logger = logging.getLogger(__name__)
+
+# Two linked courses are enough to walk every code path the first real request would take
+_WARM_UP_COURSE_DATA = [{
+    "id": 1,
+    "course_name": "Warm-up",
+    "course_type": "major",
+    "sections": [{
+        "id": 1,
+        "section_name": "Warm-up",
+        "credits_required": 0,
+        "is_required": True,
+        "classes": [
+            {"id": 1, "class_name": "Warm-up I", "class_number": "WU 101", "credits": 3,
+             "semesters_offered": ["Fall", "Winter", "Spring"], "prerequisites": [], "corequisites": [],
+             "is_elective": False},
+            {"id": 2, "class_name": "Warm-up II", "class_number": "WU 102", "credits": 3,
+             "semesters_offered": ["Fall", "Winter", "Spring"], "prerequisites": [1], "corequisites": [],
+             "is_elective": False}
+        ]
+    }]
+}]
+
+def preload_catalogs(paths: List[str]) -> List[str]:
+    """Register catalogs from JSON files ({"courseData": [...]} or a bare list) and return their refs"""
+    refs = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping catalog {path}: {e}")
+            continue
+
+        course_data = data.get("courseData") if isinstance(data, dict) else data
+        entry, error = catalog_store.register(course_data)
+        if error:
+            logger.warning(f"Skipping catalog {path}: {error.get('error')}")
+            continue
+        refs.append(entry.ref)
+    return refs
+
+def warm_up(catalog_paths: Optional[List[str]] = None) -> Dict[str, float]:
+    """Import the optimizers, preload catalogs and run one schedule per approach.
+
+    Meant to run once in the gunicorn master with preload_app, so forked workers start hot.
+    Catalog paths default to the comma-separated SCHEDULER_PRELOAD_CATALOGS.
+    """
+    if catalog_paths is None:
+        catalog_paths = [p for p in os.environ.get("SCHEDULER_PRELOAD_CATALOGS", "").split(",") if p]
+
+    timings = {}
+    started = time.perf_counter()
+    refs = preload_catalogs(catalog_paths)
+    timings["preload_catalogs"] = time.perf_counter() - started
+
+    for approach in ("credits-based", "semesters-based"):
+        started = time.perf_counter()
+        outcome = run_schedule({
+            "courseData": _WARM_UP_COURSE_DATA,
+            "preferences": {"startSemester": "Fall 2025", "approach": approach, "targetSemesters": 2}
+        })
+        timings[f"schedule_{approach}"] = time.perf_counter() - started
+        if outcome.status != 200:
+            logger.warning(f"Warm-up {approach} schedule failed: {outcome.body.get('error')}")
+
+    logger.info("Warm-up complete", extra={
+        "catalogs": len(refs),
+        **{name: round(seconds * 1000, 1) for name, seconds in timings.items()}
+    })
+    return timings
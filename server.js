@@ -3,6 +3,8 @@ require('dotenv').config(); // Load environment variables from .env
 const express = require('express');
 const path = require('path');
 const axios = require('axios'); // Add this at the top with other imports
+const zlib = require('zlib');
+const MlRpcClient = require('./mlRpcClient');
 const app = express();
 const PORT = process.env.PORT || 3000;
 
@@ -68,20 +70,45 @@ app.get('/api/classes/for-courses', async (req, res) => {
     }
 });
 
+// Persistent binary transport to the ML service, used instead of HTTP when ML_RPC_ADDRESS is set
+const mlRpcClient = process.env.ML_RPC_ADDRESS ? new MlRpcClient(process.env.ML_RPC_ADDRESS) : null;
+
 // Update this proxy route in your server.js
 app.post('/api/generate-schedule', async (req, res) => {
+    if (mlRpcClient) {
+        try {
+            const result = await mlRpcClient.generateSchedule(req.body);
+            if (result.retryAfter) {
+                res.set('Retry-After', String(result.retryAfter));
+            }
+            return res.status(result.status).json(result.body);
+        } catch (error) {
+            if (!(error instanceof MlRpcClient.MlRpcConnectionError)) {
+                // The ML service may already be computing this schedule; don't start it a second time
+                console.error('ML RPC request failed:', error.message);
+                return res.status(500).json({ error: 'ML service request failed', details: error.message });
+            }
+            // Never reached the ML service, so fall through to HTTP rather than fail the request
+            console.error('ML RPC connection failed, falling back to HTTP:', error.message);
+        }
+    }
+
     try {
         // Get the correct ML service URL
         const mlServiceUrl = process.env.ML_SERVICE_URL;
         
         console.log(`Attempting to connect to ML service at: ${mlServiceUrl}/generate-schedule`);
         
+        // Catalog payloads are large and compress well; the ML service inflates them as a stream
+        const body = zlib.gzipSync(JSON.stringify(req.body));
+        
         const response = await axios.post(
             `${mlServiceUrl}/generate-schedule`, // This should be the full URL
-            req.body,
+            body,
             {
                 headers: { 
                     'Content-Type': 'application/json',
+                    'Content-Encoding': 'gzip',
                     'Origin': process.env.NODE_ENV === 'production' 
                         ? 'https://course-scheduler-web.onrender.com' 
                         : 'http://localhost:3000'
@@ -91,7 +118,8 @@ app.post('/api/generate-schedule', async (req, res) => {
         );
 
         console.log('Successfully received response from ML service');
-        return res.json(response.data);
+        // A plan cut short by its time budget comes back as 200 with metadata.success false
+        return res.status(response.status).json(response.data);
     } catch (error) {
         console.error('Error connecting to ML service:', {
             message: error.message,
@@ -106,6 +134,34 @@ app.post('/api/generate-schedule', async (req, res) => {
     }
 });
 
+// Re-plan from a cutoff semester, keeping the earlier semesters of an existing schedule fixed
+app.post('/api/replan-schedule', async (req, res) => {
+    try {
+        const response = await axios.post(
+            `${process.env.ML_SERVICE_URL}/replan-schedule`,
+            zlib.gzipSync(JSON.stringify(req.body)),
+            {
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Content-Encoding': 'gzip'
+                },
+                timeout: 30000
+            }
+        );
+        return res.json(response.data);
+    } catch (error) {
+        console.error('Error re-planning with ML service:', {
+            message: error.message,
+            status: error.response?.status
+        });
+        
+        res.status(error.response?.status || 500).json(error.response?.data || {
+            error: 'Failed to connect to ML service',
+            details: error.message
+        });
+    }
+});
+
 // Add a test endpoint to verify ML service connectivity
 app.get('/api/ml-status', async (req, res) => {
     try {